@@ -0,0 +1,503 @@
+from connect4 import Connect4
+from bitboard import Bitboard
+from bot import Bot
+from moveordering import MoveOrdering
+from transposition import TranspositionTable, ENTRY_BYTES
+from solver import Solver
+from interface import Interface
+from compactgame import CompactGame
+from mcts import MonteCarloBot
+from threats import LineTable
+import openingbook
+import endgame
+import tempfile
+import json
+import numpy as np
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+"""
+Benchmarks for the bot's search.
+
+Usage: python benchmark.py [boards|ordering|algorithms|leaves|parallel|solver|suite|winners|sessions|mcts|geometries|mirror|endgame] [depth]
+       python benchmark.py suite [depth] [file]
+       python benchmark.py regressions old.json new.json
+
+boards      compares the search speed on the matrix state and on bitboards
+ordering    compares nodes and cutoffs of the search with different move orderings
+algorithms  compares minimax alpha-beta with principal variation search and aspiration windows
+leaves      compares scoring the leaves one at a time with scoring them in batches
+parallel    compares the search time with 1 up to (at most 7) CPU cores
+solver      solves the positions with at least 10 discs exactly and grades the move the bot finds at depth
+suite       measures the hot paths on every position and writes the results as JSON (default benchmark.json):
+            perft node counts, staticIsWinningMove calls/sec, staticScore evals/sec
+            and minimax_alphabeta nodes/sec and time to each depth
+regressions compares two JSON files written by suite, for example from two commits
+winners     compares finding the winners of a million boards in one batch with checking them one by one
+sessions    measures the memory of a game session as server.py kept it before, with its own bot and a
+            Connect4, and as it keeps it now, with a shared bot and a CompactGame
+mcts        compares the playouts/sec of Monte Carlo tree search with different playout batch sizes
+geometries  measures building the line tables and weights, win checks, perft and the search
+            on every board size and connect in GEOMETRIES
+mirror      compares the transposition table entries, opening book records and solver nodes with and
+            without sharing the entry of a position and its mirror image, see Bitboard.canonicalKey
+endgame     builds endgame databases for a few numbers of empty slots from games of the bot against
+            itself, and compares the search at depth with and without them, on positions of those
+            games and of other games
+
+"""
+
+# positions to search from, given as the columns played from an empty board
+POSITIONS = {
+  'opening': [],
+  'midgame': [3, 0, 0, 3, 4, 3, 0, 2, 3, 4],
+  'sides': [0, 6, 1, 5, 0, 6, 1, 5],
+  'late': [1, 4, 1, 6, 3, 1, 5, 2, 1, 2, 2, 2, 4, 6, 4, 6, 3, 0, 6, 0, 1, 4],
+}
+
+# (rows, columns, connect) of the boards the geometries benchmark runs on
+GEOMETRIES = [(6, 7, 4), (7, 8, 4), (8, 9, 4), (10, 12, 4), (8, 9, 5), (10, 12, 5)]
+
+# bots with different move orderings, created fresh for every position
+ORDERINGS = {
+  'column order': lambda: Bot(2),
+  'center first': lambda: Bot(2, None, MoveOrdering(killers=False, history=False)),
+  'killers+history': lambda: Bot(2, None, MoveOrdering()),
+  'hash move': lambda: Bot(2, TranspositionTable(4), MoveOrdering()),
+}
+
+# bots with different search algorithms, all with a transposition table and move ordering
+ALGORITHMS = {
+  'alphabeta': lambda: Bot(2, TranspositionTable(4), MoveOrdering()),
+  'pvs': lambda: Bot(2, TranspositionTable(4), MoveOrdering(), 'pvs'),
+  'pvs+aspiration': lambda: Bot(2, TranspositionTable(4), MoveOrdering(), 'pvs', 4),
+}
+
+def stateFromMoves(moves):
+  game = Connect4()
+  for column in moves:
+    game.move(column)
+    game.switchPlayer()
+  return game
+
+def timeSearch(state, maximizingPlayer, depth):
+  # run one alpha-beta search for player 2 and return (move, nodes, seconds)
+  bot = Bot(2)
+  start = time.perf_counter()
+  move, score = bot.minimax_alphabeta(state, maximizingPlayer, depth, bot.lossScore, bot.winScore)
+  return move, bot.nodes, time.perf_counter() - start
+
+def compare(depth):
+  print('{0:<10} {1:<9} {2:>9} {3:>9} {4:>12}'.format('position', 'board', 'nodes', 'seconds', 'nodes/sec'))
+  for name, moves in POSITIONS.items():
+    game = stateFromMoves(moves)
+    results = {}
+    for board, state in (('matrix', game.getState()), ('bitboard', game.getBitboard())):
+      move, nodes, seconds = timeSearch(state, len(moves) % 2 == 1, depth)
+      results[board] = (move, nodes / seconds)
+      print('{0:<10} {1:<9} {2:>9} {3:>9.3f} {4:>12.0f}'.format(name, board, nodes, seconds, nodes / seconds))
+    assert results['matrix'][0] == results['bitboard'][0], 'the boards disagree on the best move'
+    print('{0:<10} speedup {1:.1f}x'.format(name, results['bitboard'][1] / results['matrix'][1]))
+
+def compareOrderings(depth, bots=ORDERINGS):
+  # search every position with iterative deepening to depth and sum the statistics,
+  # the earlier iterations are what fills the killers, history and hash moves
+  print('{0:<16} {1:>9} {2:>8} {3:>11} {4:>9}'.format('bot', 'nodes', 'cutoffs', 'first move', 'seconds'))
+  for name, createBot in bots.items():
+    nodes, cutoffs, firstMoveCutoffs, seconds = 0, 0, 0, 0.0
+    for moves in POSITIONS.values():
+      bot = createBot()
+      state = stateFromMoves(moves).getBitboard()
+      start = time.perf_counter()
+      bot.iterativeDeepening(state, len(moves) % 2 == 1, 10 ** 9, maxDepth=depth)
+      seconds += time.perf_counter() - start
+      nodes += bot.nodes
+      cutoffs += bot.cutoffs
+      firstMoveCutoffs += bot.firstMoveCutoffs
+    firstMoveRate = firstMoveCutoffs / cutoffs if cutoffs > 0 else 0.0
+    print('{0:<16} {1:>9} {2:>8} {3:>10.1%} {4:>9.3f}'.format(name, nodes, cutoffs, firstMoveRate, seconds))
+
+def compareLeafScoring(depth):
+  print('{0:<9} {1:<8} {2:>9} {3:>9} {4:>12}'.format('board', 'leaves', 'nodes', 'seconds', 'nodes/sec'))
+  for board in ('matrix', 'bitboard'):
+    for batchLeaves in (False, True):
+      nodes, seconds = 0, 0.0
+      for moves in POSITIONS.values():
+        game = stateFromMoves(moves)
+        state = game.getState() if board == 'matrix' else game.getBitboard()
+        bot = Bot(2, None, MoveOrdering(), batchLeaves=batchLeaves)
+        start = time.perf_counter()
+        bot.search(state, len(moves) % 2 == 1, depth, bot.lossScore, bot.winScore)
+        seconds += time.perf_counter() - start
+        nodes += bot.nodes
+      name = 'batched' if batchLeaves else 'single'
+      print('{0:<9} {1:<8} {2:>9} {3:>9.3f} {4:>12.0f}'.format(board, name, nodes, seconds, nodes / seconds))
+
+def compareWorkers(depth):
+  # every bot gets a fresh transposition table and move ordering, the pool is started before timing
+  print('{0:<8} {1:>9} {2:>9} {3:>8}'.format('workers', 'nodes', 'seconds', 'speedup'))
+  serialSeconds, serialMoves = None, None
+  for workers in range(1, min(7, os.cpu_count() or 1) + 1):
+    nodes, seconds, moves = 0, 0.0, []
+    for positionMoves in POSITIONS.values():
+      bot = Bot(2, TranspositionTable(4), MoveOrdering(), workers=workers)
+      if workers > 1:
+        bot.getExecutor().submit(int).result()
+      state = stateFromMoves(positionMoves).getBitboard()
+      start = time.perf_counter()
+      move, score = bot.search(state, len(positionMoves) % 2 == 1, depth, bot.lossScore, bot.winScore)
+      seconds += time.perf_counter() - start
+      nodes += bot.nodes
+      moves.append((move, score))
+      bot.close()
+    if serialSeconds is None:
+      serialSeconds, serialMoves = seconds, moves
+    assert [score for move, score in moves] == [score for move, score in serialMoves], 'the searches disagree on the score'
+    assert [move for move, score in moves] == [move for move, score in serialMoves], 'the searches disagree on the move'
+    print('{0:<8} {1:>9} {2:>9.3f} {3:>7.2f}x'.format(workers, nodes, seconds, serialSeconds / seconds))
+
+def gradeBotMoves(depth):
+  # the opening and the sides are too far from the end to solve in Python
+  print('{0:<10} {1:<7} {2:>6} {3:>9} {4:>9} {5:>10} {6:>9}'.format(
+    'position', 'result', 'moves', 'nodes', 'seconds', 'nodes/sec', 'bot move'))
+  for name, moves in POSITIONS.items():
+    if len(moves) < 10:
+      continue
+    board = stateFromMoves(moves).getBitboard()
+    solver = Solver()
+    scores = solver.analyze(board)
+    score = max(value for value in scores if value is not None)
+    stats = solver.getStats()
+    bot = Bot(1 if len(moves) % 2 == 0 else 2, TranspositionTable(4), MoveOrdering())
+    move, botScore = bot.search(board, True, depth, bot.lossScore, bot.winScore)
+    grade = 'best' if scores[move[1]] == score else 'loses {0}'.format(score - scores[move[1]])
+    print('{0:<10} {1:<7} {2:>6} {3:>9} {4:>9.3f} {5:>10.0f} {6:>9}'.format(name, solver.outcome(score),
+      solver.movesToEnd(board, score), stats['nodes'], stats['seconds'], stats['nodesPerSecond'], grade))
+
+def perft(board, player, depth):
+  # the number of positions depth plies from board, games that end earlier are not continued
+  if depth == 0:
+    return 1
+  count = 0
+  for row, column in board.legalMoves():
+    board.play(column, player)
+    if depth == 1 or board.isWin(player):
+      count += 1 if depth == 1 else 0
+    else:
+      count += perft(board, player ^ 3, depth - 1)
+    board.undo()
+  return count
+
+def callsPerSecond(function, arguments, minimumSeconds=0.2):
+  # call function with each of the arguments until minimumSeconds have passed, return the calls per second
+  calls = 0
+  start = time.perf_counter()
+  while True:
+    for argument in arguments:
+      function(*argument)
+    calls += len(arguments)
+    seconds = time.perf_counter() - start
+    if seconds >= minimumSeconds:
+      return calls / seconds
+
+def gitCommit():
+  try:
+    return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+  except (OSError, subprocess.CalledProcessError):
+    return None
+
+def benchmarkPosition(moves, depth):
+  game = stateFromMoves(moves)
+  player = 1 if len(moves) % 2 == 0 else 2
+  boards = {'matrix': game.getState(), 'bitboard': game.getBitboard()}
+  result = {'moves': moves, 'perft': {}, 'winningMoveCallsPerSec': {}, 'scoreEvalsPerSec': {}}
+
+  for plies in range(1, 6):
+    start = time.perf_counter()
+    nodes = perft(game.getBitboard(), player, plies)
+    result['perft'][plies] = {'nodes': nodes, 'seconds': time.perf_counter() - start}
+
+  for name, state in boards.items():
+    # check every move of the position, as the search does
+    children = [(Connect4.staticStateAfterMove(state, move, player), move)
+      for move in Connect4.staticLegalMovesFromState(state)]
+    result['winningMoveCallsPerSec'][name] = callsPerSecond(Connect4.staticIsWinningMove, children)
+    result['scoreEvalsPerSec'][name] = callsPerSecond(Connect4.staticScore, [(state, player)])
+
+  # minimax_alphabeta to each depth on bitboards, without a transposition table or move ordering
+  result['search'] = {}
+  for searchDepth in range(1, depth + 1):
+    bot = Bot(player)
+    state = game.getBitboard()
+    start = time.perf_counter()
+    move, score = bot.minimax_alphabeta(state, True, searchDepth, bot.lossScore, bot.winScore)
+    seconds = time.perf_counter() - start
+    result['search'][searchDepth] = {'nodes': bot.nodes, 'seconds': seconds, 'nodesPerSec': bot.nodes / seconds}
+  return result
+
+def runSuite(depth, path):
+  results = {
+    'commit': gitCommit(),
+    'python': platform.python_version(),
+    'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    'depth': depth,
+    'positions': {name: benchmarkPosition(moves, depth) for name, moves in POSITIONS.items()},
+  }
+  with open(path, 'w') as file:
+    json.dump(results, file, indent=2)
+
+  print('{0:<10} {1:>10} {2:>14} {3:>14} {4:>12} {5:>10}'.format(
+    'position', 'perft(5)', 'win checks/s', 'evals/s', 'nodes/s', 'seconds'))
+  for name, result in results['positions'].items():
+    search = result['search'][depth]
+    print('{0:<10} {1:>10} {2:>14.0f} {3:>14.0f} {4:>12.0f} {5:>10.3f}'.format(name, result['perft'][5]['nodes'],
+      result['winningMoveCallsPerSec']['bitboard'], result['scoreEvalsPerSec']['bitboard'],
+      search['nodesPerSec'], search['seconds']))
+  print('results written to {0}'.format(path))
+
+def compareRuns(oldPath, newPath):
+  # the ratio new / old of every rate, above 1 is faster
+  with open(oldPath) as file:
+    old = json.load(file)
+  with open(newPath) as file:
+    new = json.load(file)
+  print('{0} -> {1}'.format(old['commit'], new['commit']))
+  print('{0:<10} {1:<34} {2:>14} {3:>14} {4:>8}'.format('position', 'measure', 'old', 'new', 'ratio'))
+  for name, newResult in new['positions'].items():
+    oldResult = old['positions'].get(name)
+    if oldResult is None:
+      continue
+    rates = []
+    for measure in ('winningMoveCallsPerSec', 'scoreEvalsPerSec'):
+      for board in ('matrix', 'bitboard'):
+        rates.append(('{0} {1}'.format(measure, board), oldResult[measure][board], newResult[measure][board]))
+    depth = str(max(int(searchDepth) for searchDepth in newResult['search'] if searchDepth in oldResult['search']))
+    rates.append(('search nodes/sec depth ' + depth, oldResult['search'][depth]['nodesPerSec'],
+      newResult['search'][depth]['nodesPerSec']))
+    for measure, oldRate, newRate in rates:
+      print('{0:<10} {1:<34} {2:>14.0f} {3:>14.0f} {4:>7.2f}x'.format(name, measure, oldRate, newRate, newRate / oldRate))
+
+def compareWinnerDetection(count=1000000, checked=2000):
+  # boards with random discs, they do not have to be reachable to have a winner
+  rng = np.random.default_rng(1)
+  states = rng.choice(3, size=(count, 6, 7), p=[0.5, 0.25, 0.25]).astype(float)
+  start = time.perf_counter()
+  winners = Connect4.staticWinnerBatch(states)
+  batchSeconds = time.perf_counter() - start
+
+  # the scalar check looks at every disc of a board
+  start = time.perf_counter()
+  for index in range(checked):
+    state = states[index]
+    found = {int(state[row, column]) for row in range(6) for column in range(7)
+      if state[row, column] != 0 and Connect4.staticIsWinningMove(state, (row, column))}
+    assert sum(found) == winners[index], 'the batch disagrees with staticIsWinningMove on board {0}'.format(index)
+  scalarSeconds = time.perf_counter() - start
+
+  # the masks of the boards as Python integers, Bitboard.fromState expects the discs to have fallen down
+  masks = [(int(mask1), int(mask2)) for mask1, mask2 in
+    zip(Bitboard.packStates(states[:checked], 1), Bitboard.packStates(states[:checked], 2))]
+  start = time.perf_counter()
+  bitboardWinners = [Bitboard.hasAlignment(mask1, 7) + 2 * Bitboard.hasAlignment(mask2, 7) for mask1, mask2 in masks]
+  bitboardSeconds = time.perf_counter() - start
+  assert bitboardWinners == list(winners[:checked]), 'the batch disagrees with Bitboard.hasAlignment'
+
+  print('{0:<22} {1:>9} {2:>14}'.format('method', 'boards', 'boards/sec'))
+  print('{0:<22} {1:>9} {2:>14.0f}'.format('staticWinnerBatch', count, count / batchSeconds))
+  print('{0:<22} {1:>9} {2:>14.0f}'.format('Bitboard.hasAlignment', checked, checked / bitboardSeconds))
+  print('{0:<22} {1:>9} {2:>14.0f}'.format('staticIsWinningMove', checked, checked / scalarSeconds))
+
+def sessionBytes(createSession, count=2000, moves=(3, 3, 2, 4)):
+  # the memory of a session with a few moves played, averaged over count sessions
+  tracemalloc.start()
+  before = tracemalloc.get_traced_memory()[0]
+  sessions = [createSession() for _ in range(count)]
+  for session in sessions:
+    for column in moves:
+      session.makeMove(column)
+  used = tracemalloc.get_traced_memory()[0] - before
+  tracemalloc.stop()
+  return used / count
+
+def compareSessions(count=2000):
+  sharedBot = Bot(2, TranspositionTable(0))
+  sessions = [
+    ('own bot, Connect4', lambda: Interface(2, transpositionTableMB=0)),
+    ('shared bot, Connect4', lambda: Interface(2, bot=sharedBot)),
+    ('shared bot, CompactGame', lambda: Interface(2, bot=sharedBot, game=CompactGame())),
+  ]
+  print('{0:<26} {1:>14} {2:>16}'.format('session', 'bytes/session', 'sessions/100 MB'))
+  for name, createSession in sessions:
+    used = sessionBytes(createSession, count)
+    print('{0:<26} {1:>14.0f} {2:>16.0f}'.format(name, used, 100 * 2 ** 20 / used))
+
+def compareBatchSizes(budgetMs=500):
+  print('{0:<8} {1:>9} {2:>11} {3:>14} {4:>6}  {5}'.format('batch', 'playouts', 'iterations', 'playouts/sec', 'depth', 'columns'))
+  for batchSize in (1, 16, 64, 256):
+    playouts, iterations, seconds, depth, columns = 0, 0, 0.0, 0, []
+    for moves in POSITIONS.values():
+      bot = MonteCarloBot(batchSize, seed=0)
+      move, score = bot.search(stateFromMoves(moves).getBitboard(), budgetMs)
+      playouts += bot.playouts
+      iterations += bot.iterations
+      seconds += bot.seconds
+      depth = max(depth, bot.depthReached)
+      columns.append(move[1])
+    print('{0:<8} {1:>9} {2:>11} {3:>14.0f} {4:>6}  {5}'.format(batchSize, playouts, iterations, playouts / seconds, depth, columns))
+
+def randomPosition(rows, columns, connect, moves, seed=0):
+  # a game of random moves that has not ended, as a Connect4
+  rng = random.Random(seed)
+  while True:
+    game = Connect4(rows, columns, connect)
+    for _ in range(moves):
+      game.move(rng.choice([column for column in range(columns) if game.isMoveLegal(column)]))
+      game.switchPlayer()
+    if game.isPlaying():
+      return game
+
+def compareGeometries(depth):
+  print('{0:<16} {1:>9} {2:>9} {3:>11} {4:>11} {5:>11} {6:>10} {7:>8} {8:>8}'.format('board', 'tables ms', 'cached us',
+    'scan wins/s', 'walk wins/s', 'bit wins/s', 'perft n/s', 'nodes', 'search s'))
+  for rows, columns, connect in GEOMETRIES:
+    # the first call builds the line table and the weights, later calls find them in the caches
+    start = time.perf_counter()
+    Connect4.getBitboardScoreTables(rows, columns, connect)
+    Connect4.getBitboardWeights(rows, columns, connect)
+    buildSeconds = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(1000):
+      Connect4.getBitboardWeights(rows, columns, connect)
+      LineTable.get(rows, columns, connect)
+    cachedSeconds = (time.perf_counter() - start) / 1000
+
+    game = randomPosition(rows, columns, connect, rows * columns // 3)
+    state, board = game.getState(), game.getBitboard()
+    moves = [(row, column) for row in range(rows) for column in range(columns) if state[row, column] != 0]
+    # the old check, which takes the whole row, column and diagonals through the move
+    scan = lambda move: max(Connect4.staticScoreFromMove(state, move)) >= connect
+    assert [scan(move) for move in moves] == [Connect4.staticIsWinningMove(state, move, connect) for move in moves]
+    scanRate = callsPerSecond(scan, [(move,) for move in moves])
+    walkRate = callsPerSecond(Connect4.staticIsWinningMove, [(state, move, connect) for move in moves])
+    bitRate = callsPerSecond(board.isWinningMove, [(move,) for move in moves])
+
+    start = time.perf_counter()
+    nodes = perft(board.copy(), len(game.history) % 2 + 1, 3)
+    perftRate = nodes / (time.perf_counter() - start)
+    bot = Bot(2, TranspositionTable(4), MoveOrdering(rows, columns))
+    start = time.perf_counter()
+    bot.search(board, True, depth, bot.lossScore, bot.winScore)
+    searchSeconds = time.perf_counter() - start
+    print('{0:<16} {1:>9.1f} {2:>9.2f} {3:>11.0f} {4:>11.0f} {5:>11.0f} {6:>10.0f} {7:>8} {8:>8.3f}'.format(
+      '{0}x{1} connect {2}'.format(rows, columns, connect), 1000 * buildSeconds, 1e6 * cachedSeconds,
+      scanRate, walkRate, bitRate, perftRate, bot.nodes, searchSeconds))
+
+def compareMirrorKeys(depth, bookPlies=4):
+  board = stateFromMoves(POSITIONS['midgame']).getBitboard()
+  print('key {0:.0f}/sec, canonical key {1:.0f}/sec'.format(
+    callsPerSecond(board.key, [()]), callsPerSecond(board.canonicalKey, [()])))
+  print('{0:<10} {1:<7} {2:>8} {3:>9} {4:>10} {5:>9}'.format('position', 'mirror', 'nodes', 'entries', 'entry kB', 'seconds'))
+  for name, moves in POSITIONS.items():
+    for mirrorKeys in (False, True):
+      bot = Bot(2, TranspositionTable(4), MoveOrdering(), mirrorKeys=mirrorKeys)
+      state = stateFromMoves(moves).getBitboard()
+      maximizing = len(moves) % 2 == 1
+      bot.newSearch()
+      start = time.perf_counter()
+      bot.search(state, maximizing, depth, bot.lossScore, bot.winScore)
+      seconds = time.perf_counter() - start
+      used = bot.transpositionTable.getStats()['used']
+      print('{0:<10} {1:<7} {2:>8} {3:>9} {4:>10.1f} {5:>9.3f}'.format(name, str(mirrorKeys), bot.nodes, used, used * ENTRY_BYTES / 1024, seconds))
+
+  # a symmetric position is its own mirror image, every other position is kept once instead of twice
+  positions = openingbook.bookPositions(bookPlies)
+  both = sum(1 if Bitboard.mirrorKey(key, 7, 7) == key else 2 for key in positions)
+  print('opening book of {0} plies: {1} records ({2:.1f} kB) for {3} positions ({4:.1f} kB)'.format(bookPlies,
+    len(positions), len(positions) * openingbook.RECORD.size / 1024, both, both * openingbook.RECORD.size / 1024))
+
+  # a symmetric position, where half of the moves lead to the mirror image of another move
+  board = Solver.boardFromHistory([1, 1, 5, 5, 0, 1, 6, 5, 2, 3, 4, 3, 2, 0, 4, 6])
+  for mirrorKeys in (False, True):
+    solver = Solver(transpositionTable=TranspositionTable(16), mirrorKeys=mirrorKeys)
+    solver.analyze(board)
+    stats = solver.getStats()
+    print('solver analyze, mirror {0}: {1} nodes, {2} entries, {3:.2f} s'.format(mirrorKeys, stats['nodes'],
+      solver.transpositionTable.getStats()['used'], stats['seconds']))
+
+# numbers of empty slots of the endgame databases the endgame benchmark builds
+ENDGAME_EMPTIES = [6, 8, 10, 12]
+
+def searchEndgames(boards, depth, database):
+  # nodes and seconds of searching positions to depth, and the probe hit rate of the database
+  nodes, seconds = 0, 0.0
+  if database is not None:
+    database.resetStats()
+  for board in boards:
+    bot = Bot(board.moveCount() % 2 + 1, TranspositionTable(1), MoveOrdering(), endgame=database)
+    bot.newSearch()
+    start = time.perf_counter()
+    bot.search(board, True, depth, bot.lossScore, bot.winScore)
+    seconds += time.perf_counter() - start
+    nodes += bot.nodes
+  return (nodes, seconds, database.getStats()['hitRate'] if database is not None else None)
+
+def compareEndgames(depth, games=10, seedEmpties=14):
+  # the databases are built from the positions of the games with seedEmpties empty slots,
+  # the searches start two slots above the database, so the search enters it below the root
+  played = endgame.selfPlayGames(games, seed=0)
+  other = endgame.selfPlayGames(games, seed=1)
+  seeds = endgame.positionsAt(played, seedEmpties)
+  print('{0} seeds with {1} empty slots from {2} games'.format(len(seeds), seedEmpties, games))
+  print('{0:>7} {1:>9} {2:>9} {3:>8}  {4:<6} {5:>8} {6:>8} {7:>9}'.format(
+    'empties', 'positions', 'kB', 'build s', 'games', 'nodes', 'search s', 'hit rate'))
+  with tempfile.TemporaryDirectory() as directory:
+    for empties in ENDGAME_EMPTIES:
+      path = os.path.join(directory, 'endgame{0}.bin'.format(empties))
+      start = time.perf_counter()
+      count = endgame.generate(path, empties, seeds)
+      buildSeconds = time.perf_counter() - start
+      database = endgame.EndgameDatabase(path)
+      for name, histories in (('same', played), ('other', other)):
+        boards = endgame.positionsAt(histories, empties + 2)
+        for used in (None, database):
+          nodes, seconds, hitRate = searchEndgames(boards, depth, used)
+          print('{0:>7} {1:>9} {2:>9.1f} {3:>8.2f}  {4:<6} {5:>8} {6:>8.3f} {7:>9}'.format(empties, count,
+            os.path.getsize(path) / 1024, buildSeconds, name, nodes, seconds, '-' if hitRate is None else '{0:.2f}'.format(hitRate)))
+      database.close()
+
+if __name__ == '__main__':
+  mode = sys.argv[1] if len(sys.argv) > 1 else 'boards'
+  depth = int(sys.argv[2]) if len(sys.argv) > 2 and mode != 'regressions' else 4
+  if mode == 'ordering':
+    compareOrderings(depth)
+  elif mode == 'algorithms':
+    compareOrderings(depth, ALGORITHMS)
+  elif mode == 'leaves':
+    compareLeafScoring(depth)
+  elif mode == 'parallel':
+    compareWorkers(depth)
+  elif mode == 'solver':
+    gradeBotMoves(depth)
+  elif mode == 'suite':
+    runSuite(depth, sys.argv[3] if len(sys.argv) > 3 else 'benchmark.json')
+  elif mode == 'regressions':
+    compareRuns(sys.argv[2], sys.argv[3])
+  elif mode == 'winners':
+    compareWinnerDetection()
+  elif mode == 'sessions':
+    compareSessions()
+  elif mode == 'mcts':
+    compareBatchSizes()
+  elif mode == 'geometries':
+    compareGeometries(depth)
+  elif mode == 'mirror':
+    compareMirrorKeys(depth)
+  elif mode == 'endgame':
+    compareEndgames(depth)
+  else:
+    compare(depth)
@@ -0,0 +1,375 @@
+import numpy as np
+
+"""
+A bitboard representation of a Connect 4 position.
+
+Every player has an integer mask with one bit per slot. The board is stored
+column by column, from the bottom to the top, with one extra (always empty)
+bit on top of each column. The extra bit keeps the shifts used to look for
+four in a row from wrapping into the next column.
+
+Bit indexes for the default 6x7 board:
+
+  .  .  .  .  .  .  .
+  5 12 19 26 33 40 47
+  4 11 18 25 32 39 46
+  3 10 17 24 31 38 45
+  2  9 16 23 30 37 44
+  1  8 15 22 29 36 43
+  0  7 14 21 28 35 42
+
+Moves use the same (row, column) tuples as Connect4, where row 0 is the top
+row of the board. A bitboard can have any size, and connect is the number of
+discs in a row that wins. The NumPy batch methods keep the masks in uint64
+arrays, so they only take boards of at most 64 bits, such as 6x7 and 7x8.
+
+A position and its mirror image (the columns in reverse order) are the same
+position for the game, canonicalKey gives both the same key, so caches and
+books only need to keep one of them.
+
+A bitboard created with evaluation weights (one per bit, see bitWeights) keeps
+the sum of the weights of each player's discs up to date as discs are added,
+so evaluating a position does not need to look at the whole board. In the
+same way a bitboard created with a LineTable (see threats.py) keeps the disc
+counts of every line of four and its threat score up to date.
+
+"""
+
+# the masks used by Bitboard.mirrorKey for every (columns, height)
+MIRROR_MASKS = {}
+
+class Bitboard:
+
+  def __init__(self, rows=6, columns=7, weights=None, lineTable=None, connect=4):
+    self.rows = rows
+    self.columns = columns
+    # number of discs in a row that wins
+    self.connect = connect
+    # bits per column, including the empty bit on top
+    self.height = rows + 1
+    # masks[1] and masks[2] hold the discs of player 1 and 2
+    self.masks = [0, 0, 0]
+    # number of discs in each column
+    self.heights = [0] * columns
+    # evaluation weight of every bit (shared between copies), None if the score is not kept
+    self.weights = weights
+    # scores[1] and scores[2] are the sums of the weights of the discs of player 1 and 2
+    self.scores = [0, 0, 0] if weights is not None else None
+    # LineTable of the board size (shared between copies), None if the lines are not counted
+    self.lineTable = lineTable
+    # disc counts of every line, see LineTable, and the threat score for player 1
+    self.lineCounts = [0] * lineTable.numberOfLines() if lineTable is not None else None
+    self.threatScore = 0
+    # columns of the discs added by play, in order, so that undo can take them back
+    self.moveStack = []
+
+  def __str__(self):
+    return str(self.toState())
+
+  def __eq__(self, other):
+    return (isinstance(other, Bitboard) and self.rows == other.rows
+      and self.columns == other.columns and self.connect == other.connect and self.masks == other.masks)
+
+  def __hash__(self):
+    return hash(self.key())
+
+  @staticmethod
+  def fromState(state, weights=None, lineTable=None, connect=4):
+    # build a bitboard from a (rows, columns) matrix of 0, 1 and 2
+    rows, columns = state.shape
+    board = Bitboard(rows, columns, weights, lineTable, connect)
+    for column in range(columns):
+      for row in range(rows - 1, -1, -1):
+        player = int(state[row, column])
+        if player == 0:
+          break
+        board.play(column, player)
+    return board
+
+  def toState(self):
+    # the position as a float matrix, the same format as Connect4.state
+    state = np.zeros((self.rows, self.columns))
+    for column in range(self.columns):
+      for row in range(self.rows - self.heights[column], self.rows):
+        state[row, column] = self.playerAt(row, column)
+    return state
+
+  def copy(self):
+    board = Bitboard.__new__(Bitboard)
+    board.rows = self.rows
+    board.columns = self.columns
+    board.connect = self.connect
+    board.height = self.height
+    board.masks = self.masks[:]
+    board.heights = self.heights[:]
+    board.weights = self.weights
+    board.scores = self.scores[:] if self.scores is not None else None
+    board.lineTable = self.lineTable
+    board.lineCounts = self.lineCounts[:] if self.lineCounts is not None else None
+    board.threatScore = self.threatScore
+    board.moveStack = self.moveStack[:]
+    return board
+
+  def bit(self, row, column):
+    # the bit of the slot at (row, column)
+    return 1 << (column * self.height + self.rows - 1 - row)
+
+  def playerAt(self, row, column):
+    # the player occupying (row, column), 0 if the slot is empty
+    bit = self.bit(row, column)
+    if self.masks[1] & bit:
+      return 1
+    if self.masks[2] & bit:
+      return 2
+    return 0
+
+  def freeRow(self, column):
+    # the row a disc dropped in the column lands on, -1 if the column is full
+    return self.rows - 1 - self.heights[column]
+
+  def isLegal(self, column):
+    return self.heights[column] < self.rows
+
+  def legalMoves(self):
+    # all legal moves as (row, column), in column order
+    rows = self.rows
+    return [(rows - 1 - height, column) for column, height in enumerate(self.heights) if height < rows]
+
+  def play(self, column, player):
+    # drop a disc for a player in a column (in place)
+    # returns the position where the disc landed (row, column)
+    height = self.heights[column]
+    index = column * self.height + height
+    self.masks[player] |= 1 << index
+    self.heights[column] = height + 1
+    self.moveStack.append(column)
+    if self.scores is not None:
+      self.scores[player] += self.weights[index]
+    if self.lineCounts is not None:
+      self.lineTable.place(self, index, player)
+    return (self.rows - 1 - height, column)
+
+  def undo(self):
+    # take back the last disc added by play
+    column = self.moveStack.pop()
+    height = self.heights[column] - 1
+    index = column * self.height + height
+    bit = 1 << index
+    player = 1 if self.masks[1] & bit else 2
+    self.masks[player] ^= bit
+    self.heights[column] = height
+    if self.scores is not None:
+      self.scores[player] -= self.weights[index]
+    if self.lineCounts is not None:
+      self.lineTable.remove(self, index, player)
+    return (self.rows - 1 - height, column)
+
+  def afterMove(self, move, player):
+    # a copy of the bitboard with a disc added at move
+    row, column = move
+    board = self.copy()
+    index = column * self.height + self.rows - 1 - row
+    board.masks[player] |= 1 << index
+    board.heights[column] = self.rows - row
+    board.moveStack.append(column)
+    if board.scores is not None:
+      board.scores[player] += self.weights[index]
+    if board.lineCounts is not None:
+      self.lineTable.place(board, index, player)
+    return board
+
+  def isWinningMove(self, move):
+    # check if the disc at move is part of connect in a row, only looking at the slots around it
+    row, column = move
+    player = self.playerAt(row, column)
+    index = column * self.height + self.rows - 1 - row
+    return player != 0 and Bitboard.hasAlignmentAt(self.masks[player], index, self.height, self.connect)
+
+  def isWin(self, player):
+    # check if a player has connect in a row, the same as hasAlignment
+    mask = self.masks[player]
+    height = self.height
+    if self.connect != 4:
+      return Bitboard.hasAlignment(mask, height, self.connect)
+    pairs = mask & (mask >> 1)
+    if pairs & (pairs >> 2):
+      return True
+    for shift in (height, height - 1, height + 1):
+      pairs = mask & (mask >> shift)
+      if pairs & (pairs >> (2 * shift)):
+        return True
+    return False
+
+  def isFull(self):
+    return sum(self.heights) == self.rows * self.columns
+
+  def moveCount(self):
+    return sum(self.heights)
+
+  def key(self):
+    # a unique integer key for the position
+    # the discs of a column are contiguous from the bottom, so adding the
+    # player 1 discs to all discs keeps positions with different heights apart
+    return self.masks[1] + (self.masks[1] | self.masks[2])
+
+  @staticmethod
+  def mirrorKey(key, columns, height):
+    # the key of the position mirrored left to right, also for the keys of solver.py
+    # every column only uses its own height bits of the key, so the columns can be moved as they are,
+    # a column of the left half and its mirror column in the right half are swapped with one shift
+    masks = MIRROR_MASKS.get((columns, height))
+    if masks is None:
+      masks = MIRROR_MASKS[(columns, height)] = Bitboard.mirrorMasks(columns, height)
+    middle, pairs = masks
+    mirrored = key & middle
+    for mask, shift in pairs:
+      mirrored |= (key & mask) << shift | (key >> shift) & mask
+    return mirrored
+
+  @staticmethod
+  def mirrorMasks(columns, height):
+    # the bits of the middle column (0 for an even number of columns), and the bits of every column
+    # of the left half with the shift that moves it to its mirror column
+    columnBits = (1 << height) - 1
+    middle = columnBits << (columns // 2 * height) if columns % 2 == 1 else 0
+    pairs = [(columnBits << (column * height), (columns - 1 - 2 * column) * height) for column in range(columns // 2)]
+    return (middle, pairs)
+
+  def canonicalKey(self):
+    # the smaller of the keys of the position and of its mirror image, the same for both,
+    # and whether it is the mirror's key, in which case the columns of moves stored with the
+    # key are mirrored too (see mirrorColumn)
+    key = self.key()
+    mirrored = Bitboard.mirrorKey(key, self.columns, self.height)
+    if mirrored < key:
+      return (mirrored, True)
+    return (key, False)
+
+  def mirrorDistance(self):
+    # the number of discs that have to be added before a position can hold its own discs and their
+    # mirror images, None if it never can because a disc has one of the opponent's across from it
+    # the positions below a position can only be the mirror images of each other from this many discs on
+    columns, height = self.columns, self.height
+    mirror1 = Bitboard.mirrorKey(self.masks[1], columns, height)
+    mirror2 = Bitboard.mirrorKey(self.masks[2], columns, height)
+    if mirror1 & self.masks[2] or mirror2 & self.masks[1]:
+      return None
+    return bin((mirror1 | mirror2) & ~(self.masks[1] | self.masks[2])).count('1')
+
+  def mirrorColumn(self, column):
+    # the column on the other side of the board, -1 (no column) stays -1
+    return self.columns - 1 - column if column != -1 else -1
+
+  def score(self, player, tables):
+    # sum the evaluation weights of the discs of a player minus the opponent's
+    # tables are the per-column lookups built by Bitboard.scoreTables, they are
+    # only used when the bitboard does not keep its score
+    if self.scores is not None:
+      return self.scores[player] - self.scores[player ^ 3]
+    height = self.height
+    columnBits = (1 << self.rows) - 1
+    playerMask = self.masks[player]
+    opponentMask = self.masks[player ^ 3]
+    score = 0
+    for column in range(self.columns):
+      shift = column * height
+      table = tables[column]
+      score += table[(playerMask >> shift) & columnBits] - table[(opponentMask >> shift) & columnBits]
+    return score
+
+  @staticmethod
+  def scoreTables(weights):
+    # for every column, a lookup from the bits of the column to the sum of their weights
+    rows, columns = weights.shape
+    tables = []
+    for column in range(columns):
+      table = [0] * (1 << rows)
+      for bits in range(1 << rows):
+        for height in range(rows):
+          if bits >> height & 1:
+            table[bits] += int(weights[rows - 1 - height, column])
+      tables.append(table)
+    return tables
+
+  @staticmethod
+  def bitWeights(weights):
+    # the weight of the slot of every bit, 0 for the empty bits on top of the columns
+    rows, columns = weights.shape
+    height = rows + 1
+    bitWeights = np.zeros(columns * height, dtype=np.int64)
+    for column in range(columns):
+      for row in range(rows):
+        bitWeights[column * height + rows - 1 - row] = weights[row, column]
+    return bitWeights
+
+  @staticmethod
+  def packMasks(boards, player):
+    # the masks of a player and of the opponent in a list of bitboards, as two uint64 arrays
+    count = len(boards)
+    playerMasks = np.fromiter((board.masks[player] for board in boards), dtype=np.uint64, count=count)
+    opponentMasks = np.fromiter((board.masks[player ^ 3] for board in boards), dtype=np.uint64, count=count)
+    return playerMasks, opponentMasks
+
+  @staticmethod
+  def packStates(states, player):
+    # the masks of a player in an (N, rows, columns) array of states, as a uint64 array
+    count, rows, columns = states.shape
+    if columns * (rows + 1) > 64:
+      raise ValueError('a {0}x{1} board does not fit in 64 bits'.format(rows, columns))
+    # the slots column by column from the bottom, with the empty bit on top of each column,
+    # padded to 64 bits and packed with the lowest bit first
+    bits = np.zeros((count, 64), dtype=bool)
+    columnBits = bits[:, :columns * (rows + 1)].reshape(count, columns, rows + 1)
+    columnBits[:, :, :rows] = (states == player).transpose(0, 2, 1)[:, :, ::-1]
+    return np.packbits(bits, axis=1, bitorder='little').view('<u8').ravel()
+
+  @staticmethod
+  def alignmentBatch(masks, height, connect=4):
+    # hasAlignment for a uint64 array of masks, as a bool array
+    found = np.zeros(len(masks), dtype=bool)
+    for shift in (1, height, height - 1, height + 1):
+      if connect == 4:
+        pairs = masks & (masks >> np.uint64(shift))
+        found |= (pairs & (pairs >> np.uint64(2 * shift))) != 0
+      else:
+        run = masks
+        for step in range(1, connect):
+          run = run & (masks >> np.uint64(step * shift))
+        found |= run != 0
+    return found
+
+  @staticmethod
+  def hasAlignment(mask, height, connect=4):
+    # check for connect (by default four) in a row in a mask
+    # the shifts are 1 (vertical), height (horizontal), height - 1 and height + 1 (diagonals)
+    for shift in (1, height, height - 1, height + 1):
+      if connect == 4:
+        pairs = mask & (mask >> shift)
+        if pairs & (pairs >> (2 * shift)):
+          return True
+      else:
+        # a bit of run is set where connect bits in a row start
+        run = mask
+        for step in range(1, connect):
+          run &= mask >> (step * shift)
+        if run:
+          return True
+    return False
+
+  @staticmethod
+  def hasAlignmentAt(mask, index, height, connect=4):
+    # check if the bit index of a mask is part of connect in a row, counting the set bits
+    # next to it in every direction, at most connect - 1 on each side
+    for shift in (1, height, height - 1, height + 1):
+      count = 1
+      position = index + shift
+      while count < connect and mask >> position & 1:
+        count += 1
+        position += shift
+      position = index - shift
+      while count < connect and position >= 0 and mask >> position & 1:
+        count += 1
+        position -= shift
+      if count >= connect:
+        return True
+    return False
@@ -0,0 +1,191 @@
+import random
+import unittest
+
+import numpy as np
+
+from benchmark import perft
+from bitboard import Bitboard
+from bot import Bot
+from connect4 import Connect4
+
+
+class BitboardTest(unittest.TestCase):
+    # Returns a board which can be won by placing a "1" in the fourth column, via an ascending diagonal streak
+    def getThreeStreakDiagonal(self):
+        return np.copy(np.array([[0, 0, 0, 0, 0, 0, 0],
+                                 [0, 0, 0, 0, 0, 0, 0],
+                                 [0, 0, 0, 0, 0, 0, 0],
+                                 [0, 0, 1, 1, 0, 0, 0],
+                                 [0, 1, 2, 2, 0, 0, 0],
+                                 [1, 2, 2, 1, 2, 0, 0]]))
+
+    # Plays a list of columns, alternating players, and returns the game
+    def play(self, columns):
+        game = Connect4()
+        for column in columns:
+            game.move(column)
+            game.switchPlayer()
+        return game
+
+    # Converting a state to a bitboard and back gives the same state
+    def test_roundTrip(self):
+        state = self.getThreeStreakDiagonal()
+        self.assertTrue(np.array_equal(Bitboard.fromState(state).toState(), state))
+
+    # Legal moves are the same as for the matrix state
+    def test_legalMoves(self):
+        game = self.play([0, 0, 0, 0, 0, 0, 3, 3])
+        expected = Connect4.staticLegalMovesFromState(game.getState())
+        self.assertEqual(Connect4.staticLegalMovesFromState(game.getBitboard()), expected)
+
+    # Wins are detected in all four directions, including the mirrored diagonal
+    def test_winningMoves(self):
+        for state in (self.getThreeStreakDiagonal(), np.fliplr(self.getThreeStreakDiagonal())):
+            board = Bitboard.fromState(state)
+            move = (2, 3)
+            self.assertFalse(Connect4.staticIsWinningMove(Connect4.staticStateAfterMove(board, move, 2), move))
+            self.assertTrue(Connect4.staticIsWinningMove(Connect4.staticStateAfterMove(board, move, 1), move))
+
+        vertical = self.play([0, 1, 0, 1, 0, 1, 0])
+        self.assertTrue(Connect4.staticIsWinningMove(vertical.getBitboard(), (2, 0)))
+        horizontal = self.play([0, 0, 1, 1, 2, 2, 3])
+        self.assertTrue(Connect4.staticIsWinningMove(horizontal.getBitboard(), (5, 3)))
+
+    # Four discs split over two columns' edges do not count as a win
+    def test_noWrapAroundColumns(self):
+        board = Bitboard()
+        for column in (0, 1):
+            for _ in range(2):
+                board.play(column, 1)
+        board.play(2, 2)
+        board.play(2, 2)
+        self.assertFalse(board.isWin(1))
+
+    # The score is the same as for the matrix state
+    def test_score(self):
+        game = self.play([3, 3, 2, 4, 4, 2, 1, 5, 3, 2])
+        for player in (1, 2):
+            self.assertEqual(Connect4.staticScore(game.getBitboard(), player),
+                             Connect4.staticScore(game.getState(), player))
+
+    # The score kept while adding discs is the same as the score of the whole board
+    def test_incrementalScore(self):
+        game = self.play([3, 3, 2, 4, 4, 2, 1, 5, 3, 2])
+        board = game.getBitboard()
+        tables = Connect4.getBitboardScoreTables()
+        plain = Bitboard.fromState(game.getState())
+        self.assertIsNone(plain.scores)
+        for player in (1, 2):
+            self.assertEqual(board.score(player, tables), plain.score(player, tables))
+
+        child = Connect4.staticStateAfterMove(board, (5, 6), 2)
+        plainChild = Connect4.staticStateAfterMove(plain, (5, 6), 2)
+        self.assertEqual(Connect4.staticScore(child, 2), Connect4.staticScore(plainChild, 2))
+        self.assertEqual(Connect4.staticScore(child, 2), Connect4.staticScore(child.toState(), 2))
+        self.assertEqual(list(Connect4.staticScoreBatch([board, child], 1)),
+                         [Connect4.staticScore(board, 1), Connect4.staticScore(child, 1)])
+
+    # Undo takes back a disc together with the scores kept by the bitboard
+    def test_playAndUndo(self):
+        board = Connect4.staticToBitboard(self.getThreeStreakDiagonal(), threats=True)
+        before = board.copy()
+        self.assertEqual(board.play(3, 1), (2, 3))
+        self.assertTrue(board.isWin(1))
+        board.play(3, 2)
+        self.assertEqual(board.undo(), (1, 3))
+        self.assertEqual(board.undo(), (2, 3))
+        self.assertEqual(board, before)
+        self.assertEqual(board.heights, before.heights)
+        self.assertEqual(board.scores, before.scores)
+        self.assertEqual(board.lineCounts, before.lineCounts)
+        self.assertEqual(board.threatScore, before.threatScore)
+
+    # The search plays and undoes moves on a copy, the bitboard it is given does not change
+    def test_searchKeepsBitboard(self):
+        board = self.play([3, 3, 2, 4, 4, 2, 1, 5, 3, 2]).getBitboard()
+        before = board.copy()
+        bot = Bot(2)
+        bot.iterativeDeepening(board, True, 20)
+        self.assertEqual(board, before)
+        self.assertEqual(board.moveStack, before.moveStack)
+
+    # A position and its mirror image, built with np.fliplr, get the same canonical key
+    def test_canonicalKey(self):
+        random.seed(4)
+        for rows, columns in ((6, 7), (5, 4), (7, 8)):
+            for _ in range(50):
+                board = Bitboard(rows, columns)
+                for ply in range(random.randrange(rows * columns)):
+                    column = random.choice([column for column in range(columns) if board.isLegal(column)])
+                    board.play(column, ply % 2 + 1)
+                mirror = Bitboard.fromState(np.fliplr(board.toState()))
+                self.assertEqual(Bitboard.mirrorKey(board.key(), columns, board.height), mirror.key())
+                key, mirrored = board.canonicalKey()
+                self.assertEqual(key, min(board.key(), mirror.key()))
+                self.assertEqual(mirror.canonicalKey()[0], key)
+                self.assertEqual(mirrored, mirror.key() < board.key())
+        # a symmetric position is its own mirror image
+        self.assertEqual(self.play([3, 3, 2, 4]).getBitboard().canonicalKey()[1], False)
+        self.assertEqual((Bitboard().mirrorColumn(0), Bitboard().mirrorColumn(-1)), (6, -1))
+
+    # The bitboard does not change when searching from it
+    def test_afterMoveCopies(self):
+        board = Bitboard()
+        child = Connect4.staticStateAfterMove(board, (5, 3), 1)
+        self.assertEqual(board.moveCount(), 0)
+        self.assertEqual(child.moveCount(), 1)
+        self.assertNotEqual(board.key(), child.key())
+
+    # Counting the positions a few plies ahead, games that are won are not continued
+    def test_perft(self):
+        for depth in range(5):
+            self.assertEqual(perft(Bitboard(), 1, depth), 7 ** depth)
+        # player 1 wins in column 0, the other six moves each have seven answers
+        self.assertEqual(perft(self.play([0, 1, 0, 1, 0, 1]).getBitboard(), 1, 2), 6 * 7)
+
+    # The winners of a batch of boards are the same as checking every disc of every board
+    def test_winnerBatch(self):
+        random.seed(2)
+        states = []
+        for _ in range(200):
+            state = np.zeros((6, 7))
+            for _ in range(random.randrange(42)):
+                state[random.randrange(6), random.randrange(7)] = random.choice((1, 2))
+            states.append(state)
+        states = np.array(states)
+
+        expected = []
+        for state in states:
+            winners = {int(state[row, column]) for row in range(6) for column in range(7)
+                       if state[row, column] != 0 and Connect4.staticIsWinningMove(state, (row, column))}
+            expected.append(sum(winners))
+        self.assertEqual(list(Connect4.staticWinnerBatch(states)), expected)
+
+        boards = [Bitboard.fromState(self.play(columns).getState()) for columns in
+                  ([0, 1, 0, 1, 0, 1, 0], [0, 1, 0, 1, 0, 1, 6, 1], [3, 3, 2, 4])]
+        self.assertEqual(list(Connect4.staticWinnerBatch(boards)), [1, 2, 0])
+        self.assertEqual(list(Connect4.staticWinnerBatch(Bitboard.packMasks(boards, 1))), [1, 2, 0])
+
+
+    # On larger boards and with other connects, the checks around a move, of the whole mask and in batches agree
+    def test_connectN(self):
+        random.seed(4)
+        for rows, columns, connect in ((8, 9, 5), (10, 12, 4), (7, 8, 5), (6, 7, 3)):
+            for _ in range(10):
+                game = Connect4(rows, columns, connect)
+                board = game.getBitboard()
+                while game.isPlaying():
+                    column = random.choice([column for column in range(columns) if game.isMoveLegal(column)])
+                    player = game.getCurrentPlayer()
+                    move = game.move(column)
+                    board.play(column, player)
+                    self.assertEqual(board.isWinningMove(move), game.hasWinner())
+                    self.assertEqual(board.isWin(player), game.hasWinner())
+                    game.switchPlayer()
+                self.assertEqual(board, Connect4.staticToBitboard(game.getState(), connect=connect))
+                if columns * (rows + 1) <= 64:
+                    winners = Connect4.staticWinnerBatch([board])
+                    self.assertEqual(winners[0], game.getWinner() if game.hasWinner() else 0)
+
+if __name__ == '__main__':
+    unittest.main()
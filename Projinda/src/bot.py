@@ -1,15 +1,66 @@
 from connect4 import Connect4
+from bitboard import Bitboard
+from transposition import TranspositionTable, EXACT, LOWER, UPPER
+from concurrent.futures import ProcessPoolExecutor
+from moveordering import MoveOrdering
+from searchstats import SearchStats
+from endgame import EndgameDatabase
 import math
+import multiprocessing
+import time
 import numpy as np
 
+class SearchTimeout(Exception):
+	# raised inside a search when its time budget has run out
+	pass
+
 class Bot:
 	
-	def __init__(self, playerID):
+	def __init__(self, playerID, transpositionTable=None, moveOrdering=None, algorithm='alphabeta', aspirationWindow=None, batchLeaves=False, evaluation='weights', workers=1, collectStats=False, mirrorKeys=True, endgame=None):
 		self.winScore = math.inf  # The score a move gets if it wins the game
 		self.drawScore = 0  # The score of a move if it get
 		self.lossScore = -math.inf  # The score of a move that results in a loss
 		self.playerID = playerID
 		self.opposingPlayer = playerID ^ 3
+		self.nodes = 0  # Number of positions visited by the searches, used for benchmarking
+		# Optional TranspositionTable used by minimax_alphabeta on bitboards, it is kept between moves
+		self.transpositionTable = transpositionTable
+		# a position and its mirror image share their transposition table entry, see Bitboard.canonicalKey
+		self.mirrorKeys = mirrorKeys
+		# whether the running search uses the mirror keys, search decides it for every root
+		self.mirrorSearch = mirrorKeys
+		self.deadline = None  # perf_counter() time when a timed search has to stop, None if there is no limit
+		self.nextTimeCheck = 0  # node count at which the time is checked next
+		# Optional threading.Event that stops a search at its next time check when it is set, see Interface pondering
+		self.stopEvent = None
+		# Optional MoveOrdering, without it moves are searched in column order
+		self.moveOrdering = moveOrdering
+		self.ply = 0  # distance from the root of the running search
+		self.cutoffs = 0  # Number of beta cutoffs in minimax_alphabeta
+		self.firstMoveCutoffs = 0  # Number of cutoffs caused by the first move searched
+		self.aspirationFailures = 0  # Number of aspiration windows that had to be searched again
+		# 'alphabeta' searches with minimax_alphabeta, 'pvs' with negamax_pvs
+		self.algorithm = algorithm
+		# Half width of the aspiration window used by iterativeDeepening, None searches with a full window
+		self.aspirationWindow = aspirationWindow
+		# Score all leaves below a depth 1 node with one batched call instead of one call per leaf
+		self.batchLeaves = batchLeaves
+		# 'weights' scores positions with Connect4.staticScore, 'threats' with Connect4.staticThreatScore
+		self.evaluation = evaluation
+		if evaluation == 'threats':
+			self.evaluate = Connect4.staticThreatScore
+			self.evaluateBatch = Connect4.staticThreatScoreBatch
+		else:
+			self.evaluate = Connect4.staticScore
+			self.evaluateBatch = Connect4.staticScoreBatch
+		# Number of processes that search the moves at the root in parallel, 1 searches in this process
+		self.workers = workers
+		self.executor = None  # the process pool, started by the first parallel search
+		self.sharedBest = None  # best root score so far, shared with the processes
+		# Optional SearchStats filled while searching, None when the statistics are not collected
+		self.stats = SearchStats() if collectStats else None
+		# Optional EndgameDatabase, the positions it covers get their exact value from it instead of being searched
+		self.endgame = endgame
         
 	def minimax_slim(self, state, maximizingPlayer, depth):
 		"""
@@ -20,6 +71,7 @@ class Bot:
 		:return: move and score
 		"""
 		player = self.playerID if maximizingPlayer else self.opposingPlayer
+		self.nodes += 1
 
 		if depth == 0:
 			x = Connect4.staticScore(state, self.playerID)
@@ -51,43 +103,549 @@ class Bot:
  
 		return (bestMove, bestScore)
 
+	def checkTime(self):
+		# looking at the clock is slow, so it is only done every 256 nodes
+		self.nextTimeCheck = self.nodes + 256
+		if time.perf_counter() > self.deadline or (self.stopEvent is not None and self.stopEvent.is_set()):
+			raise SearchTimeout()
+
+	def newSearch(self):
+		# prepare for searching a new position
+		self.ply = 0
+		if self.moveOrdering is not None:
+			self.moveOrdering.newSearch()
+		if self.stats is not None:
+			self.stats.reset(self.transpositionTable)
+
+	def tableKey(self, state, maximizingPlayer):
+		# the transposition table key of a bitboard and whether it is the key of its mirror image,
+		# then the columns going in and out of the table are mirrored
+		if self.mirrorSearch:
+			key, mirrored = state.canonicalKey()
+		else:
+			key, mirrored = state.key(), False
+		return (2 * key + maximizingPlayer, mirrored)
+
+	def probeEndgame(self, state, maximizingPlayer):
+		# move and score of a position from the endgame database, None if the position is not in it
+		# the database values are from the view of the player to move, the scores from the bot's,
+		# and a win scores winScore however soon it comes, as in the search
+		entry = self.endgame.lookup(state)
+		if entry is None:
+			return None
+		move, value = entry
+		if value == 0:
+			return (move, self.drawScore)
+		return (move, self.winScore if (value > 0) == maximizingPlayer else self.lossScore)
+
 	def minimax_alphabeta(self, state, maximizingPlayer, depth, alpha, beta):
 		player = self.playerID if maximizingPlayer else self.opposingPlayer
+		self.nodes += 1
+		if self.deadline is not None and self.nodes >= self.nextTimeCheck:
+			self.checkTime()
 
+		stats = self.stats
+		if self.endgame is not None and isinstance(state, Bitboard) and self.endgame.covers(state):
+			result = self.probeEndgame(state, maximizingPlayer)
+			if result is not None:
+				if stats is not None:
+					stats.leaf(self.ply)
+				return result
 		if depth == 0:
-			x = Connect4.staticScore(state, self.playerID)
+			if stats is not None:
+				stats.leaf(self.ply)
+			x = self.evaluate(state, self.playerID)
 			return (None, x)
+		if stats is not None:
+			stats.enter(self.ply)
+
+		# look the position up in the transposition table
+		isBitboard = isinstance(state, Bitboard)
+		table = self.transpositionTable if isBitboard else None
+		hashColumn = -1
+		if table is not None:
+			alphaOriginal, betaOriginal = alpha, beta
+			key, mirrored = self.tableKey(state, maximizingPlayer)
+			entry = table.probe(key)
+			if entry is not None:
+				storedScore, flag, storedDepth, storedColumn = entry
+				if mirrored:
+					storedColumn = state.mirrorColumn(storedColumn)
+				hashColumn = storedColumn
+				if storedColumn != -1 and (storedDepth == depth or storedDepth > depth and not table.exactDepth):
+					storedMove = (state.freeRow(storedColumn), storedColumn)
+					if flag == EXACT:
+						return (storedMove, storedScore)
+					elif flag == LOWER:
+						alpha = max(alpha, storedScore)
+					else:
+						beta = min(beta, storedScore)
+					if alpha >= beta:
+						return (storedMove, storedScore)
 		
 		# add more base cases
 		legalMoves = Connect4.staticLegalMovesFromState(state)
+		if len(legalMoves) == 0:
+			# the board is full
+			return (None, self.drawScore)
+		if self.moveOrdering is not None:
+			legalMoves = self.moveOrdering.order(legalMoves, self.ply, hashColumn)
+		if depth == 1 and self.batchLeaves:
+			move, score = self.scoreFrontier(state, legalMoves, player, self.playerID, maximizingPlayer)
+			if stats is not None:
+				stats.best(self.ply, move, False)
+			if table is not None:
+				table.store(key, score, EXACT, depth, state.mirrorColumn(move[1]) if mirrored else move[1])
+			return (move, score)
 		bestScore = self.lossScore if maximizingPlayer else self.winScore
 		bestMove = legalMoves[0] if len(legalMoves) > 0 else None
-		for move in legalMoves:
-				copy = Connect4.staticStateAfterMove(state, move, player)
-				isWinningMove = Connect4.staticIsWinningMove(copy, move)
+		for index, move in enumerate(legalMoves):
+				# a bitboard is changed in place and the move is undone after the search below it
+				if isBitboard:
+					child = state
+					child.play(move[1], player)
+					isWinningMove = child.isWin(player)
+				else:
+					child = Connect4.staticStateAfterMove(state, move, player)
+					isWinningMove = Connect4.staticIsWinningMove(child, move)
 				# special cases
 				if isWinningMove:
+					if isBitboard:
+						state.undo()
+					if stats is not None:
+						stats.best(self.ply, move, False)
 					if maximizingPlayer:
 						return (move, self.winScore)
 					else:
 						return (move, self.lossScore)
 
 
-				temp, score = self.minimax_alphabeta(copy, not maximizingPlayer, depth-1, alpha, beta)
+				self.ply += 1
+				if depth == 1:
+					# evaluate the leaf here instead of calling the search for it
+					self.nodes += 1
+					if stats is not None:
+						stats.leaf(self.ply)
+					score = self.evaluate(child, self.playerID)
+				else:
+					temp, score = self.minimax_alphabeta(child, not maximizingPlayer, depth-1, alpha, beta)
+				self.ply -= 1
+				if isBitboard:
+					state.undo()
 				
 				# bestScore = max(score)
 				if maximizingPlayer and score > bestScore:
 						bestScore = score
 						bestMove = move
-						alpha = score
+						alpha = max(alpha, score)
+						if stats is not None:
+							stats.best(self.ply, move, depth > 1)
 
 				# bestScore = min(score)
 				elif not maximizingPlayer and score < bestScore:
 						bestScore = score
 						bestMove = move
-						beta = score
+						beta = min(beta, score)
+						if stats is not None:
+							stats.best(self.ply, move, depth > 1)
 				
 				if alpha >= beta:
+					self.cutoffs += 1
+					if index == 0:
+						self.firstMoveCutoffs += 1
+					if stats is not None:
+						stats.cutoff(index)
+					if self.moveOrdering is not None:
+						self.moveOrdering.recordCutoff(move, self.ply, depth)
 					break
+
+		if table is not None and bestMove is not None:
+			if bestScore <= alphaOriginal:
+				flag = UPPER
+			elif bestScore >= betaOriginal:
+				flag = LOWER
+			else:
+				flag = EXACT
+			table.store(key, bestScore, flag, depth, state.mirrorColumn(bestMove[1]) if mirrored else bestMove[1])
  
 		return (bestMove, bestScore)
+
+	def negamax_pvs(self, state, player, depth, alpha, beta):
+		"""
+		Principal variation search, alpha-beta in negamax form.
+		The first move is searched with the full window. The other moves are expected to be worse
+		and are only searched with a null window (alpha, alpha + 1), which proves that cheaply.
+		A move that turns out better than alpha is searched again with the full window.
+		:param player: the player to move, the score is from this player's point of view
+		:return: move and score
+		"""
+		self.nodes += 1
+		if self.deadline is not None and self.nodes >= self.nextTimeCheck:
+			self.checkTime()
+
+		stats = self.stats
+		if self.endgame is not None and isinstance(state, Bitboard) and self.endgame.covers(state):
+			# the score of the player to move, which is the bot's view when the bot is to move
+			result = self.probeEndgame(state, True)
+			if result is not None:
+				if stats is not None:
+					stats.leaf(self.ply)
+				return result
+		if depth == 0:
+			if stats is not None:
+				stats.leaf(self.ply)
+			return (None, self.evaluate(state, player))
+		if stats is not None:
+			stats.enter(self.ply)
+
+		# look the position up in the transposition table
+		# the table holds scores from the bot's point of view, like minimax_alphabeta stores them
+		isBitboard = isinstance(state, Bitboard)
+		table = self.transpositionTable if isBitboard else None
+		hashColumn = -1
+		maximizingPlayer = player == self.playerID
+		if table is not None:
+			alphaOriginal, betaOriginal = alpha, beta
+			key, mirrored = self.tableKey(state, maximizingPlayer)
+			entry = table.probe(key)
+			if entry is not None:
+				storedScore, flag, storedDepth, storedColumn = entry
+				if mirrored:
+					storedColumn = state.mirrorColumn(storedColumn)
+				hashColumn = storedColumn
+				if not maximizingPlayer:
+					storedScore = -storedScore
+					flag = Bot.flipBound(flag)
+				if storedColumn != -1 and (storedDepth == depth or storedDepth > depth and not table.exactDepth):
+					storedMove = (state.freeRow(storedColumn), storedColumn)
+					if flag == EXACT:
+						return (storedMove, storedScore)
+					elif flag == LOWER:
+						alpha = max(alpha, storedScore)
+					else:
+						beta = min(beta, storedScore)
+					if alpha >= beta:
+						return (storedMove, storedScore)
+
+		legalMoves = Connect4.staticLegalMovesFromState(state)
+		if len(legalMoves) == 0:
+			# the board is full
+			return (None, self.drawScore)
+		if self.moveOrdering is not None:
+			legalMoves = self.moveOrdering.order(legalMoves, self.ply, hashColumn)
+		if depth == 1 and self.batchLeaves:
+			move, score = self.scoreFrontier(state, legalMoves, player, player, True)
+			if stats is not None:
+				stats.best(self.ply, move, False)
+			if table is not None:
+				table.store(key, score if maximizingPlayer else -score, EXACT, depth, state.mirrorColumn(move[1]) if mirrored else move[1])
+			return (move, score)
+
+		opponent = player ^ 3
+		bestScore = self.lossScore
+		bestMove = legalMoves[0]
+		for index, move in enumerate(legalMoves):
+			# a bitboard is changed in place and the move is undone after the search below it
+			if isBitboard:
+				child = state
+				child.play(move[1], player)
+				isWinningMove = child.isWin(player)
+			else:
+				child = Connect4.staticStateAfterMove(state, move, player)
+				isWinningMove = Connect4.staticIsWinningMove(child, move)
+			if isWinningMove:
+				if isBitboard:
+					state.undo()
+				if stats is not None:
+					stats.best(self.ply, move, False)
+				return (move, self.winScore)
+
+			self.ply += 1
+			if depth == 1:
+				# evaluate the leaf here instead of calling the search for it
+				self.nodes += 1
+				if stats is not None:
+					stats.leaf(self.ply)
+				score = -self.evaluate(child, opponent)
+			elif index == 0 or alpha == self.lossScore:
+				# a null window needs a finite alpha
+				score = -self.negamax_pvs(child, opponent, depth-1, -beta, -alpha)[1]
+			else:
+				score = -self.negamax_pvs(child, opponent, depth-1, -alpha-1, -alpha)[1]
+				if alpha < score < beta:
+					# the move is better than the principal variation, find its real score
+					score = -self.negamax_pvs(child, opponent, depth-1, -beta, -alpha)[1]
+			self.ply -= 1
+			if isBitboard:
+				state.undo()
+
+			if score > bestScore:
+				bestScore = score
+				bestMove = move
+				alpha = max(alpha, score)
+				if stats is not None:
+					stats.best(self.ply, move, depth > 1)
+
+			if alpha >= beta:
+				self.cutoffs += 1
+				if index == 0:
+					self.firstMoveCutoffs += 1
+				if stats is not None:
+					stats.cutoff(index)
+				if self.moveOrdering is not None:
+					self.moveOrdering.recordCutoff(move, self.ply, depth)
+				break
+
+		if table is not None:
+			if bestScore <= alphaOriginal:
+				flag = UPPER
+			elif bestScore >= betaOriginal:
+				flag = LOWER
+			else:
+				flag = EXACT
+			column = state.mirrorColumn(bestMove[1]) if mirrored else bestMove[1]
+			if maximizingPlayer:
+				table.store(key, bestScore, flag, depth, column)
+			else:
+				table.store(key, -bestScore, Bot.flipBound(flag), depth, column)
+
+		return (bestMove, bestScore)
+
+	def scoreFrontier(self, state, legalMoves, player, scoringPlayer, maximizing):
+		"""
+		Search a depth 1 node by scoring all of its children with one batched evaluation.
+		:param player: the player making the moves
+		:param scoringPlayer: the player the scores are calculated for
+		:param maximizing: true to return the move with the highest score, false for the lowest
+		:return: move and score
+		"""
+		children = []
+		for move in legalMoves:
+			copy = Connect4.staticStateAfterMove(state, move, player)
+			if Connect4.staticIsWinningMove(copy, move):
+				return (move, self.winScore if player == scoringPlayer else self.lossScore)
+			children.append(copy)
+
+		self.nodes += len(children)
+		if self.stats is not None:
+			self.stats.leaf(self.ply + 1, len(children))
+		if not isinstance(state, Bitboard):
+			children = np.stack(children)
+		scores = self.evaluateBatch(children, scoringPlayer)
+		index = int(np.argmax(scores)) if maximizing else int(np.argmin(scores))
+		return (legalMoves[index], int(scores[index]))
+
+	@staticmethod
+	def flipBound(flag):
+		# the bound of a score seen from the other player
+		if flag == LOWER:
+			return UPPER
+		if flag == UPPER:
+			return LOWER
+		return flag
+
+	def prepareState(self, state):
+		# the search changes bitboards in place, it works on a copy so that the caller's
+		# bitboard stays as it was even when a timed search is abandoned half way
+		# the threat evaluation needs a bitboard that keeps its line counts
+		if isinstance(state, Bitboard):
+			if self.evaluation == 'threats' and state.lineCounts is None:
+				return Connect4.staticToBitboard(state.toState(), threats=True, connect=state.connect)
+			return state.copy()
+		return state
+
+	def search(self, state, maximizingPlayer, depth, alpha, beta):
+		"""
+		Search with the bot's algorithm.
+		:return: move and score, from the bot's point of view for both algorithms
+		"""
+		state = self.prepareState(state)
+		nodes, start = self.nodes, time.perf_counter()
+		if self.mirrorKeys and isinstance(state, Bitboard):
+			# the canonical keys only pay for themselves when positions of the search can be mirror images of
+			# each other, an entry is always found under the key of the position its column is for, so the
+			# searches with and without them share the table
+			distance = state.mirrorDistance()
+			self.mirrorSearch = distance is not None and distance <= depth
+		if self.workers > 1:
+			move, score = self.parallelSearch(state, maximizingPlayer, depth, alpha, beta)
+		elif self.algorithm == 'pvs':
+			if maximizingPlayer:
+				move, score = self.negamax_pvs(state, self.playerID, depth, alpha, beta)
+			else:
+				move, score = self.negamax_pvs(state, self.opposingPlayer, depth, -beta, -alpha)
+				score = -score
+		else:
+			move, score = self.minimax_alphabeta(state, maximizingPlayer, depth, alpha, beta)
+		if self.stats is not None:
+			self.stats.iteration(depth, self.nodes - nodes, time.perf_counter() - start, move, score)
+		return (move, score)
+
+	def workerConfig(self):
+		# the arguments the search processes build their own bot from
+		# their transposition tables only use entries of the same depth, so the score of a root move
+		# does not depend on which process searched it or what it searched before
+		table = self.transpositionTable
+		return {
+			'playerID': self.playerID,
+			'transpositionTableMB': table.sizeMB / self.workers if table is not None else None,
+			'moveOrdering': self.moveOrdering is not None,
+			# the size of the board the move ordering keeps its history for
+			'rows': self.moveOrdering.rows if self.moveOrdering is not None else None,
+			'columns': self.moveOrdering.columns if self.moveOrdering is not None else None,
+			'algorithm': self.algorithm,
+			'batchLeaves': self.batchLeaves,
+			'evaluation': self.evaluation,
+			'mirrorKeys': self.mirrorKeys,
+			'endgamePath': self.endgame.path if self.endgame is not None else None,
+		}
+
+	def getExecutor(self):
+		if self.executor is None:
+			self.sharedBest = multiprocessing.Value('d', -math.inf)
+			self.executor = ProcessPoolExecutor(self.workers, initializer=initSearchWorker,
+				initargs=(self.workerConfig(), self.sharedBest))
+		return self.executor
+
+	def close(self):
+		# stop the search processes
+		if self.executor is not None:
+			self.executor.shutdown()
+			self.executor = None
+
+	def parallelSearch(self, state, maximizingPlayer, depth, alpha, beta):
+		"""
+		Search the moves at the root in parallel, one move per task in a process pool.
+		The first move is searched alone, so that the other moves start with its score as a bound.
+		Every process lowers its window to the best root score found so far by any process,
+		minus one, so a move that cannot be better is cut off early while a move that can be
+		as good as the best gets its exact score. Ties go to the move that comes first in the
+		move ordering, as in the serial search, so the result does not depend on timing.
+		:return: move and score, from the bot's point of view
+		"""
+		legalMoves = Connect4.staticLegalMovesFromState(state)
+		if len(legalMoves) == 0:
+			return (None, self.drawScore)
+		if self.moveOrdering is not None:
+			hashColumn = -1
+			if self.transpositionTable is not None and isinstance(state, Bitboard):
+				key, mirrored = self.tableKey(state, maximizingPlayer)
+				entry = self.transpositionTable.probe(key)
+				hashColumn = entry[3] if entry is not None else -1
+				if mirrored:
+					hashColumn = state.mirrorColumn(hashColumn)
+			legalMoves = self.moveOrdering.order(legalMoves, 0, hashColumn)
+
+		executor = self.getExecutor()
+		self.sharedBest.value = -math.inf
+		remainingTime = None if self.deadline is None else max(0.0, self.deadline - time.perf_counter())
+		tasks = [(state, move, maximizingPlayer, depth, alpha, beta, remainingTime) for move in legalMoves]
+		results = [executor.submit(searchRootMove, *tasks[0]).result()]
+		futures = [executor.submit(searchRootMove, *task) for task in tasks[1:]]
+		results += [future.result() for future in futures]
+
+		sign = 1 if maximizingPlayer else -1
+		bestIndex = 0
+		for index, (score, nodes) in enumerate(results):
+			self.nodes += nodes
+			if sign * score > sign * results[bestIndex][0]:
+				bestIndex = index
+		return (legalMoves[bestIndex], results[bestIndex][0])
+
+	def aspirationSearch(self, state, maximizingPlayer, depth, guess):
+		# search with a narrow window around the score of the previous iteration,
+		# if the score falls outside the window, search again with a full window
+		alpha = guess - self.aspirationWindow
+		beta = guess + self.aspirationWindow
+		move, score = self.search(state, maximizingPlayer, depth, alpha, beta)
+		if score <= alpha or score >= beta:
+			self.aspirationFailures += 1
+			move, score = self.search(state, maximizingPlayer, depth, self.lossScore, self.winScore)
+		return (move, score)
+
+	def iterativeDeepening(self, state, maximizingPlayer, timeBudgetMs, maxDepth=None):
+		"""
+		Search to depth 1, 2, 3, ... until the time budget runs out.
+		The search that is running when the time is up is abandoned.
+		:param timeBudgetMs: time budget in milliseconds
+		:param maxDepth: the deepest search to start, defaults to the number of empty slots
+		:return: move, score and depth of the deepest completed search
+		"""
+		if maxDepth is None:
+			maxDepth = Connect4.staticEmptySlots(state)
+
+		state = self.prepareState(state)
+		move, score, depthReached = None, None, 0
+		scores = {}  # score of the completed iteration at each depth
+		deadline = time.perf_counter() + timeBudgetMs / 1000
+		self.newSearch()
+		try:
+			for depth in range(1, maxDepth + 1):
+				# depth 1 always completes, so there is always a move to return
+				self.deadline = deadline if depth > 1 else None
+				if self.aspirationWindow is not None and depth > 2:
+					# the score of the bot's own moves and the opponent's replies swing between
+					# odd and even depths, so the guess is the score from two iterations ago
+					move, score = self.aspirationSearch(state, maximizingPlayer, depth, scores[depth - 2])
+				else:
+					move, score = self.search(state, maximizingPlayer, depth, self.lossScore, self.winScore)
+				scores[depth] = score
+				depthReached = depth
+				if score == self.winScore or score == self.lossScore:
+					# the result is forced, searching deeper does not change it
+					break
+		except SearchTimeout:
+			pass
+		finally:
+			self.deadline = None
+			self.ply = 0
+
+		return (move, score, depthReached)
+
+# The bot of a search process and the best root score shared between the processes, see Bot.parallelSearch
+workerBot = None
+workerBest = None
+
+def initSearchWorker(config, sharedBest):
+	global workerBot, workerBest
+	table = None
+	if config['transpositionTableMB'] is not None:
+		table = TranspositionTable(config['transpositionTableMB'], exactDepth=True)
+	ordering = MoveOrdering(config['rows'], config['columns']) if config['moveOrdering'] else None
+	endgame = EndgameDatabase(config['endgamePath']) if config['endgamePath'] is not None else None
+	workerBot = Bot(config['playerID'], table, ordering, config['algorithm'],
+		batchLeaves=config['batchLeaves'], evaluation=config['evaluation'], mirrorKeys=config['mirrorKeys'], endgame=endgame)
+	workerBest = sharedBest
+
+def searchRootMove(state, move, maximizingPlayer, depth, alpha, beta, remainingTime):
+	# search one move at the root in a search process, returns its score and the nodes searched
+	bot = workerBot
+	bot.nodes = 0
+	bot.newSearch()
+	player = bot.playerID if maximizingPlayer else bot.opposingPlayer
+	child = Connect4.staticStateAfterMove(state, move, player)
+	if Connect4.staticIsWinningMove(child, move):
+		score = bot.winScore if maximizingPlayer else bot.lossScore
+	elif depth == 1:
+		score = bot.evaluate(child, bot.playerID)
+	else:
+		best = workerBest.value
+		if math.isfinite(best):
+			# the best score so far is from the view of the player at the root
+			if maximizingPlayer:
+				alpha = max(alpha, best - 1)
+			else:
+				beta = min(beta, 1 - best)
+		if remainingTime is not None:
+			bot.deadline = time.perf_counter() + remainingTime
+			bot.nextTimeCheck = 0
+		try:
+			move, score = bot.search(child, not maximizingPlayer, depth - 1, alpha, beta)
+		finally:
+			bot.deadline = None
+
+	sign = 1 if maximizingPlayer else -1
+	with workerBest.get_lock():
+		if sign * score > workerBest.value:
+			workerBest.value = sign * score
+	return (score, bot.nodes)
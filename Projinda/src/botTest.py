@@ -0,0 +1,219 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from bot import Bot
+from connect4 import Connect4
+from interface import Interface, LOGGED_WIN_SCORE
+from moveordering import MoveOrdering
+from transposition import TranspositionTable
+
+
+class BotTest(unittest.TestCase):
+
+    # Plays a list of columns, alternating players, and returns the game
+    def play(self, columns):
+        game = Connect4()
+        for column in columns:
+            game.move(column)
+            game.switchPlayer()
+        return game
+
+    def setUp(self):
+        self.bot = Bot(2)
+        self.midgame = self.play([3, 3, 2, 4, 4, 2, 1, 5, 3, 2])
+
+    # The timed search stops close to its budget and reports how deep it got
+    def test_iterativeDeepeningRespectsBudget(self):
+        start = time.perf_counter()
+        move, score, depth = self.bot.iterativeDeepening(Connect4().getBitboard(), True, 100)
+        elapsed = time.perf_counter() - start
+
+        self.assertIn(move, Connect4.staticLegalMovesFromState(Connect4().getBitboard()))
+        self.assertGreaterEqual(depth, 1)
+        self.assertLess(elapsed, 0.5)
+
+    # The deepest completed iteration gives the same result as a fixed depth search
+    def test_iterativeDeepeningMatchesFixedDepth(self):
+        state = self.midgame.getBitboard()
+        expected = self.bot.minimax_alphabeta(state, True, 3, self.bot.lossScore, self.bot.winScore)
+        move, score, depth = self.bot.iterativeDeepening(state, True, 10000, maxDepth=3)
+        self.assertEqual(depth, 3)
+        self.assertEqual((move, score), expected)
+
+    # The bot blocks an immediate threat within a small budget
+    def test_blocksThreeInARow(self):
+        game = self.play([0, 6, 1, 6, 2])
+        move, score, depth = self.bot.iterativeDeepening(game.getBitboard(), True, 50)
+        self.assertEqual(move, (5, 3))
+
+    # Moves are ordered center first, with the hash move and killers in front
+    def test_moveOrdering(self):
+        ordering = MoveOrdering()
+        moves = Connect4.staticLegalMovesFromState(Connect4().getBitboard())
+        self.assertEqual([column for row, column in ordering.order(moves, 0)], [3, 2, 4, 1, 5, 0, 6])
+        self.assertEqual(ordering.order(moves, 0, hashColumn=6)[0], (5, 6))
+
+        ordering.recordCutoff((5, 0), 1, 2)
+        self.assertEqual(ordering.order(moves, 1)[0], (5, 0))
+        self.assertEqual(ordering.order(moves, 1, hashColumn=5)[:2], [(5, 5), (5, 0)])
+
+    # Ordering the moves prunes more without changing the result of the search
+    def test_orderedSearchMatchesColumnOrder(self):
+        ordered = Bot(2, None, MoveOrdering())
+        # player 1 is to move
+        state = self.play([3, 0, 0, 3, 4, 3, 0, 2, 3, 4]).getBitboard()
+        expected = self.bot.minimax_alphabeta(state, False, 5, self.bot.lossScore, self.bot.winScore)
+        actual = ordered.minimax_alphabeta(state, False, 5, ordered.lossScore, ordered.winScore)
+        self.assertEqual(actual[1], expected[1])
+        self.assertLess(ordered.nodes, self.bot.nodes)
+
+    # A position and its mirror image share their transposition table entry, the stored move is mirrored
+    def test_mirrorKeys(self):
+        # player 2 is to move, two discs in column 4 make room for the discs and their mirror images, so positions of the search can be mirror images
+        state = self.play([3, 3, 2, 3, 2]).getBitboard()
+        mirror = self.play([3, 3, 4, 3, 4]).getBitboard()
+        self.assertEqual(state.mirrorDistance(), 2)
+        plain = Bot(2, TranspositionTable(1), MoveOrdering(), mirrorKeys=False)
+        expected = plain.minimax_alphabeta(state, True, 5, plain.lossScore, plain.winScore)
+        for algorithm in ('alphabeta', 'pvs'):
+            bot = Bot(2, TranspositionTable(1), MoveOrdering(), algorithm)
+            bot.newSearch()
+            (row, column), score = bot.search(state, True, 5, bot.lossScore, bot.winScore)
+            self.assertEqual(score, expected[1])
+            nodes = bot.nodes
+            # the mirror image is answered by the entry of the first search
+            self.assertEqual(bot.search(mirror, True, 5, bot.lossScore, bot.winScore), ((row, 6 - column), score))
+            self.assertEqual(bot.nodes, nodes + 1)
+        # from the empty board half of the positions are the mirror image of another one
+        shared = Bot(1, TranspositionTable(1), MoveOrdering())
+        for bot in (plain, shared):
+            bot.transpositionTable.clear()
+            bot.nodes = 0
+            bot.search(Connect4().getBitboard(), True, 6, bot.lossScore, bot.winScore)
+        self.assertLess(shared.nodes, plain.nodes)
+        self.assertLess(shared.transpositionTable.getStats()['used'], plain.transpositionTable.getStats()['used'])
+        self.assertTrue(shared.mirrorSearch)
+        # no position below one with a disc across from an opponent's is the mirror image of another one
+        self.assertIsNone(self.midgame.getBitboard().mirrorDistance())
+        shared.search(self.midgame.getBitboard(), True, 3, shared.lossScore, shared.winScore)
+        self.assertFalse(shared.mirrorSearch)
+
+    # Principal variation search finds the same score as minimax at equal depth
+    def test_pvsMatchesMinimax(self):
+        state = self.play([3, 0, 0, 3, 4, 3, 0, 2, 3, 4]).getBitboard()
+        for depth in (1, 4, 5):
+            expected = self.bot.minimax_alphabeta(state, False, depth, self.bot.lossScore, self.bot.winScore)
+            pvs = Bot(2, None, MoveOrdering(), 'pvs')
+            self.assertEqual(pvs.search(state, False, depth, pvs.lossScore, pvs.winScore)[1], expected[1])
+
+    # Aspiration windows do not change the result of the search
+    def test_aspirationWindows(self):
+        state = self.play([3, 0, 0, 3, 4, 3, 0, 2, 3, 4]).getBitboard()
+        expected = Bot(2, None, MoveOrdering(), 'pvs').iterativeDeepening(state, False, 10000, maxDepth=6)
+        narrow = Bot(2, None, MoveOrdering(), 'pvs', 1)
+        self.assertEqual(narrow.iterativeDeepening(state, False, 10000, maxDepth=6)[1:], expected[1:])
+        self.assertGreater(narrow.aspirationFailures, 0)
+
+    # Scoring the leaves in batches does not change the result of the search
+    def test_batchLeaves(self):
+        game = self.play([3, 0, 0, 3, 4, 3, 0, 2, 3, 4])
+        for algorithm in ('alphabeta', 'pvs'):
+            for state in (game.getState(), game.getBitboard()):
+                plain = Bot(2, None, MoveOrdering(), algorithm)
+                batched = Bot(2, None, MoveOrdering(), algorithm, batchLeaves=True)
+                expected = plain.search(state, False, 4, plain.lossScore, plain.winScore)
+                self.assertEqual(batched.search(state, False, 4, batched.lossScore, batched.winScore), expected)
+
+    # The parallel search chooses the same move, with the same score, as the serial search
+    def test_parallelMatchesSerial(self):
+        # the empty board, where the moves tie in pairs of mirror images, midgames and threats to block
+        positions = [[], [3], [3, 0, 0, 3, 4, 3, 0, 2, 3, 4], [3, 3, 2, 4, 4, 2, 1, 5, 3, 2], [0, 6, 1, 6, 2],
+            [1, 1, 5, 5, 0, 1, 6, 5, 2, 3, 4, 3, 2, 0, 4, 6], [0, 1, 0, 1, 0, 6, 1]]
+        for algorithm in ('alphabeta', 'pvs'):
+            parallel = Bot(2, TranspositionTable(1), MoveOrdering(), algorithm, workers=2)
+            try:
+                for moves in positions:
+                    state = self.play(moves).getBitboard()
+                    maximizingPlayer = len(moves) % 2 == 1
+                    serial = Bot(2, None, MoveOrdering(), algorithm)
+                    expected = serial.search(state, maximizingPlayer, 5, serial.lossScore, serial.winScore)
+                    parallel.newSearch()
+                    actual = parallel.search(state, maximizingPlayer, 5, parallel.lossScore, parallel.winScore)
+                    self.assertEqual(actual[0], expected[0], moves)
+                    self.assertEqual(actual[1], expected[1], moves)
+            finally:
+                parallel.close()
+
+    # The statistics add up to the bot's counters and the principal variation leads to the score
+    def test_searchStats(self):
+        self.assertIsNone(self.bot.stats)
+        for algorithm in ('alphabeta', 'pvs'):
+            bot = Bot(2, TranspositionTable(1), MoveOrdering(), algorithm, collectStats=True)
+            state = self.midgame.getBitboard()
+            move, score, depth = bot.iterativeDeepening(state, True, 10000, maxDepth=4)
+            stats = bot.stats
+            self.assertEqual(stats.nodes(), bot.nodes)
+            self.assertEqual(stats.cutoffs, bot.cutoffs)
+            self.assertEqual(stats.cutoffIndexes[0], bot.firstMoveCutoffs)
+            self.assertEqual([iteration['depth'] for iteration in stats.iterations], [1, 2, 3, 4])
+            self.assertGreater(stats.transpositionProbes, 0)
+            self.assertEqual(stats.pv[0], move)
+
+        bot = Bot(2, None, MoveOrdering(), collectStats=True)
+        bot.newSearch()
+        move, score = bot.search(state, True, 4, bot.lossScore, bot.winScore)
+        self.assertEqual(len(bot.stats.pv), 4)
+        player = 2
+        for row, column in bot.stats.pv:
+            state.play(column, player)
+            player ^= 3
+        self.assertEqual(Connect4.staticScore(state, 2), score)
+
+    # The stats log is strict JSON, with finite scores for wins, and a bot without statistics logs nothing
+    def test_statsLog(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'stats.jsonl')
+            interface = Interface(2, transpositionTableMB=1, searchDepth=3, timeBudgetMs=10000, statsLog=path)
+            for column in [0, 6, 1, 6, 0, 6, 5]:
+                interface.makeMove(column)
+            self.assertEqual(interface.generateBotMove(), (2, 6))
+            shared = Interface(2, bot=Bot(2), statsLog=path)
+            shared.makeMove(3)
+            shared.generateBotMove()
+            with open(path) as file:
+                lines = file.readlines()
+        self.assertEqual(len(lines), 1)
+
+        def reject(constant):
+            raise ValueError(constant)
+        entry = json.loads(lines[0], parse_constant=reject)
+        self.assertEqual(entry['score'], LOGGED_WIN_SCORE)
+        self.assertEqual(entry['iterations'][-1]['score'], LOGGED_WIN_SCORE)
+
+    # On a 10x12 board with five in a row four discs do not end the game and the bot completes its five
+    def test_connectFive(self):
+        for algorithm in ('alphabeta', 'pvs'):
+            interface = Interface(2, transpositionTableMB=1, searchDepth=2, algorithm=algorithm, rows=10, columns=12, connect=5)
+            for column in [0, 3, 0, 4, 0, 5, 1, 6, 9]:
+                interface.makeMove(column)
+            self.assertTrue(interface.game.isPlaying())
+            self.assertIn(interface.generateBotMove(), [(9, 2), (9, 7)])
+
+    # The search processes play on the board of the bot, not on a 6x7 board
+    def test_parallelOtherBoard(self):
+        moves = [4, 4, 3, 5, 2]
+        serial = Interface(2, transpositionTableMB=1, searchDepth=4, rows=8, columns=9)
+        parallel = Interface(2, transpositionTableMB=1, searchDepth=4, workers=2, rows=8, columns=9)
+        try:
+            for column in moves:
+                serial.makeMove(column)
+                parallel.makeMove(column)
+            self.assertEqual(parallel.generateBotMove(), serial.generateBotMove())
+        finally:
+            parallel.bot.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import random
+import unittest
+
+import numpy as np
+
+from bot import Bot
+from compactgame import CompactGame
+from connect4 import Connect4
+from interface import Interface
+from moveordering import MoveOrdering
+from transposition import TranspositionTable
+
+
+class CompactGameTest(unittest.TestCase):
+
+    # Plays the same random moves in a Connect4 and a CompactGame and checks they agree after every move
+    def test_playsLikeConnect4(self):
+        rng = random.Random(5)
+        for _ in range(30):
+            game, compact = Connect4(), CompactGame()
+            while game.isPlaying():
+                column = rng.choice([column for column in range(7) if game.isMoveLegal(column)])
+                self.assertEqual(game.findLastFreeRow(0, column), compact.findLastFreeRow(0, column))
+                self.assertEqual(game.move(column), compact.move(column))
+                game.switchPlayer()
+                compact.switchPlayer()
+                self.assertTrue(np.array_equal(game.getState(), compact.getState()))
+                self.assertEqual(game.getMode(), compact.getMode())
+                self.assertEqual(game.getWinner(), compact.getWinner())
+                self.assertEqual(game.getCurrentPlayer(), compact.getCurrentPlayer())
+                self.assertEqual([game.isMoveLegal(column) for column in range(7)],
+                    [compact.isMoveLegal(column) for column in range(7)])
+            self.assertEqual(game.getBitboard().key(), compact.getBitboard().key())
+            self.assertEqual(game.getBitboard().scores, compact.getBitboard().scores)
+            self.assertEqual(list(game.history), list(compact.history))
+
+    # A replay steps and seeks through the same boards as in Connect4
+    def test_replay(self):
+        history = [3, 3, 2, 4, 1, 6, 0]
+        game, compact = Connect4(), CompactGame()
+        game.loadReplay(history)
+        compact.loadReplay(history)
+        for _ in history:
+            self.assertEqual(game.makeReplayStep(), compact.makeReplayStep())
+            game.switchPlayer()
+            compact.switchPlayer()
+            self.assertTrue(np.array_equal(game.getState(), compact.getState()))
+        self.assertEqual(compact.getWinner(), 1)
+        compact.seekReplay(4)
+        game.seekReplay(4)
+        self.assertTrue(np.array_equal(game.getState(), compact.getState()))
+        self.assertEqual(game.getCurrentPlayer(), compact.getCurrentPlayer())
+        self.assertTrue(compact.isReplaying())
+
+    # An Interface with a shared bot and a CompactGame plays the same moves as one with its own bot
+    def test_interface(self):
+        shared = Bot(2, TranspositionTable(1), MoveOrdering())
+        interface = Interface(2, transpositionTableMB=1, searchDepth=3)
+        compact = Interface(2, transpositionTableMB=1, searchDepth=3, bot=shared, game=CompactGame())
+        for column in [3, 2, 4]:
+            interface.makeMove(column)
+            compact.makeMove(column)
+            self.assertEqual(interface.generateBotMove(), compact.generateBotMove())
+            interface.makeBotMove()
+            compact.makeBotMove()
+            self.assertEqual(interface.getStatusText(), compact.getStatusText())
+            self.assertTrue(np.array_equal(interface.getGameState(), compact.getGameState()))
+        self.assertIs(compact.bot, shared)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,22 +1,47 @@
 import numpy as np
 import random
+from bitboard import Bitboard
+from threats import LineTable
 
 """
-The game is represented as a 6x7 matrix of integers.
+The game is represented as a matrix of integers, 6x7 by default. The board
+can have any size, and the number of discs in a row that wins (connect) can
+be set as well, for example Connect4(8, 9, 5).
 
 Each element can hold one of three values:
 0 means the slot is empty.
 1 means Player 1 has placed a marker there.
 2 means Player 2 has placed a marker there.
 
+The static methods also accept a Bitboard (see bitboard.py) in place of the
+matrix. The bot searches on bitboards, which are much cheaper to copy and to
+check for wins. A bitboard knows its connect, the static methods that take a
+matrix take it as an argument.
+
+The evaluation weights and their bitboard forms are built once for every
+board size and connect, from the LineTable of the board (see threats.py).
+
 """
 
 class Connect4:
 
-  def __init__(self):
+  # the evaluation weights are built once per (rows, columns, connect), see getEvaluationWeights
+  evaluationWeights = {}
+  # evaluation weights in the per-column lookup form used by Bitboard.score
+  bitboardScoreTables = {}
+  # evaluation weight of every bit of a bitboard, used by staticScoreBatch
+  bitboardBitWeights = {}
+  # the same weights as a list, which bitboards use to keep their score up to date
+  bitboardWeights = {}
+  # a replay keeps a copy of the board every this many moves, so it can seek to any move quickly
+  SNAPSHOT_INTERVAL = 8
+
+  def __init__(self, rows=6, columns=7, connect=4):
     # initialize board
-    self.rows = 6
-    self.columns = 7
+    self.rows = rows
+    self.columns = columns
+    # number of discs in a row that wins
+    self.connect = connect
     self.numberOfSlots = self.rows*self.columns
     self.state = np.zeros(self.numberOfSlots).reshape(self.rows, self.columns)
 
@@ -28,31 +53,75 @@ class Connect4:
     # Game modes: 0 = playing, 1 = ended, 2 = replay-mode
     self.mode = 0
     self.replayStep = 0
+    # the board after 0, SNAPSHOT_INTERVAL, 2 * SNAPSHOT_INTERVAL, ... moves of the history, built by replayMode
+    self.replaySnapshots = []
 
   def __str__(self):
     return str(self.state)
 
   def reset(self):
     # reset the game by calling the init-method
-    self.__init__()
+    self.__init__(self.rows, self.columns, self.connect)
   
   # static methods
 
   @staticmethod
-  def getEvaluationMatrix():
-    # get the weights of each position in the board
-    return np.array([
-        [3, 4, 5, 7, 5, 4, 3],
-        [4, 6, 8, 10, 8, 6, 4],
-        [5, 8, 11, 13, 11, 8, 5],
-        [5, 8, 11, 13, 11, 8, 5],
-        [4, 6, 8, 10, 8, 6, 4],
-        [3, 4, 5, 7, 5, 4, 3]
-    ])
+  def getEvaluationMatrix(rows=6, columns=7, connect=4):
+    # get the weights of each position in the board, the number of lines of connect slots
+    # through it, which on the 6x7 board are
+    #   3  4  5  7  5  4  3
+    #   4  6  8 10  8  6  4
+    #   5  8 11 13 11  8  5
+    #   5  8 11 13 11  8  5
+    #   4  6  8 10  8  6  4
+    #   3  4  5  7  5  4  3
+    return LineTable.get(rows, columns, connect).linesPerSlot()
+
+  @staticmethod
+  def getEvaluationWeights(rows=6, columns=7, connect=4):
+    # a shared, read-only copy of the evaluation matrix
+    key = (rows, columns, connect)
+    if key not in Connect4.evaluationWeights:
+      weights = Connect4.getEvaluationMatrix(rows, columns, connect)
+      weights.setflags(write=False)
+      Connect4.evaluationWeights[key] = weights
+    return Connect4.evaluationWeights[key]
+
+  @staticmethod
+  def getBitboardBitWeights(rows=6, columns=7, connect=4):
+    key = (rows, columns, connect)
+    if key not in Connect4.bitboardBitWeights:
+      Connect4.bitboardBitWeights[key] = Bitboard.bitWeights(Connect4.getEvaluationWeights(rows, columns, connect))
+    return Connect4.bitboardBitWeights[key]
+
+  @staticmethod
+  def getBitboardWeights(rows=6, columns=7, connect=4):
+    key = (rows, columns, connect)
+    if key not in Connect4.bitboardWeights:
+      Connect4.bitboardWeights[key] = [int(weight) for weight in Connect4.getBitboardBitWeights(rows, columns, connect)]
+    return Connect4.bitboardWeights[key]
+
+  @staticmethod
+  def getBitboardScoreTables(rows=6, columns=7, connect=4):
+    # build the bitboard lookup of the evaluation weights once
+    key = (rows, columns, connect)
+    if key not in Connect4.bitboardScoreTables:
+      Connect4.bitboardScoreTables[key] = Bitboard.scoreTables(Connect4.getEvaluationWeights(rows, columns, connect))
+    return Connect4.bitboardScoreTables[key]
+
+  @staticmethod
+  def staticToBitboard(state, threats=False, connect=4):
+    # convert a state matrix to a bitboard, which keeps its score up to date as disks are added
+    # with threats the bitboard also keeps its threat score (see staticThreatScore) up to date
+    rows, columns = state.shape
+    lineTable = LineTable.get(rows, columns, connect) if threats else None
+    return Bitboard.fromState(state, Connect4.getBitboardWeights(rows, columns, connect), lineTable, connect)
 
   @staticmethod
   def staticFindLastFreeRow(state, row, column):
     # search a column for an empty place to put a marker (from top to bottom)
+    if isinstance(state, Bitboard):
+      return state.freeRow(column)
     if state[row, column] == 0:
       row += 1
       if row < state.shape[0]:
@@ -62,36 +131,109 @@ class Connect4:
   @staticmethod
   def staticStateAfterMove(state, move, player):
     # Return a copy of the state with a disk added to it
+    if isinstance(state, Bitboard):
+      return state.afterMove(move, player)
     row, column = move
     copy = np.copy(state)
     copy[row, column] = player
     return copy
   
   @staticmethod
-  def staticScore(state, player):
+  def staticScore(state, player, connect=4):
     # calculate score difference between two players
-    weights = Connect4.getEvaluationMatrix()
-    playerState = state == player
-    opponentState = state == (player ^ 3)
+    # for a bitboard from staticToBitboard this only reads the score it keeps
+    if isinstance(state, Bitboard):
+      return state.score(player, Connect4.getBitboardScoreTables(state.rows, state.columns, state.connect))
+    weights = Connect4.getEvaluationWeights(state.shape[0], state.shape[1], connect)
+    playerScore = np.sum(weights[state == player])
+    opponentScore = np.sum(weights[state == (player ^ 3)])
 
-    playerState = playerState.astype(int)
-    opponentState = opponentState.astype(int)
+    return playerScore - opponentScore
 
-    playerScore = np.sum(np.multiply(weights, playerState))
-    opponentScore = np.sum(np.multiply(weights, opponentState))
+  @staticmethod
+  def staticScoreBatch(states, player, connect=4):
+    # calculate the score of many states in one go
+    # states is either an (N, rows, columns) array or a list of bitboards
+    # returns an array with the N scores, the same as calling staticScore on each state
+    if isinstance(states, np.ndarray):
+      weights = Connect4.getEvaluationWeights(states.shape[1], states.shape[2], connect)
+      discs = (states == player).astype(np.int8) - (states == (player ^ 3))
+      return np.tensordot(discs, weights, axes=2)
+
+    if all(board.scores is not None for board in states):
+      # the bitboards keep their scores
+      return np.fromiter((board.scores[player] - board.scores[player ^ 3] for board in states), dtype=np.int64, count=len(states))
+
+    playerMasks, opponentMasks = Bitboard.packMasks(states, player)
+    bitWeights = Connect4.getBitboardBitWeights(states[0].rows, states[0].columns, states[0].connect)
+    shifts = np.arange(len(bitWeights), dtype=np.uint64)
+    discs = ((playerMasks[:, None] >> shifts) & 1).astype(np.int8) - ((opponentMasks[:, None] >> shifts) & 1)
+    return discs @ bitWeights
 
-    return playerScore - opponentScore
+  @staticmethod
+  def staticThreatScore(state, player):
+    # score the lines of four that a player can still complete, minus the opponent's (see threats.py)
+    # for a bitboard from staticToBitboard(state, True) this only reads the score it keeps
+    if isinstance(state, Bitboard) and state.lineCounts is not None:
+      score = state.threatScore
+    else:
+      board = state if isinstance(state, Bitboard) else Bitboard.fromState(state)
+      score = LineTable.get(board.rows, board.columns, board.connect).evaluate(board.masks)
+    return score if player == 1 else -score
 
   @staticmethod
-  def staticIsWinningMove(state, move):
+  def staticThreatScoreBatch(states, player):
+    # the threat scores of a list of states
+    return np.fromiter((Connect4.staticThreatScore(state, player) for state in states), dtype=np.int64, count=len(states))
+
+  @staticmethod
+  def staticIsWinningMove(state, move, connect=4):
     # check if a move resulted in a victory
-    streaks = Connect4.staticScoreFromMove(state, move)
-    longestStreak = max(streaks)
-    return longestStreak >= 4
+    # only the slots around the move are looked at, at most connect - 1 in each direction
+    if isinstance(state, Bitboard):
+      return state.isWinningMove(move)
+    row, column = move
+    player = state[row, column]
+    if player == 0:
+      return False
+    rows, columns = state.shape
+    # horizontal, vertical and the two diagonals
+    for rowStep, columnStep in ((0, 1), (1, 0), (1, 1), (1, -1)):
+      count = 1
+      for direction in (1, -1):
+        r, c = row + direction * rowStep, column + direction * columnStep
+        while count < connect and 0 <= r < rows and 0 <= c < columns and state[r, c] == player:
+          count += 1
+          r += direction * rowStep
+          c += direction * columnStep
+      if count >= connect:
+        return True
+    return False
+
+  @staticmethod
+  def staticWinnerBatch(states, rows=6, connect=4):
+    # find the winner of many boards in one go, without knowing the last move
+    # states is an (N, rows, columns) array, a list of bitboards, or the packed masks of player 1 and 2
+    # as two uint64 arrays, see Bitboard.packMasks (rows is only used for those, connect for those and the array)
+    # returns an int8 array with 0 for no winner, 1 or 2 for the winner and 3 if both players have four in a row
+    if isinstance(states, np.ndarray):
+      rows = states.shape[1]
+      masks1, masks2 = Bitboard.packStates(states, 1), Bitboard.packStates(states, 2)
+    elif isinstance(states, tuple):
+      masks1, masks2 = states
+    else:
+      rows = states[0].rows if len(states) > 0 else rows
+      connect = states[0].connect if len(states) > 0 else connect
+      masks1, masks2 = Bitboard.packMasks(states, 1)
+    height = rows + 1
+    return (Bitboard.alignmentBatch(masks1, height, connect).astype(np.int8)
+      + 2 * Bitboard.alignmentBatch(masks2, height, connect).astype(np.int8))
 
   @staticmethod
   def staticLegalMovesFromState(state):
     # find all legal moves (columns where a disk can be placed), given a specific state
+    if isinstance(state, Bitboard):
+      return state.legalMoves()
     legalMoves = []
     for column in range(state.shape[1]): # shape returns (height, width)
       if state[0, column] == 0:
@@ -99,6 +241,13 @@ class Connect4:
         legalMoves.append((row, column))
     return legalMoves
   
+  @staticmethod
+  def staticEmptySlots(state):
+    # count the slots where no disk has been placed
+    if isinstance(state, Bitboard):
+      return state.rows * state.columns - state.moveCount()
+    return state.size - np.count_nonzero(state)
+
   @staticmethod
   def staticScoreFromMove(state, move):
     # check how many disks there are in a row
@@ -180,14 +329,43 @@ class Connect4:
     self.state = np.zeros(self.numberOfSlots).reshape(self.rows, self.columns)
     self.currentPlayer = 1
 
+    # play through the history once and keep the snapshots seekReplay starts from
+    state = np.copy(self.state)
+    self.replaySnapshots = [np.copy(state)]
+    for ply, column in enumerate(self.history):
+      state[Connect4.staticFindLastFreeRow(state, 0, column), column] = ply % 2 + 1
+      if (ply + 1) % Connect4.SNAPSHOT_INTERVAL == 0:
+        self.replaySnapshots.append(np.copy(state))
+
+  def loadReplay(self, history):
+    # replay a game from a list of columns, for example one read with gamerecord.py
+    self.reset()
+    self.history = list(history)
+    self.replayMode()
+
   def makeReplayStep(self):
     # game class probably shouldn't have this
     # this is used to replay a game from history
     col = self.history[self.replayStep]
-    row = self.findLastFreeRow(self.rows-1, col)
-    self.move(col)
+    position = self.placeMarker(col)
     self.replayStep += 1
-    return (row, col)
+    return position
+
+  def seekReplay(self, ply):
+    # show the board after the first ply moves of the history, from the closest snapshot before it
+    # the next makeReplayStep plays move ply + 1
+    if not 0 <= ply <= len(self.history):
+      raise ValueError('cannot seek to ply {0} of a game of {1} moves'.format(ply, len(self.history)))
+    # the last move is always replayed, even from a snapshot at ply, so that the end of the game is found
+    snapshot = max(ply - 1, 0) // Connect4.SNAPSHOT_INTERVAL
+    self.state = np.copy(self.replaySnapshots[snapshot])
+    self.mode = 2
+    self.winner = -1
+    for step in range(snapshot * Connect4.SNAPSHOT_INTERVAL, ply):
+      self.currentPlayer = step % 2 + 1
+      self.placeMarker(self.history[step])
+    self.currentPlayer = ply % 2 + 1
+    self.replayStep = ply
 
   def calcScoreFromMove(self, row, column):
     return Connect4.staticScoreFromMove(self.getState(), (row, column))
@@ -198,9 +376,13 @@ class Connect4:
   def move(self, column):
     # Current player makes a move
     # returns position where the disk landed (row, column)
+    self.history.append(column)
+    return self.placeMarker(column)
+
+  def placeMarker(self, column):
+    # put the current player's disk in a column without adding it to the history
     markerRow = self.findLastFreeRow(0, column)
     self.state[markerRow, column] = self.currentPlayer
-    self.history.append(column)
     if self.isGameWinningMove(markerRow, column):
       self.setWinner(self.currentPlayer)
     self.updateGameMode()
@@ -225,7 +407,7 @@ class Connect4:
     return np.count_nonzero(self.state) == self.numberOfSlots
 
   def isGameWinningMove(self, row, column):
-    return Connect4.staticIsWinningMove(self.getState(), (row, column))
+    return Connect4.staticIsWinningMove(self.getState(), (row, column), self.connect)
 
   def findLastFreeRow(self, row, column):
     return Connect4.staticFindLastFreeRow(self.getState(), row, column)
@@ -236,6 +418,9 @@ class Connect4:
   def getState(self):
     return self.state
 
+  def getBitboard(self):
+    return Connect4.staticToBitboard(self.getState(), connect=self.connect)
+
   def getCurrentPlayer(self):
     return self.currentPlayer
 
@@ -100,5 +100,52 @@ class Connect4Test(unittest.TestCase):
         self.c.move(6)
         self.assertEqual(self.c.mode, 1)
 
+    # Scoring a stack of states at once gives the same scores as scoring them one by one
+    def test_scoreBatch(self):
+        states = [self.getThreeStreakDiagonal(), self.getThreeStreakCorner(), self.getTiedBoard(), np.zeros((6, 7))]
+        for player in (1, 2):
+            expected = [Connect4.staticScore(state, player) for state in states]
+            self.assertEqual(list(Connect4.staticScoreBatch(np.stack(states), player)), expected)
+            bitboards = [Connect4.staticToBitboard(state) for state in states]
+            self.assertEqual(list(Connect4.staticScoreBatch(bitboards, player)), expected)
+
+    # The weights built from the line table are the classic evaluation matrix on the 6x7 board
+    def test_evaluationMatrix(self):
+        expected = np.array([[3, 4, 5, 7, 5, 4, 3],
+                             [4, 6, 8, 10, 8, 6, 4],
+                             [5, 8, 11, 13, 11, 8, 5],
+                             [5, 8, 11, 13, 11, 8, 5],
+                             [4, 6, 8, 10, 8, 6, 4],
+                             [3, 4, 5, 7, 5, 4, 3]])
+        self.assertTrue(np.array_equal(Connect4.getEvaluationMatrix(), expected))
+        self.assertIs(Connect4.getEvaluationWeights(8, 9, 5), Connect4.getEvaluationWeights(8, 9, 5))
+        self.assertEqual(Connect4.getEvaluationWeights(8, 9, 5).shape, (8, 9))
+
+    # On an 8x9 board with five in a row four discs do not win, five do, and a reset keeps the board size
+    def test_connectFive(self):
+        game = Connect4(8, 9, 5)
+        for column in [0, 0, 1, 1, 2, 2, 3, 3]:
+            game.move(column)
+            game.switchPlayer()
+        self.assertTrue(game.isPlaying())
+        self.assertEqual(game.move(4), (7, 4))
+        self.assertEqual(game.getWinner(), 1)
+        self.assertEqual(game.getBitboard().connect, 5)
+        game.reset()
+        self.assertEqual(game.getState().shape, (8, 9))
+        self.assertEqual(game.connect, 5)
+
+    # Looking around the move finds the same wins as scanning the rows, columns and diagonals through it
+    def test_winningMoveAroundDisc(self):
+        rng = np.random.default_rng(3)
+        for rows, columns, connect in ((6, 7, 4), (8, 9, 5), (5, 5, 3)):
+            for _ in range(50):
+                state = rng.choice(3, size=(rows, columns), p=[0.4, 0.3, 0.3]).astype(float)
+                for row in range(rows):
+                    for column in range(columns):
+                        if state[row, column] != 0:
+                            expected = max(Connect4.staticScoreFromMove(state, (row, column))) >= connect
+                            self.assertEqual(Connect4.staticIsWinningMove(state, (row, column), connect), expected)
+
     if __name__ == '__main__':
         unittest.main()
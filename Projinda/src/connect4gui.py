@@ -2,10 +2,13 @@ from tkinter import Tk, Canvas, Frame, Button, BOTH, TOP, BOTTOM
 import numpy as np
 from interface import Interface
 from math import floor
-from time import sleep
+from time import sleep, perf_counter
+import threading
 
 
 MARGIN = 20  # Pixels around the board
+FRAME_MS = 16  # Interval of the frame timer that measures how responsive the window is
+POLL_MS = 50  # Interval of checking whether the bot has found its move
 
 class Connect4GUI(Frame):
   def __init__(self, parent, interface, playingVersusBot):
@@ -14,6 +17,15 @@ class Connect4GUI(Frame):
     self.game = self.interface.game
     self.parent = parent
     Frame.__init__(self, parent)
+    # the bot searches on botThread, its move is put in botMove and picked up by pollBotMove
+    # an exception of the search is put in botError instead
+    self.botThread = None
+    self.botMove = None
+    self.botError = None
+    self.thinkingSince = 0
+    # the longest time between two ticks of the frame timer while the bot was thinking
+    self.lastFrame = perf_counter()
+    self.longestFrame = 0
 
     parent.update()
     self.height = parent.winfo_height()
@@ -38,13 +50,14 @@ class Connect4GUI(Frame):
     self.squareWidth = min(suitableHeight, suitableWidth)
 
 
+    self.drawGrid()
     self.drawBoard()
     self.canvas.bind("<Button-1>", self.clickCallback)
+    self.after(FRAME_MS, self.frameTick)
 
   def reset(self):
-    self.interface.game.reset()
-    self.eraseDiscs()
-    self.eraseText()
+    self.canvas.delete("error")
+    self.interface.resetGame()
     self.interface.resetStatusText()
     self.drawBoard()
   
@@ -56,11 +69,10 @@ class Connect4GUI(Frame):
   #    self.interface.makeReplayMove()
   #    self.drawBoard()
 
-  def drawBoard(self):
-    state = self.interface.getGameState()
-    print(state)
-    rows = state.shape[0]
-    columns = state.shape[1]
+  def drawGrid(self):
+    # the grid does not change, so it is only drawn once
+    rows = self.game.getRows()
+    columns = self.game.getColumns()
 
     # draw horizontal lines
     for row in range(rows + 1):
@@ -86,10 +98,15 @@ class Connect4GUI(Frame):
 
       self.canvas.create_line(x0, y0, x1, y1, fill=color)
 
+  def drawBoard(self):
+    # draw all discs again, after a reset
     self.eraseDiscs()
-    self.drawDiscs(state)
+    self.drawDiscs(self.interface.getGameState())
+    self.updateText()
+
+  def updateText(self):
     self.eraseText()
-    self.displayText(MARGIN + columns*self.squareWidth/2, MARGIN + (rows+1)*self.squareWidth)
+    self.displayText(MARGIN + self.game.getColumns()*self.squareWidth/2, MARGIN + (self.game.getRows()+1)*self.squareWidth)
 
   def displayText(self, x, y):
     color = "black"
@@ -101,22 +118,25 @@ class Connect4GUI(Frame):
     self.canvas.delete("info")
     
   def drawDiscs(self, state):
-    color = "red"
     for row in range(state.shape[0]):
       for column in range(state.shape[1]):
-        xLower = MARGIN + column*self.squareWidth
-        xUpper = xLower + self.squareWidth
-        xMiddle = xLower/2 + xUpper/2
-
-        yLower = MARGIN + row*self.squareWidth
-        yUpper = yLower + self.squareWidth
-        yMiddle = yLower/2 + yUpper/2
-
-        player = state[row, column]
-        if player == 1:
-          self.create_circle(xMiddle, yMiddle, 10, "black", "yellow", self.canvas)
-        elif player == 2:
-          self.create_circle(xMiddle, yMiddle, 10, "black", "red", self.canvas)
+        if state[row, column] != 0:
+          self.drawDisc(row, column, state[row, column])
+
+  def drawDisc(self, row, column, player):
+    # add the canvas item of one disc
+    xLower = MARGIN + column*self.squareWidth
+    xUpper = xLower + self.squareWidth
+    xMiddle = xLower/2 + xUpper/2
+
+    yLower = MARGIN + row*self.squareWidth
+    yUpper = yLower + self.squareWidth
+    yMiddle = yLower/2 + yUpper/2
+
+    if player == 1:
+      self.create_circle(xMiddle, yMiddle, 10, "black", "yellow", self.canvas)
+    elif player == 2:
+      self.create_circle(xMiddle, yMiddle, 10, "black", "red", self.canvas)
   
   def create_circle(self, x, y, r, outline, color, canvasName):
     x0 = x - r
@@ -129,23 +149,89 @@ class Connect4GUI(Frame):
     self.canvas.delete("discs")
 
   def clickCallback(self, event):
+    # clicks are ignored while the bot is thinking
+    if self.botThread is not None:
+      return
     # event includes (x,y) where user clicked
     # determine which column the user clicks in
     x, y = event.x, event.y
     row, column = self.getBoardPos(x, y)
-    # print((row,column))
-    self.interface.makeMove(column)
+    if not 0 <= column < self.game.getColumns() or not self.game.isPlaying() or not self.game.isMoveLegal(column):
+      return
+    player = self.game.getCurrentPlayer()
+    position = self.interface.makeMove(column)
+    self.drawDisc(position[0], position[1], player)
+    self.updateText()
 
     # if playing vs bot
-    if self.playingVersusBot:
-      botMadeMove = self.interface.makeBotMove()
+    if self.playingVersusBot and self.game.isPlaying():
+      self.startBotMove()
 
     #if self.interface.game.hasEnded():
     #  self.replayButton["state"] = "normal"
     #else:
     #  self.replayButton["state"] = "disabled"
 
-    self.drawBoard()
+  def startBotMove(self):
+    # search the bot's move on a thread, so the window keeps handling events
+    self.botMove = None
+    self.botError = None
+    self.canvas.delete("error")
+    self.thinkingSince = perf_counter()
+    self.longestFrame = 0
+    self.resetButton["state"] = "disabled"
+    self.botThread = threading.Thread(target=self.searchBotMove, daemon=True)
+    self.botThread.start()
+    self.after(POLL_MS, self.pollBotMove)
+
+  def searchBotMove(self):
+    # runs on botThread, Tk is only used from the main thread
+    try:
+      self.botMove = self.interface.generateBotMove()
+    except Exception as error:
+      self.botError = error
+
+  def pollBotMove(self):
+    if self.botThread.is_alive():
+      self.showThinking()
+      self.after(POLL_MS, self.pollBotMove)
+      return
+    self.botThread = None
+    self.canvas.delete("thinking")
+    self.resetButton["state"] = "normal"
+    if self.botError is not None:
+      # the board and the reset button work again, the game can be reset
+      self.showError()
+      return
+    player = self.game.getCurrentPlayer()
+    position = self.interface.playBotMove(self.botMove)
+    self.drawDisc(position[0], position[1], player)
+    self.updateText()
+
+  def showThinking(self):
+    self.canvas.delete("thinking")
+    self.canvas.create_text(
+      MARGIN + self.game.getColumns()*self.squareWidth/2, MARGIN + (self.game.getRows()+2)*self.squareWidth,
+      text='The bot is thinking... {0:.1f} s, longest frame {1:.0f} ms'.format(
+        perf_counter() - self.thinkingSince, 1000 * self.longestFrame),
+      tags="thinking", fill="grey"
+    )
+
+  def showError(self):
+    # where showThinking was, until the next bot move or a reset
+    self.canvas.create_text(
+      MARGIN + self.game.getColumns()*self.squareWidth/2, MARGIN + (self.game.getRows()+2)*self.squareWidth,
+      text='The bot could not make its move: {0!r}'.format(self.botError),
+      tags="error", fill="red"
+    )
+
+  def frameTick(self):
+    # the time between ticks is FRAME_MS when the main loop is free, more when something blocks it
+    now = perf_counter()
+    if self.botThread is not None:
+      self.longestFrame = max(self.longestFrame, now - self.lastFrame)
+    self.lastFrame = now
+    self.after(FRAME_MS, self.frameTick)
 
   def getBoardPos(self, x, y):
     column, offsetx = divmod(x-MARGIN, self.squareWidth)
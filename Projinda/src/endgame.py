@@ -0,0 +1,262 @@
+from bitboard import Bitboard
+from solver import Solver
+from array import array
+from bisect import bisect_left
+import mmap
+import os
+import random
+import struct
+import sys
+import time
+
+"""
+An endgame database, the exact value of every position near the end of a game.
+
+A position with few empty slots is where a search to a fixed depth either
+searches to the end of the game anyway or stops just before a forced line.
+The database is built offline: it takes every position with at most empties
+empty slots that can be reached from a set of seed positions and where the
+game is still going, and solves them all by retrograde analysis. The
+positions are grouped by their number of discs and the groups are solved
+from the fullest boards back, so the value of every position is the best of
+the values after its moves, which are already known, and no position is
+searched twice.
+
+All positions with few empty slots cannot be listed on the 6x7 board, there
+are billions of them, so the seeds decide which endgames are in the database,
+for example the positions of games the bot played against itself (see
+selfPlaySeeds). On small boards the seed can be the empty board, which gives
+every endgame of the board.
+
+The values are those of solver.py, from the point of view of the player to
+move. The file is:
+
+  header   magic b'C4EG', rows, columns, connect, empties and the number of positions
+  keys     the key (Bitboard.canonicalKey) of every position, 8 bytes each, sorted
+  values   the value of every position, 1 signed byte each, in the same order
+  columns  the best column of every position, 1 byte each, for the position with the key
+
+It is opened with mmap and the keys are looked up with a binary search over
+the key section, so opening the database does not read it. A position takes
+10 bytes.
+
+Usage: python endgame.py [empties] [games] [file]
+
+"""
+
+MAGIC = b'C4EG'
+HEADER = struct.Struct('<4sBBBBQ')
+
+# bytes of the file for every position: key, value and column
+POSITION_BYTES = 10
+
+# the database used by play.py and playgui.py if it has been generated
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'endgame.bin')
+
+class EndgameDatabase:
+
+  def __init__(self, path):
+    self.path = path
+    self.file = open(path, 'rb')
+    self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, self.rows, self.columns, self.connect, self.empties, self.size = HEADER.unpack_from(self.data, 0)
+    if magic != MAGIC or len(self.data) != HEADER.size + self.size * POSITION_BYTES:
+      self.close()
+      raise ValueError('{0} is not an endgame database'.format(path))
+    # the sections are read in place, only the keys a lookup compares are read from the file
+    view = memoryview(self.data)
+    keysEnd = HEADER.size + 8 * self.size
+    self.keys = view[HEADER.size:keysEnd].cast('Q')
+    if sys.byteorder == 'big':
+      # the file is little-endian, a big-endian machine reads the keys into memory
+      self.keys = array('Q', self.keys)
+      self.keys.byteswap()
+    self.values = view[keysEnd:keysEnd + self.size].cast('b')
+    self.bestColumns = view[keysEnd + self.size:]
+    self.resetStats()
+
+  def __len__(self):
+    return self.size
+
+  def close(self):
+    # the views of the sections are released before the mmap they look at is closed
+    for name in ('keys', 'values', 'bestColumns'):
+      section = getattr(self, name, None)
+      if isinstance(section, memoryview):
+        section.release()
+    self.data.close()
+    self.file.close()
+
+  def resetStats(self):
+    self.probes = 0  # lookups of positions in the region of the database
+    self.hits = 0  # lookups that found the position
+
+  def covers(self, board):
+    # whether a bitboard is on the board of the database and has at most empties empty slots
+    return (board.rows == self.rows and board.columns == self.columns and board.connect == self.connect
+      and board.rows * board.columns - board.moveCount() <= self.empties)
+
+  def lookup(self, board):
+    """
+    :param board: a Bitboard the database covers, where the game is still going
+    :return: (move, value) for the player to move, move is (row, column), or None if the position is not in the database
+    """
+    self.probes += 1
+    key, mirrored = board.canonicalKey()
+    index = bisect_left(self.keys, key)
+    if index == self.size or self.keys[index] != key:
+      return None
+    self.hits += 1
+    column = self.bestColumns[index]
+    if mirrored:
+      column = board.mirrorColumn(column)
+    return ((board.freeRow(column), column), self.values[index])
+
+  def getStats(self):
+    return {
+      'probes': self.probes,
+      'hits': self.hits,
+      'hitRate': self.hits / self.probes if self.probes > 0 else 0.0,
+      'positions': self.size,
+      'bytes': len(self.data),
+    }
+
+def canonicalMasks(mask1, mask2, columns, height):
+  # the canonical key of a position and the masks of the position with that key, which are the
+  # mirror images of mask1 and mask2 when the key is the mirror's key, see Bitboard.canonicalKey
+  key = mask1 + (mask1 | mask2)
+  mirrored = Bitboard.mirrorKey(key, columns, height)
+  if mirrored < key:
+    return (mirrored, (Bitboard.mirrorKey(mask1, columns, height), Bitboard.mirrorKey(mask2, columns, height)))
+  return (key, (mask1, mask2))
+
+def endgamePositions(seeds, empties, rows=6, columns=7, connect=4):
+  """
+  Every position reachable from the seeds where the game is still going, by number of discs.
+  The positions with more than empties empty slots are only gone through to reach the others.
+  :param seeds: bitboards
+  :return: a list with a dict for every number of discs, from the canonical key of a position to its masks
+  """
+  height = rows + 1
+  cells = rows * columns
+  bottomMask = sum(1 << (column * height) for column in range(columns))
+  boardMask = bottomMask * ((1 << rows) - 1)
+  columnMasks = [((1 << rows) - 1) << (column * height) for column in range(columns)]
+  layers = [{} for _ in range(cells)]
+  for board in seeds:
+    if not (board.isWin(1) or board.isWin(2) or board.isFull()):
+      key, masks = canonicalMasks(board.masks[1], board.masks[2], columns, height)
+      layers[board.moveCount()][key] = masks
+
+  for discs in range(cells - 1):
+    layer = layers[discs + 1]
+    for mask1, mask2 in layers[discs].values():
+      mask = mask1 | mask2
+      possible = (mask + bottomMask) & boardMask
+      for columnMask in columnMasks:
+        move = possible & columnMask
+        if move == 0:
+          continue
+        if discs % 2 == 0:
+          child1, child2, won = mask1 | move, mask2, Bitboard.hasAlignment(mask1 | move, height, connect)
+        else:
+          child1, child2, won = mask1, mask2 | move, Bitboard.hasAlignment(mask2 | move, height, connect)
+        if not won and discs + 1 < cells:
+          key, masks = canonicalMasks(child1, child2, columns, height)
+          if key not in layer:
+            layer[key] = masks
+  return layers
+
+def retrogradeValues(layers, empties, rows=6, columns=7, connect=4):
+  """
+  Solve the positions with at most empties empty slots, from the fullest boards back.
+  :return: a dict from the canonical key of every position to its value and best column
+  """
+  height = rows + 1
+  cells = rows * columns
+  bottomMask = sum(1 << (column * height) for column in range(columns))
+  boardMask = bottomMask * ((1 << rows) - 1)
+  # center first, so that of moves with the same value the one nearest the center is kept
+  order = sorted(range(columns), key=lambda column: abs(2 * column - (columns - 1)))
+  values = {}
+  for discs in range(cells - 1, max(cells - empties, 0) - 1, -1):
+    # a win with the next disc, the same value as in solver.py
+    winValue = (cells + 1 - discs) // 2
+    for key, (mask1, mask2) in layers[discs].items():
+      player, opponent = (mask1, mask2) if discs % 2 == 0 else (mask2, mask1)
+      possible = ((mask1 | mask2) + bottomMask) & boardMask
+      best, bestColumn = None, -1
+      for column in order:
+        move = possible & (((1 << rows) - 1) << (column * height))
+        if move == 0:
+          continue
+        if Bitboard.hasAlignment(player | move, height, connect):
+          value = winValue
+        elif discs + 1 == cells:
+          value = 0
+        else:
+          child1, child2 = (player | move, opponent) if discs % 2 == 0 else (opponent, player | move)
+          value = -values[canonicalMasks(child1, child2, columns, height)[0]][0]
+        if best is None or value > best:
+          best, bestColumn = value, column
+      values[key] = (best, bestColumn)
+  return values
+
+def generate(path, empties, seeds, rows=6, columns=7, connect=4):
+  """
+  Solve every position with at most empties empty slots reachable from the seeds and write the database.
+  :return: the number of positions written
+  """
+  if columns * (rows + 1) > 64 or empties > 127:
+    raise ValueError('the database keeps keys in 64 bits and values in one byte')
+  layers = endgamePositions(seeds, empties, rows, columns, connect)
+  values = retrogradeValues(layers, empties, rows, columns, connect)
+  keys = array('Q', sorted(values))
+  positionValues = array('b', [values[key][0] for key in keys])
+  bestColumns = array('B', [values[key][1] for key in keys])
+  if sys.byteorder == 'big':
+    keys.byteswap()
+  with open(path, 'wb') as file:
+    file.write(HEADER.pack(MAGIC, rows, columns, connect, empties, len(keys)))
+    keys.tofile(file)
+    positionValues.tofile(file)
+    bestColumns.tofile(file)
+  return len(keys)
+
+def selfPlayGames(games, depth=4, seed=0):
+  """
+  Games the bot plays against itself on the 6x7 board, each from a random opening.
+  :return: the columns played in every game
+  """
+  # tournament imports the bot, which imports this module
+  from tournament import VARIANT_DEFAULTS, randomOpening, playGame
+  rng = random.Random(seed)
+  variant = dict(VARIANT_DEFAULTS, depth=depth)
+  histories = []
+  for _ in range(games):
+    opening = randomOpening(rng)
+    result, moves = playGame((variant, variant), opening, True)
+    histories.append(opening + moves)
+  return histories
+
+def positionsAt(histories, empties, rows=6, columns=7):
+  # the positions with empties empty slots of games, leaving out the games that ended before
+  discs = rows * columns - empties
+  return [Solver.boardFromHistory(history[:discs], rows, columns) for history in histories if len(history) > discs]
+
+def selfPlaySeeds(games, empties, depth=4, seed=0):
+  # the positions with empties empty slots of games the bot plays against itself, see selfPlayGames
+  return positionsAt(selfPlayGames(games, depth, seed), empties)
+
+if __name__ == '__main__':
+  empties = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+  games = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+  path = sys.argv[3] if len(sys.argv) > 3 else DEFAULT_PATH
+  start = time.perf_counter()
+  seeds = selfPlaySeeds(games, empties)
+  playSeconds = time.perf_counter() - start
+  start = time.perf_counter()
+  count = generate(path, empties, seeds)
+  print('{0} seeds from {1} games in {2:.1f} seconds'.format(len(seeds), games, playSeconds))
+  print('{0} positions with at most {1} empty slots solved in {2:.1f} seconds, {3} bytes written to {4}'.format(
+    count, empties, time.perf_counter() - start, os.path.getsize(path), path))
@@ -0,0 +1,116 @@
+import os
+import random
+import tempfile
+import unittest
+
+from bitboard import Bitboard
+from bot import Bot
+from endgame import EndgameDatabase, endgamePositions, generate, positionsAt
+from interface import Interface
+from moveordering import MoveOrdering
+from solver import Solver
+from transposition import TranspositionTable
+
+
+class EndgameDatabaseTest(unittest.TestCase):
+    # A game of the bot against itself with 12 empty slots left, its key is the key of the mirror image
+    seed = [3, 2, 4, 1, 5, 6, 3, 3, 3, 3, 3, 2, 2, 2, 1, 0, 2, 4, 1, 1, 1, 2, 5, 4, 4, 4, 5, 5, 5, 4]
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.directory.name, 'endgame.bin')
+        cls.count = generate(cls.path, 12, [Solver.boardFromHistory(cls.seed)])
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def setUp(self):
+        self.database = EndgameDatabase(self.path)
+
+    def tearDown(self):
+        self.database.close()
+
+    # Random positions below the seed have the value the solver finds, and the best column keeps it
+    def test_matchesSolver(self):
+        rng = random.Random(3)
+        solver = Solver()
+        seed = Solver.boardFromHistory(self.seed)
+        self.assertTrue(seed.canonicalKey()[1])
+        layers = endgamePositions([seed], 12)
+        self.assertEqual(self.count, sum(len(layer) for layer in layers))
+        self.assertEqual(len(self.database), self.count)
+        checked = 0
+        while checked < 30:
+            board = seed.copy()
+            for _ in range(rng.randrange(8)):
+                player = board.moveCount() % 2 + 1
+                board.play(rng.choice([column for column in range(7) if board.isLegal(column)]), player)
+                if board.isWin(player) or board.isFull():
+                    break
+            if board.isWin(1) or board.isWin(2) or board.isFull():
+                continue
+            (row, column), value = self.database.lookup(board)
+            self.assertEqual(value, solver.solve(board))
+            self.assertEqual(solver.analyze(board)[column], value)
+            self.assertEqual(row, board.freeRow(column))
+            checked += 1
+        stats = self.database.getStats()
+        self.assertEqual((stats['probes'], stats['hits'], stats['hitRate']), (30, 30, 1.0))
+
+    # A position that is not below the seed is not in the database
+    def test_missingPosition(self):
+        board = Solver.boardFromHistory(self.seed[:29] + [6])
+        self.assertTrue(self.database.covers(board))
+        self.assertIsNone(self.database.lookup(board))
+        self.assertFalse(self.database.covers(Solver.boardFromHistory(self.seed[:29])))
+        self.assertFalse(self.database.covers(Bitboard(7, 8)))
+        self.assertEqual(self.database.getStats()['hitRate'], 0.0)
+
+    # The search takes the values of the database, and finds the forced result at a low depth
+    def test_botProbes(self):
+        board = Solver.boardFromHistory(self.seed)
+        value = Solver().solve(board)
+        for algorithm in ('alphabeta', 'pvs'):
+            bot = Bot(1, TranspositionTable(1), MoveOrdering(), algorithm, endgame=self.database)
+            bot.newSearch()
+            move, score = bot.search(board, True, 5, bot.lossScore, bot.winScore)
+            self.assertEqual(move, self.database.lookup(board)[0])
+            self.assertEqual(score, bot.winScore if value > 0 else bot.lossScore if value < 0 else bot.drawScore)
+            self.assertEqual(bot.nodes, 1)
+        # one disc before the seed the search enters the database below the root
+        earlier = Solver.boardFromHistory(self.seed[:29])
+        bot = Bot(2, TranspositionTable(1), MoveOrdering(), endgame=self.database)
+        self.database.resetStats()
+        bot.search(earlier, True, 3, bot.lossScore, bot.winScore)
+        self.assertGreater(self.database.getStats()['hits'], 0)
+
+    # The interface opens the database for its bot
+    def test_interface(self):
+        interface = Interface(2, endgame=self.path)
+        for column in self.seed[:29]:
+            interface.makeMove(column)
+        self.assertIn(interface.generateBotMove()[1], range(7))
+        self.assertGreater(interface.bot.endgame.getStats()['probes'], 0)
+        interface.bot.endgame.close()
+
+    # The seeds of games on another board are taken with the empty slots of that board
+    def test_positionsAtOtherBoard(self):
+        histories = [[0, 1, 2, 3, 4, 0, 1, 2, 3, 4, 0, 1, 2], [2, 2, 2]]
+        seeds = positionsAt(histories, 10, 4, 5)
+        self.assertEqual(len(seeds), 1)
+        self.assertEqual((seeds[0].rows, seeds[0].columns, seeds[0].moveCount()), (4, 5, 10))
+        self.assertEqual(seeds[0].key(), Solver.boardFromHistory(histories[0][:10], 4, 5).key())
+
+    # A file that is not a database is rejected
+    def test_notADatabase(self):
+        path = os.path.join(self.directory.name, 'other.bin')
+        with open(path, 'wb') as file:
+            file.write(b'not an endgame database')
+        with self.assertRaises(ValueError):
+            EndgameDatabase(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
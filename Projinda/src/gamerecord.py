@@ -0,0 +1,151 @@
+import mmap
+import struct
+import sys
+
+"""
+A compact file format for many recorded games.
+
+Every game is stored as the columns that were played, as in Connect4.history,
+packed into 3 bits per move (4 bits on boards with more than 8 columns), so a
+full game on the 6x7 board takes 16 bytes.
+
+  header   magic b'C4GR', version, rows, columns and bits per move
+  records  for every game: number of moves (1 byte), winner (1 byte, 0 if
+           the game was a draw or did not end) and the packed moves,
+           the first move in the lowest bits
+
+The records have different lengths, so a second file next to the records,
+path + '.idx', holds the offset of every record as a little-endian 64-bit
+integer. readGames streams the games from the records without loading the
+file, GameRecords opens both files with mmap and reads any game by its number.
+
+Usage: python gamerecord.py file [game]
+
+"""
+
+MAGIC = b'C4GR'
+VERSION = 1
+HEADER = struct.Struct('<4sBBBB')
+OFFSET = struct.Struct('<Q')
+
+def moveBits(columns):
+  # bits needed for a column number
+  return 3 if columns <= 8 else 4
+
+def packMoves(moves, bits):
+  value = 0
+  for index, column in enumerate(moves):
+    value |= column << (index * bits)
+  return value.to_bytes((len(moves) * bits + 7) // 8, 'little')
+
+def unpackMoves(data, count, bits):
+  value = int.from_bytes(data, 'little')
+  mask = (1 << bits) - 1
+  return [(value >> (index * bits)) & mask for index in range(count)]
+
+class GameRecordWriter:
+
+  def __init__(self, path, rows=6, columns=7):
+    self.rows = rows
+    self.columns = columns
+    self.bits = moveBits(columns)
+    self.file = open(path, 'wb')
+    self.indexFile = open(path + '.idx', 'wb')
+    self.file.write(HEADER.pack(MAGIC, VERSION, rows, columns, self.bits))
+    self.offset = HEADER.size
+    self.games = 0
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exception):
+    self.close()
+
+  def write(self, history, winner=-1):
+    """
+    :param history: the columns played, in order
+    :param winner: 1 or 2, -1 or 0 if there is none, as Connect4.winner
+    """
+    if len(history) > self.rows * self.columns:
+      raise ValueError('a game has at most {0} moves'.format(self.rows * self.columns))
+    record = bytes((len(history), max(winner, 0))) + packMoves(history, self.bits)
+    self.file.write(record)
+    self.indexFile.write(OFFSET.pack(self.offset))
+    self.offset += len(record)
+    self.games += 1
+
+  def writeGame(self, game):
+    # record a Connect4 game
+    self.write(game.history, game.winner)
+
+  def close(self):
+    self.file.close()
+    self.indexFile.close()
+
+def readHeader(data, path):
+  magic, version, rows, columns, bits = HEADER.unpack_from(data, 0)
+  if magic != MAGIC or version != VERSION:
+    raise ValueError('{0} is not a game record file'.format(path))
+  return (rows, columns, bits)
+
+def readGames(path):
+  """
+  Stream the games of a record file, the file is read in blocks as the games are used.
+  :return: a generator of (history, winner), winner is 0 if the game has no winner
+  """
+  with open(path, 'rb') as file:
+    rows, columns, bits = readHeader(file.read(HEADER.size), path)
+    while True:
+      head = file.read(2)
+      if len(head) < 2:
+        return
+      count, winner = head
+      yield (unpackMoves(file.read((count * bits + 7) // 8), count, bits), winner)
+
+class GameRecords:
+
+  # random access to the games of a record file
+  def __init__(self, path):
+    self.file = open(path, 'rb')
+    self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+    self.rows, self.columns, self.bits = readHeader(self.data, path)
+    self.indexFile = open(path + '.idx', 'rb')
+    self.index = mmap.mmap(self.indexFile.fileno(), 0, access=mmap.ACCESS_READ) if self.indexSize() > 0 else b''
+
+  def indexSize(self):
+    self.indexFile.seek(0, 2)
+    return self.indexFile.tell()
+
+  def __len__(self):
+    return len(self.index) // OFFSET.size
+
+  def __getitem__(self, game):
+    # (history, winner) of a game by its number
+    if not 0 <= game < len(self):
+      raise IndexError('game {0} is not in the file'.format(game))
+    offset = OFFSET.unpack_from(self.index, game * OFFSET.size)[0]
+    count, winner = self.data[offset], self.data[offset + 1]
+    start = offset + 2
+    return (unpackMoves(self.data[start:start + (count * self.bits + 7) // 8], count, self.bits), winner)
+
+  def close(self):
+    if len(self.index) > 0:
+      self.index.close()
+    self.indexFile.close()
+    self.data.close()
+    self.file.close()
+
+if __name__ == '__main__':
+  if len(sys.argv) > 2:
+    records = GameRecords(sys.argv[1])
+    history, winner = records[int(sys.argv[2])]
+    print('game {0} of {1}: {2}, winner {3}'.format(sys.argv[2], len(records), history, winner or 'none'))
+    records.close()
+  else:
+    games, moves, wins = 0, 0, [0, 0, 0]
+    for history, winner in readGames(sys.argv[1]):
+      games += 1
+      moves += len(history)
+      wins[winner] += 1
+    print('{0} games, {1} moves, {2} won by player 1, {3} by player 2, {4} without a winner'.format(
+      games, moves, wins[1], wins[2], wins[0]))
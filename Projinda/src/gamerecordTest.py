@@ -0,0 +1,110 @@
+import os
+import random
+import tempfile
+import unittest
+
+from connect4 import Connect4
+from gamerecord import GameRecords, GameRecordWriter, packMoves, readGames, unpackMoves
+
+
+class GameRecordTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'games.c4r')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    # Plays random moves until the game ends and returns the game
+    def randomGame(self):
+        game = Connect4()
+        while game.isPlaying():
+            game.move(random.choice([column for column in range(7) if game.isMoveLegal(column)]))
+            game.switchPlayer()
+        return game
+
+    # Moves are packed into 3 bits, or 4 bits on wide boards
+    def test_packMoves(self):
+        moves = [3, 3, 2, 6, 0, 1, 5]
+        self.assertEqual(len(packMoves(moves * 6, 3)), 16)
+        self.assertEqual(unpackMoves(packMoves(moves, 3), 7, 3), moves)
+        self.assertEqual(unpackMoves(packMoves([9, 8, 0], 4), 3, 4), [9, 8, 0])
+
+    # Games read back by streaming and by number are the games written
+    def test_writeAndRead(self):
+        random.seed(5)
+        games = [self.randomGame() for _ in range(50)]
+        with GameRecordWriter(self.path) as writer:
+            for game in games:
+                writer.writeGame(game)
+            writer.write([])
+        expected = [(game.history, max(game.winner, 0)) for game in games] + [([], 0)]
+
+        self.assertEqual(list(readGames(self.path)), expected)
+        records = GameRecords(self.path)
+        self.assertEqual(len(records), 51)
+        self.assertEqual(records[17], expected[17])
+        self.assertEqual(records[50], ([], 0))
+        with self.assertRaises(IndexError):
+            records[51]
+        records.close()
+
+    # Seeking a replay gives the same board as stepping through it
+    def test_seekReplay(self):
+        random.seed(6)
+        game = self.randomGame()
+        history = list(game.history)
+        stepped = Connect4()
+        stepped.loadReplay(history)
+        seeking = Connect4()
+        seeking.loadReplay(history)
+        for ply in range(len(history) + 1):
+            seeking.seekReplay(ply)
+            self.assertTrue((seeking.getState() == stepped.getState()).all())
+            self.assertEqual(seeking.replayStep, ply)
+            if ply < len(history):
+                stepped.makeReplayStep()
+                stepped.switchPlayer()
+        self.assertEqual(seeking.winner, game.winner)
+        self.assertEqual(seeking.history, history)
+        # the replay goes on from the move after the one it was seeked to
+        seeking.seekReplay(3)
+        self.assertTrue(seeking.isReplaying())
+        row = seeking.findLastFreeRow(0, history[3])
+        self.assertEqual(seeking.makeReplayStep(), (row, history[3]))
+        self.assertEqual(seeking.getState()[row, history[3]], 2)
+
+    # Seeking to the end of a game that ends on a snapshot ends the replay, as stepping does
+    def test_seekReplayEndOnSnapshot(self):
+        # player 2 wins in column 6 with the 16th move
+        history = [4, 3, 0, 2, 4, 6, 3, 2, 0, 1, 1, 6, 2, 6, 4, 6]
+        self.assertEqual(len(history) % Connect4.SNAPSHOT_INTERVAL, 0)
+        stepped = Connect4()
+        stepped.loadReplay(history)
+        while stepped.isReplaying():
+            stepped.makeReplayStep()
+            stepped.switchPlayer()
+        self.assertEqual(stepped.replayStep, len(history))
+        self.assertEqual(stepped.winner, 2)
+        seeking = Connect4()
+        seeking.loadReplay(history)
+        seeking.seekReplay(len(history))
+        self.assertTrue((seeking.getState() == stepped.getState()).all())
+        self.assertFalse(seeking.isReplaying())
+        self.assertEqual((seeking.mode, seeking.winner), (1, 2))
+
+    # Seeking before the start or past the end of the history is an error
+    def test_seekReplayOutOfRange(self):
+        history = [3, 3, 2, 4]
+        game = Connect4()
+        game.loadReplay(history)
+        for ply in (-1, len(history) + 1):
+            with self.assertRaises(ValueError):
+                game.seekReplay(ply)
+        game.seekReplay(len(history))
+        self.assertEqual(game.replayStep, len(history))
+
+
+if __name__ == '__main__':
+    unittest.main()
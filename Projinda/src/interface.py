@@ -1,39 +1,240 @@
 from connect4 import Connect4
-from bot import Bot
+from bot import Bot, SearchTimeout
+from transposition import TranspositionTable
+from moveordering import MoveOrdering
+from openingbook import OpeningBook
+from endgame import EndgameDatabase
+from solver import Solver, SolverBudgetExceeded
+from mcts import MonteCarloBot, DEFAULT_BUDGET_MS
+import json
+import math
 import random
+import threading
+
+# the expert bot tries to solve the game exactly once this many discs have been played, before that it searches
+EXPERT_SOLVE_MOVES = 12
+# the scores the stats log writes for a win and a loss, JSON has no infinity
+LOGGED_WIN_SCORE = 10 ** 9
+LOGGED_LOSS_SCORE = -LOGGED_WIN_SCORE
+
+def finiteScores(value):
+	# value with the infinite scores of wins and losses in it replaced by LOGGED_WIN_SCORE and LOGGED_LOSS_SCORE
+	if isinstance(value, float) and math.isinf(value):
+		return LOGGED_WIN_SCORE if value > 0 else LOGGED_LOSS_SCORE
+	if isinstance(value, dict):
+		return {key: finiteScores(item) for key, item in value.items()}
+	if isinstance(value, (list, tuple)):
+		return [finiteScores(item) for item in value]
+	return value
+
+# the most positions the expert bot's solver visits for a move, about 5 seconds at 60k positions a second,
+# when they are not enough the bot searches the move as the normal bot does
+EXPERT_SOLVE_NODES = 300000
 
 class Interface:
-	def __init__(self, nPlayers):
-		self.bot = Bot(2)
-		self.game = Connect4()
+	# a server keeps an interface per game, slots keep them small
+	__slots__ = ('bot', 'game', 'nPlayers', 'statusText', 'searchDepth', 'timeBudgetMs', 'lastSearchDepth', 'openingBook', 'solver', 'statsLog', 'mcts', 'ponder', 'ponderThread', 'ponderStop', 'ponderResults')
+
+	def __init__(self, nPlayers, transpositionTableMB=8, searchDepth=5, timeBudgetMs=None, algorithm='alphabeta', aspirationWindow=None, evaluation='weights', workers=1, openingBook=None, difficulty='normal', statsLog=None, bot=None, game=None, ponder=False, rows=6, columns=7, connect=4, endgame=None):
+		# the bot and its transposition table live as long as the interface,
+		# so the search reuses the work of the previous moves
+		# with more than one worker the root moves are searched in parallel processes
+		# a bot can also be shared by many interfaces, the bot settings are then ignored
+		# the path of an endgame database, the bot takes the exact values of the positions it has
+		# instead of searching them, see endgame.py
+		if bot is None:
+			endgameDatabase = EndgameDatabase(endgame) if endgame is not None else None
+			bot = Bot(2, TranspositionTable(transpositionTableMB), MoveOrdering(rows, columns), algorithm, aspirationWindow, evaluation=evaluation, workers=workers, collectStats=statsLog is not None, endgame=endgameDatabase)
+		self.bot = bot
+		# the game can be a CompactGame (see compactgame.py) instead of a Connect4
+		# rows, columns and connect set the size of the board and the number of discs in a row that wins
+		self.game = game if game is not None else Connect4(rows, columns, connect)
 		self.nPlayers = 2
 		self.statusText = "No player has made a move yet."
+		# the bot searches to a fixed depth, or as deep as it can in timeBudgetMs milliseconds if that is set
+		self.searchDepth = searchDepth
+		self.timeBudgetMs = timeBudgetMs
+		self.lastSearchDepth = 0  # depth of the bot's last completed search
+		# the path of an opening book, the bot plays the book move in positions the book has, see openingbook.py
+		self.openingBook = OpeningBook(openingBook) if openingBook is not None else None
+		# 'normal' always searches, 'expert' plays perfectly with the solver when there are few enough empty slots
+		# for it to solve the position within EXPERT_SOLVE_NODES
+		if difficulty == 'expert' and connect != 4:
+			raise ValueError('the solver only plays four in a row')
+		self.solver = Solver(rows, columns) if difficulty == 'expert' else None
+		# file the search statistics of every bot move are appended to, one JSON object per line
+		self.statsLog = statsLog
+		# algorithm 'mcts' plays with Monte Carlo tree search instead of the bot's search, for timeBudgetMs
+		# milliseconds (DEFAULT_BUDGET_MS without a budget), see mcts.py
+		self.mcts = MonteCarloBot() if algorithm == 'mcts' else None
+		# with ponder the bot searches the human's possible moves in a background thread while the
+		# human thinks, and plays the result of the move the human made without searching again
+		# the Event that stops the pondering and the results are only created when the bot ponders,
+		# so that a server session without pondering stays small
+		self.ponder = ponder
+		self.ponderThread = None
+		self.ponderStop = None
+		# move, score and depth of the bot's reply for every position the pondering searched, by
+		# Bitboard.canonicalKey, the move is for the position with the key, see getPonderedReply
+		self.ponderResults = {} if ponder else None
 	
 	def getGameState(self):
 		return self.game.getState()
 	
 	def generateBotMove(self):
 		# move, score = self.bot.minimax_slim(self.game.getState(), True, 6)
-		move, score = self.bot.minimax_alphabeta(self.game.getState(), True, 5, self.bot.lossScore, self.bot.winScore)
+		# the pondering is stopped before anything else, it uses the bot and the processor
+		self.stopPondering()
+		if self.openingBook is not None:
+			entry = self.openingBook.lookup(self.game.getBitboard())
+			if entry is not None:
+				self.lastSearchDepth = self.openingBook.depth
+				return entry[0]
+		if self.solver is not None and len(self.game.history) >= EXPERT_SOLVE_MOVES:
+			try:
+				move, score = self.solver.bestMove(self.game.getBitboard(), EXPERT_SOLVE_NODES)
+				self.lastSearchDepth = self.game.numberOfSlots - len(self.game.history)
+				return move
+			except SolverBudgetExceeded:
+				pass
+		pondered = self.getPonderedReply(self.game.getBitboard())
+		# whether the move played is a pondered reply, the bot's stats are then those of another position
+		playsPondered = False
+		if self.mcts is not None:
+			move, score = self.mcts.search(self.game.getBitboard(), self.timeBudgetMs if self.timeBudgetMs is not None else DEFAULT_BUDGET_MS)
+			self.lastSearchDepth = self.mcts.depthReached
+		elif pondered is not None and self.timeBudgetMs is None and pondered[2] >= self.searchDepth:
+			move, score, self.lastSearchDepth = pondered
+			playsPondered = True
+		elif self.timeBudgetMs is not None:
+			move, score, self.lastSearchDepth = self.bot.iterativeDeepening(self.game.getBitboard(), True, self.timeBudgetMs)
+			# the pondering can have searched deeper than the time budget allows
+			if pondered is not None and pondered[2] > self.lastSearchDepth:
+				move, score, self.lastSearchDepth = pondered
+				playsPondered = True
+		else:
+			self.bot.newSearch()
+			move, score = self.bot.search(self.game.getBitboard(), True, self.searchDepth, self.bot.lossScore, self.bot.winScore)
+			self.lastSearchDepth = self.searchDepth
+		if self.statsLog is not None:
+			self.logSearchStats(move, score, playsPondered)
 		return move
+
+	def getSearchStats(self):
+		# the SearchStats of the bot's last search, None if they are not collected
+		return self.bot.stats
+
+	def logSearchStats(self, move, score, pondered=False):
+		# a pondered reply was searched before the human moved, its entry has no search statistics
+		# a bot passed to the interface without collectStats has no statistics, nothing is logged then
+		if pondered:
+			entry = dict(ply=len(self.game.history), move=move, score=score, depth=self.lastSearchDepth, pondered=True)
+		elif self.mcts is not None:
+			entry = dict(self.mcts.getStats(), ply=len(self.game.history), move=move, score=score)
+		elif self.bot.stats is not None:
+			entry = dict(self.bot.stats.toDict(), ply=len(self.game.history), move=move, score=score)
+		else:
+			return
+		with open(self.statsLog, 'a') as file:
+			file.write(json.dumps(finiteScores(entry), allow_nan=False) + '\n')
 	
+	def getTranspositionStats(self):
+		return self.bot.transpositionTable.getStats()
+
 	def makeBotMove(self):
 		if self.game.isPlaying():
-			move = self.generateBotMove()
-			row, column = move
-			markerPosition = self.game.move(column)
-			self.setStatusText(self.game.getCurrentPlayer(), markerPosition)
-			self.game.switchPlayer()
+			self.playBotMove(self.generateBotMove())
 			return True
 
 		return False
+
+	def playBotMove(self, move):
+		# play a move from generateBotMove, which can have been searched on another thread
+		# returns the position where the disk landed (row, column)
+		row, column = move
+		markerPosition = self.game.move(column)
+		self.setStatusText(self.game.getCurrentPlayer(), markerPosition)
+		self.game.switchPlayer()
+		if self.ponder:
+			self.startPondering()
+		return markerPosition
 	
+	def startPondering(self):
+		# search the bot's reply to every move the human can make, in a background thread
+		self.stopPondering()
+		if not self.ponder:
+			return
+		self.ponderResults = {}
+		if not self.game.isPlaying() or self.mcts is not None or self.bot.workers > 1:
+			return
+		if self.solver is not None and len(self.game.history) + 1 >= EXPERT_SOLVE_MOVES:
+			return
+		if self.ponderStop is None:
+			self.ponderStop = threading.Event()
+		self.ponderStop.clear()
+		self.ponderThread = threading.Thread(target=self.ponderMoves, args=(self.game.getBitboard(), self.game.getCurrentPlayer()), daemon=True)
+		self.ponderThread.start()
+
+	def ponderMoves(self, board, human):
+		# search the replies to all human moves to searchDepth, then all of them one deeper, and so on
+		# the bot is only used by this thread until stopPondering has joined it
+		# a human move that gives the mirror image of another one's position is only searched once
+		replies = {}
+		for row, column in sorted(board.legalMoves(), key=lambda move: abs(move[1] - board.columns // 2)):
+			position = board.copy()
+			position.play(column, human)
+			if not position.isWin(human) and not position.isFull():
+				key, mirrored = position.canonicalKey()
+				if key not in replies:
+					replies[key] = (position, mirrored)
+		self.bot.stopEvent = self.ponderStop
+		self.bot.deadline = float('inf')
+		try:
+			for depth in range(self.searchDepth, board.rows * board.columns - board.moveCount()):
+				for key, (position, mirrored) in replies.items():
+					self.bot.newSearch()
+					move, score = self.bot.search(position, True, depth, self.bot.lossScore, self.bot.winScore)
+					if mirrored:
+						move = (move[0], position.mirrorColumn(move[1]))
+					self.ponderResults[key] = (move, score, depth)
+		except SearchTimeout:
+			pass
+		finally:
+			self.bot.deadline = None
+			self.bot.stopEvent = None
+			self.bot.ply = 0
+
+	def getPonderedReply(self, board):
+		# the pondered (move, score, depth) for a bitboard, None if the pondering did not search it
+		if not self.ponderResults:
+			return None
+		key, mirrored = board.canonicalKey()
+		pondered = self.ponderResults.get(key)
+		if pondered is None or not mirrored:
+			return pondered
+		(row, column), score, depth = pondered
+		return ((row, board.mirrorColumn(column)), score, depth)
+
+	def stopPondering(self):
+		# stop the pondering thread and wait for it, the results it has found stay in ponderResults
+		if self.ponderThread is not None:
+			self.ponderStop.set()
+			self.ponderThread.join()
+			self.ponderThread = None
+
+	def resetGame(self):
+		# the pondering is stopped before the game is reset under it
+		self.stopPondering()
+		self.ponderResults = {} if self.ponder else None
+		self.game.reset()
+
 	def makeMove(self, column):
 		if self.game.isPlaying():
 			if self.game.isMoveLegal(column):
 				markerPosition = self.game.move(column)
 				self.setStatusText(self.game.getCurrentPlayer(), markerPosition)
 				self.game.switchPlayer()
+				return markerPosition
 			else:
 				raise Exception('Move is illegal.')
 	
@@ -49,17 +250,18 @@ class Interface:
 			self.makeMove(userInput)
 		elif self.game.hasEnded():
 			if userInput == 1:
-				self.game.reset()
+				self.resetGame()
 				self.resetStatusText()
 				reset = True
 			elif userInput == 2:
+				self.stopPondering()
 				self.game.replayMode() # enter replay mode
 		else:
 			# step through replay (1) or reset the game (2)
 			if userInput == 1:
 				self.makeReplayMove()
 			elif userInput == 2:
-				self.game.reset()
+				self.resetGame()
 	
 		return reset
 
@@ -0,0 +1,69 @@
+from server import DEFAULT_PORT
+import asyncio
+import json
+import random
+import sys
+import time
+
+"""
+A load generator for server.py.
+
+Opens a number of connections at once, and every connection plays games of
+random moves against the server's bot. When all games are played it reports
+the moves per second over all connections and the latency of the moves, the
+time from sending a MOVE to getting its answer, which includes the time the
+bot's search waited for a free process.
+
+Usage: python loadclient.py [connections] [games] [port]
+
+"""
+
+async def command(reader, writer, line):
+  writer.write((line + '\n').encode())
+  await writer.drain()
+  answer = (await reader.readline()).decode().strip()
+  if not answer.startswith('OK'):
+    raise RuntimeError('{0} was answered with {1}'.format(line, answer))
+  return answer[3:]
+
+async def playGames(host, port, games, rng, latencies):
+  # play games of random moves on one connection
+  reader, writer = await asyncio.open_connection(host, port)
+  try:
+    for _ in range(games):
+      await command(reader, writer, 'NEW')
+      result = 'playing'
+      while result == 'playing':
+        state = await command(reader, writer, 'STATE')
+        # the top row is the first 7 digits, a column is open when its top slot is empty
+        column = rng.choice([column for column in range(7) if state[column] == '0'])
+        start = time.perf_counter()
+        botColumn, result = (await command(reader, writer, 'MOVE {0}'.format(column))).split()
+        latencies.append(time.perf_counter() - start)
+    return json.loads(await command(reader, writer, 'STATS'))
+  finally:
+    writer.write(b'QUIT\n')
+    await writer.drain()
+    writer.close()
+
+async def runLoad(connections, games, host='127.0.0.1', port=DEFAULT_PORT, seed=0):
+  """
+  :return: the number of moves, the seconds it took, the sorted latencies and the server's stats at the end
+  """
+  latencies = []
+  start = time.perf_counter()
+  stats = await asyncio.gather(*(playGames(host, port, games, random.Random(seed + index), latencies)
+    for index in range(connections)))
+  seconds = time.perf_counter() - start
+  return (len(latencies), seconds, sorted(latencies), stats[-1])
+
+if __name__ == '__main__':
+  connections = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+  games = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+  port = int(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_PORT
+  moves, seconds, latencies, stats = asyncio.run(runLoad(connections, games, port=port))
+  print('{0} connections played {1} games, {2} moves in {3:.2f} seconds, {4:.1f} moves/sec'.format(
+    connections, connections * games, moves, seconds, moves / seconds))
+  print('latency mean {0:.3f} s, median {1:.3f} s, p95 {2:.3f} s, max {3:.3f} s'.format(
+    sum(latencies) / moves, latencies[moves // 2], latencies[int(0.95 * (moves - 1))], latencies[-1]))
+  print('server: {0} bot moves, deepest queue {1}'.format(stats['botMoves'], stats['maxQueueDepth']))
@@ -0,0 +1,190 @@
+from bitboard import Bitboard
+import math
+import numpy as np
+import sys
+import time
+
+"""
+A Monte Carlo tree search (UCT) player, an alternative to the bot's minimax search.
+
+The search grows a tree from the position. Every iteration walks down the
+tree, at every node taking the child with the best upper confidence bound
+(UCB1) of its results, adds one untried move as a new node and plays random
+games from it to the end. Their results are added to the node and to every
+node above it. The move played is the child of the root that was visited the
+most. The search runs until its time budget is used, so it plays better the
+more time it gets instead of being limited by a depth.
+
+The random games (playouts) are played in batches: a batch of batchSize games
+from the new node is kept as NumPy arrays of the masks of both players (in the
+bit layout of bitboard.py) and the column heights, and all games of the batch
+make a random legal move at once, after which the wins are found with
+Bitboard.alignmentBatch. Games that have ended are dropped from the arrays.
+A node therefore gets batchSize results per iteration. The arrays hold 64-bit
+masks, so the search takes boards of at most 64 bits, such as 6x7 or 7x8.
+
+search returns a (row, column) move and a score, like Bot.search. The score
+is the expected result of the move for the player to move, from -1 (loss) to
+1 (win), with a draw as 0.
+
+Usage: python mcts.py [milliseconds] [batchSize] [columns played ...]
+
+"""
+
+# the time budget of a move when none is given
+DEFAULT_BUDGET_MS = 1000
+
+class Node:
+
+  __slots__ = ('column', 'player', 'parent', 'children', 'untried', 'visits', 'value', 'result')
+
+  def __init__(self, column, player, parent):
+    self.column = column  # the column played to reach the node, None at the root
+    self.player = player  # the player that played the column
+    self.parent = parent
+    self.children = []
+    self.untried = []  # legal columns without a child yet
+    self.visits = 0  # playouts through the node
+    self.value = 0.0  # their results for player, 1 for a win and 0.5 for a draw
+    self.result = None  # 0 for a draw or the winner if the game has ended at the node
+
+class MonteCarloBot:
+
+  def __init__(self, batchSize=64, exploration=math.sqrt(2), seed=None):
+    """
+    :param batchSize: number of random games played from every new node
+    :param exploration: weight of the exploration term of UCB1
+    :param seed: seed of the random moves, None for a random seed
+    """
+    self.batchSize = batchSize
+    self.exploration = exploration
+    self.rng = np.random.default_rng(seed)
+    self.resetStats()
+
+  def resetStats(self):
+    self.playouts = 0
+    self.iterations = 0
+    self.seconds = 0.0
+    self.depthReached = 0  # depth of the deepest node of the last search
+
+  def getStats(self):
+    return {
+      'playouts': self.playouts,
+      'iterations': self.iterations,
+      'seconds': self.seconds,
+      'playoutsPerSecond': self.playouts / self.seconds if self.seconds > 0 else 0.0,
+      'depth': self.depthReached,
+    }
+
+  def playout(self, board, player, count):
+    """
+    Play count random games from a position in lockstep.
+    :param player: the player to move
+    :return: the number of games that were drawn, won by player 1 and won by player 2
+    """
+    rows, columns, height = board.rows, board.columns, board.height
+    masks = [None, np.full(count, board.masks[1], dtype=np.uint64), np.full(count, board.masks[2], dtype=np.uint64)]
+    heights = np.tile(np.array(board.heights), (count, 1))
+    results = [0, 0, 0]
+    for _ in range(rows * columns - board.moveCount()):
+      # the legal columns get 1 added to their random number, so the largest is always a legal column
+      chosen = np.argmax(self.rng.random((count, columns)) + (heights < rows), axis=1)
+      games = np.arange(count)
+      masks[player] |= np.uint64(1) << (chosen * height + heights[games, chosen]).astype(np.uint64)
+      heights[games, chosen] += 1
+      won = Bitboard.alignmentBatch(masks[player], height, board.connect)
+      wins = int(np.count_nonzero(won))
+      if wins > 0:
+        results[player] += wins
+        playing = ~won
+        masks[1], masks[2], heights = masks[1][playing], masks[2][playing], heights[playing]
+        count -= wins
+        if count == 0:
+          break
+      player ^= 3
+    # the games that are left filled the board without a winner
+    results[0] = count
+    return results
+
+  def select(self, node):
+    # the child with the highest upper confidence bound
+    exploration = self.exploration * math.sqrt(math.log(node.visits))
+    return max(node.children, key=lambda child: child.value / child.visits + exploration / math.sqrt(child.visits))
+
+  def expand(self, node, board):
+    # add a child for a random untried column and play it on the board
+    column = node.untried.pop(int(self.rng.integers(len(node.untried))))
+    child = Node(column, node.player ^ 3, node)
+    board.play(column, child.player)
+    if board.isWin(child.player):
+      child.result = child.player
+    elif board.isFull():
+      child.result = 0
+    else:
+      child.untried = [column for column in range(board.columns) if board.heights[column] < board.rows]
+    node.children.append(child)
+    return child
+
+  def search(self, board, timeBudgetMs=DEFAULT_BUDGET_MS, maxIterations=None):
+    """
+    Search the position for the player to move until the time budget is used.
+    :param board: a Bitboard, it is not changed
+    :param maxIterations: stop after this many iterations even if there is time left
+    :return: move (row, column) and its expected result for the player to move, from -1 to 1
+    """
+    if board.columns * board.height > 64:
+      raise ValueError('the playouts keep the board in 64 bits, a {0}x{1} board does not fit'.format(board.rows, board.columns))
+    start = time.perf_counter()
+    deadline = start + timeBudgetMs / 1000
+    # the tree is walked on a copy without evaluation weights, which plays and undoes faster
+    position = Bitboard(board.rows, board.columns, connect=board.connect)
+    position.masks = board.masks[:]
+    position.heights = board.heights[:]
+    root = Node(None, (position.moveCount() % 2 + 1) ^ 3, None)
+    root.untried = [column for column in range(position.columns) if position.heights[column] < position.rows]
+    self.resetStats()
+
+    while self.iterations == 0 or (time.perf_counter() < deadline
+        and (maxIterations is None or self.iterations < maxIterations)):
+      node, depth = root, 0
+      while len(node.untried) == 0 and node.result is None:
+        node = self.select(node)
+        position.play(node.column, node.player)
+        depth += 1
+      if node.result is None:
+        node = self.expand(node, position)
+        depth += 1
+      if node.result is None:
+        results = self.playout(position, node.player ^ 3, self.batchSize)
+        self.playouts += self.batchSize
+      else:
+        # an ended game has the same result however often it is played
+        results = [0, 0, 0]
+        results[node.result] = self.batchSize
+      self.iterations += 1
+      self.depthReached = max(self.depthReached, depth)
+
+      while node is not root:
+        node.visits += self.batchSize
+        node.value += results[node.player] + 0.5 * results[0]
+        position.undo()
+        node = node.parent
+      root.visits += self.batchSize
+
+    self.seconds = time.perf_counter() - start
+    best = max(root.children, key=lambda child: child.visits)
+    row = position.rows - 1 - position.heights[best.column]
+    return ((row, best.column), 2 * best.value / best.visits - 1)
+
+if __name__ == '__main__':
+  budget = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_BUDGET_MS
+  batchSize = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+  board = Bitboard()
+  for ply, column in enumerate(sys.argv[3:]):
+    board.play(int(column), ply % 2 + 1)
+  bot = MonteCarloBot(batchSize)
+  move, score = bot.search(board, budget)
+  stats = bot.getStats()
+  print('column {0}, score {1:.3f}'.format(move[1], score))
+  print('{0} playouts in {1} iterations, {2:.3f} s, {3:.0f} playouts/sec, tree depth {4}'.format(
+    stats['playouts'], stats['iterations'], stats['seconds'], stats['playoutsPerSecond'], stats['depth']))
@@ -0,0 +1,61 @@
+import unittest
+
+from bitboard import Bitboard
+from interface import Interface
+from mcts import MonteCarloBot
+
+
+class MonteCarloBotTest(unittest.TestCase):
+
+    def boardFromMoves(self, moves):
+        board = Bitboard()
+        for ply, column in enumerate(moves):
+            board.play(column, ply % 2 + 1)
+        return board
+
+    # Every playout of a batch ends in a win or a draw
+    def test_playoutResults(self):
+        bot = MonteCarloBot(seed=1)
+        results = bot.playout(Bitboard(), 1, 500)
+        self.assertEqual(sum(results), 500)
+        self.assertGreater(results[1], 0)
+        self.assertGreater(results[2], 0)
+        # player 1 wins with any of the playouts where it plays column 3 first
+        results = bot.playout(self.boardFromMoves([3, 4, 3, 4, 3, 4]), 1, 700)
+        self.assertGreater(results[1], 100)
+
+    # One move left: the playouts fill the board and find the winner or the draw
+    def test_playoutOfFullBoard(self):
+        moves = [0, 1, 0, 1, 0, 1, 1, 0, 1, 0, 1, 0, 2, 3, 2, 3, 2, 3, 3, 2, 3, 2, 3, 2,
+            4, 5, 4, 5, 4, 5, 5, 4, 5, 4, 5, 4, 6, 6, 6, 6, 6]
+        board = self.boardFromMoves(moves)
+        self.assertFalse(board.isWin(1) or board.isWin(2))
+        results = MonteCarloBot(seed=1).playout(board, 2, 10)
+        expected = [0, 0, 0]
+        board.play(6, 2)
+        expected[2 if board.isWin(2) else 0] = 10
+        self.assertEqual(results, expected)
+
+    # The search takes an immediate win and blocks the opponent's
+    def test_tactics(self):
+        bot = MonteCarloBot(seed=2)
+        board = self.boardFromMoves([3, 4, 3, 4, 3, 4])
+        key = board.key()
+        move, score = bot.search(board, 200)
+        self.assertEqual(move, (2, 3))
+        self.assertGreater(score, 0.9)
+        self.assertEqual(board.key(), key)
+        move, score = bot.search(self.boardFromMoves([3, 4, 3, 4, 0, 4]), 300)
+        self.assertEqual(move, (2, 4))
+        self.assertGreater(bot.getStats()['playouts'], 0)
+
+    # An Interface with algorithm mcts plays the search's moves
+    def test_interface(self):
+        interface = Interface(2, transpositionTableMB=0, timeBudgetMs=200, algorithm='mcts')
+        for column in [0, 0, 1, 1, 2]:
+            interface.makeMove(column)
+        self.assertEqual(interface.generateBotMove(), (5, 3))
+        self.assertGreater(interface.lastSearchDepth, 0)
+
+if __name__ == '__main__':
+    unittest.main()
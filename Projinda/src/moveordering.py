@@ -0,0 +1,85 @@
+"""
+Move ordering for the bot's alpha-beta search.
+
+Alpha-beta prunes the most when the best move is searched first. The moves
+of a position are sorted by:
+  1. the hash move, the best move stored in the transposition table
+  2. killer moves, moves that caused a cutoff at the same ply in a sibling position
+  3. the history heuristic, how often and how deep a move has caused cutoffs
+  4. the distance of the column from the center, the center columns take part in more lines of four
+
+Every heuristic can be switched off, MoveOrdering(killers=False) for example.
+
+"""
+
+# Number of killer moves remembered per ply
+KILLER_SLOTS = 2
+
+class MoveOrdering:
+
+	def __init__(self, rows=6, columns=7, centerFirst=True, hashMove=True, killers=True, history=True):
+		self.rows = rows
+		self.columns = columns
+		self.hashMove = hashMove
+		self.killers = killers
+		self.history = history
+
+		center = (columns - 1) / 2
+		if centerFirst:
+			# rank of each column, 3 2 4 1 5 0 6 for 7 columns
+			self.columnRank = [abs(column - center) for column in range(columns)]
+		else:
+			self.columnRank = list(range(columns))
+
+		self.clear()
+
+	def clear(self):
+		# forget everything learnt in earlier searches
+		self.killerMoves = []
+		self.historyScores = [[0] * self.columns for _ in range(self.rows)]
+
+	def newSearch(self):
+		# the killers belong to the previous position, the history is kept but aged
+		self.killerMoves = []
+		for row in self.historyScores:
+			for column in range(self.columns):
+				row[column] >>= 1
+
+	def order(self, moves, ply, hashColumn=-1):
+		"""
+		:param moves: the legal moves as (row, column)
+		:param ply: the distance from the root of the search
+		:param hashColumn: the best column from the transposition table, -1 if there is none
+		:return: the moves sorted from most to least promising
+		"""
+		if not self.hashMove:
+			hashColumn = -1
+		killers = self.killerMoves[ply] if self.killers and ply < len(self.killerMoves) else ()
+		historyScores = self.historyScores
+		columnRank = self.columnRank
+
+		def priority(move):
+			row, column = move
+			if column == hashColumn:
+				group = 0
+			elif move in killers:
+				group = 1
+			else:
+				group = 2
+			return (group, -historyScores[row][column], columnRank[column])
+
+		return sorted(moves, key=priority)
+
+	def recordCutoff(self, move, ply, depth):
+		# a move caused a beta cutoff at this ply, with depth moves left to search
+		if self.killers:
+			while len(self.killerMoves) <= ply:
+				self.killerMoves.append([])
+			killers = self.killerMoves[ply]
+			if move not in killers:
+				killers.insert(0, move)
+				del killers[KILLER_SLOTS:]
+
+		if self.history:
+			row, column = move
+			self.historyScores[row][column] += depth * depth
@@ -0,0 +1,140 @@
+from bitboard import Bitboard
+from bot import Bot
+from moveordering import MoveOrdering
+from transposition import TranspositionTable
+import mmap
+import os
+import struct
+import sys
+import time
+
+"""
+An opening book, the best move of every position of the first few plies.
+
+The first moves of a game are the most expensive to search, the board is
+empty and every column is open, and they are the same in every game. The
+book is searched once, offline, and written to a file:
+
+  header   magic b'C4OB', rows, columns, plies and search depth
+  records  key (8 bytes), score (8 bytes) and column (1 byte) of every position,
+           sorted by key
+
+The key is Bitboard.canonicalKey(), so a position and its mirror image share
+one record, which keeps the column for the position with that key and is
+mirrored for the other one. The score is from the point of view of the
+player to move. The file is opened with mmap and looked up with a binary
+search over the fixed-size records, so opening the book does not read it and
+a lookup only touches a few pages.
+
+Usage: python openingbook.py [plies] [depth] [file]
+
+"""
+
+MAGIC = b'C4OB'
+HEADER = struct.Struct('<4sBBBB')
+RECORD = struct.Struct('<Qdb')
+
+# the book used by play.py and playgui.py if it has been generated
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'openingbook.bin')
+
+class OpeningBook:
+
+  def __init__(self, path):
+    self.file = open(path, 'rb')
+    self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, self.rows, self.columns, self.plies, self.depth = HEADER.unpack_from(self.data, 0)
+    if magic != MAGIC or (len(self.data) - HEADER.size) % RECORD.size != 0:
+      self.close()
+      raise ValueError('{0} is not an opening book'.format(path))
+    self.size = (len(self.data) - HEADER.size) // RECORD.size
+
+  def __len__(self):
+    return self.size
+
+  def close(self):
+    self.data.close()
+    self.file.close()
+
+  def record(self, index):
+    # (key, score, column) of the record at index
+    return RECORD.unpack_from(self.data, HEADER.size + index * RECORD.size)
+
+  def lookup(self, board):
+    """
+    :param board: a Bitboard
+    :return: (move, score) for the player to move, move is (row, column), or None if the position is not in the book
+    """
+    # the book is searched for four in a row
+    if board.rows != self.rows or board.columns != self.columns or board.connect != 4:
+      return None
+    key, mirrored = board.canonicalKey()
+    low, high = 0, self.size
+    while low < high:
+      middle = (low + high) // 2
+      middleKey, score, column = self.record(middle)
+      if middleKey < key:
+        low = middle + 1
+      elif middleKey > key:
+        high = middle
+      else:
+        if mirrored:
+          column = board.mirrorColumn(column)
+        return ((board.freeRow(column), column), score)
+    return None
+
+def bookPositions(plies, rows=6, columns=7):
+  # every position reachable in at most plies moves where the game is still going, by canonical key,
+  # a position and its mirror image are only kept once
+  positions = {}
+  frontier = [Bitboard(rows, columns)]
+  for ply in range(plies + 1):
+    nextFrontier = []
+    for board in frontier:
+      key, mirrored = board.canonicalKey()
+      if key in positions:
+        continue
+      positions[key] = board
+      if ply == plies:
+        continue
+      player = 1 if ply % 2 == 0 else 2
+      for row, column in board.legalMoves():
+        child = board.copy()
+        child.play(column, player)
+        if not child.isWin(player) and not child.isFull():
+          nextFrontier.append(child)
+    frontier = nextFrontier
+  return positions
+
+def generate(path, plies, depth, rows=6, columns=7):
+  """
+  Search every position of the first plies moves to depth and write the book.
+  :return: the number of positions written
+  """
+  if columns * (rows + 1) > 64:
+    raise ValueError('the book keeps keys in 64 bits')
+  # one bot for each player, the transposition tables are shared between the positions
+  bots = {player: Bot(player, TranspositionTable(), MoveOrdering(rows, columns), 'pvs') for player in (1, 2)}
+  records = []
+  for key, board in bookPositions(plies, rows, columns).items():
+    bot = bots[1 if board.moveCount() % 2 == 0 else 2]
+    bot.newSearch()
+    move, score = bot.search(board, True, depth, bot.lossScore, bot.winScore)
+    # the column is stored for the position with the key, which can be the mirror image of board
+    column = board.mirrorColumn(move[1]) if board.canonicalKey()[1] else move[1]
+    records.append((key, score, column))
+
+  records.sort()
+  with open(path, 'wb') as file:
+    file.write(HEADER.pack(MAGIC, rows, columns, plies, depth))
+    for record in records:
+      file.write(RECORD.pack(*record))
+  return len(records)
+
+if __name__ == '__main__':
+  plies = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+  depth = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+  path = sys.argv[3] if len(sys.argv) > 3 else DEFAULT_PATH
+  start = time.perf_counter()
+  count = generate(path, plies, depth)
+  print('{0} positions searched to depth {1} in {2:.1f} seconds, written to {3}'.format(
+    count, depth, time.perf_counter() - start, path))
@@ -0,0 +1,97 @@
+import os
+import tempfile
+import unittest
+
+from bitboard import Bitboard
+from bot import Bot
+from interface import Interface
+from openingbook import OpeningBook, bookPositions, generate
+
+
+class OpeningBookTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.directory.name, 'book.bin')
+        cls.count = generate(cls.path, 2, 3)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def setUp(self):
+        self.book = OpeningBook(self.path)
+
+    def tearDown(self):
+        self.book.close()
+
+    # Every position of the first two plies is in the book once, with its mirror image, sorted by key
+    def test_positions(self):
+        # 4 of the 7 first moves and 25 of the 49 two move positions are left after removing mirror images
+        self.assertEqual(self.count, 1 + 4 + 25)
+        self.assertEqual(len(self.book), self.count)
+        keys = [self.book.record(index)[0] for index in range(len(self.book))]
+        self.assertEqual(keys, sorted(bookPositions(2).keys()))
+        self.assertEqual((self.book.plies, self.book.depth), (2, 3))
+
+    # The book move is the move the search finds for the player to move
+    def test_lookup(self):
+        board = Bitboard()
+        board.play(3, 1)
+        bot = Bot(2)
+        move, score = bot.search(board, True, 3, bot.lossScore, bot.winScore)
+        self.assertEqual(self.book.lookup(board), (move, score))
+
+        board.play(3, 2)
+        board.play(3, 1)
+        self.assertIsNone(self.book.lookup(board))
+        self.assertIsNone(self.book.lookup(Bitboard(5, 7)))
+
+    # A position is found with the record of its mirror image, with the column mirrored
+    def test_mirroredLookup(self):
+        board, mirror = Bitboard(), Bitboard()
+        for ply, column in enumerate([0, 2]):
+            board.play(column, ply % 2 + 1)
+            mirror.play(6 - column, ply % 2 + 1)
+        self.assertEqual(board.canonicalKey()[0], mirror.canonicalKey()[0])
+        (row, column), score = self.book.lookup(board)
+        self.assertEqual(self.book.lookup(mirror), ((row, 6 - column), score))
+        bot = Bot(1)
+        self.assertEqual(bot.search(mirror, True, 3, bot.lossScore, bot.winScore)[1], score)
+
+    # The interface plays the book move without searching
+    def test_interfaceUsesBook(self):
+        interface = Interface(2, openingBook=self.path)
+        interface.makeMove(0)
+        expected = self.book.lookup(interface.game.getBitboard())[0]
+        self.assertEqual(interface.generateBotMove(), expected)
+        self.assertEqual(interface.bot.nodes, 0)
+        self.assertEqual(interface.lastSearchDepth, 3)
+        interface.openingBook.close()
+
+    # A book of another board size is searched on that board, a board whose keys do not fit 64 bits is rejected
+    def test_otherBoard(self):
+        path = os.path.join(self.directory.name, 'small.bin')
+        self.assertEqual(generate(path, 2, 3, 5, 6), len(bookPositions(2, 5, 6)))
+        book = OpeningBook(path)
+        self.assertEqual((book.rows, book.columns), (5, 6))
+        board = Bitboard(5, 6)
+        board.play(0, 1)
+        row, column = book.lookup(board)[0]
+        self.assertEqual(row, board.freeRow(column))
+        book.close()
+        with self.assertRaises(ValueError):
+            generate(path, 2, 3, 8, 9)
+
+    # A file that is not a book is rejected
+    def test_notABook(self):
+        path = os.path.join(self.directory.name, 'other.bin')
+        with open(path, 'wb') as file:
+            file.write(b'not a book at all')
+        with self.assertRaises(ValueError):
+            OpeningBook(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,7 @@
 from interface import Interface
+from openingbook import DEFAULT_PATH
+import endgame
+import os
 from connect4gui import Connect4GUI
 from tkinter import Tk
 import sys
@@ -9,8 +12,14 @@ if __name__ == '__main__':
   playingVersusBot = True
   if len(arguments) > 1 and arguments[1] == "nobot":
     playingVersusBot = False
+  # "expert" plays against a bot that plays perfectly once the board has filled up a bit
+  difficulty = 'expert' if len(arguments) > 1 and arguments[1] == "expert" else 'normal'
 
-  interface = Interface(2)
+  # use the opening book if it has been generated with python openingbook.py,
+  # the endgame database if it has been generated with python endgame.py
+  # and let the bot ponder its replies while the human thinks
+  interface = Interface(2, openingBook=DEFAULT_PATH if os.path.exists(DEFAULT_PATH) else None, difficulty=difficulty, ponder=playingVersusBot,
+    endgame=endgame.DEFAULT_PATH if os.path.exists(endgame.DEFAULT_PATH) else None)
 
   root = Tk()
   screen_width = root.winfo_screenwidth()
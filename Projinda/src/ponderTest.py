@@ -0,0 +1,95 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from interface import Interface
+
+
+class PonderTest(unittest.TestCase):
+
+    def waitForReplies(self, interface, depth, seconds=20):
+        # wait until the pondering has searched all human moves to depth, a move whose position is
+        # the mirror image of another move's once
+        board = interface.game.getBitboard()
+        keys = set()
+        for row, column in board.legalMoves():
+            board.play(column, interface.game.getCurrentPlayer())
+            keys.add(board.canonicalKey()[0])
+            board.undo()
+        end = time.perf_counter() + seconds
+        while time.perf_counter() < end:
+            results = list(interface.ponderResults.values())
+            if len(results) == len(keys) and all(result[2] >= depth for result in results):
+                return
+            time.sleep(0.01)
+        self.fail('the pondering did not search all replies in time')
+
+    # After the human's move the bot plays the pondered reply without searching
+    def test_ponderedReply(self):
+        interface = Interface(2, transpositionTableMB=1, searchDepth=4, ponder=True)
+        interface.makeMove(3)
+        interface.makeBotMove()
+        self.waitForReplies(interface, 4)
+        # both discs are in the middle column, so the 7 human moves are 4 positions
+        self.assertEqual(interface.game.history, [3, 3])
+        self.assertEqual(len(interface.ponderResults), 4)
+        # column 4 is looked up with the result for column 2, mirrored
+        board = interface.game.getBitboard()
+        board.play(2, 1)
+        mirrorMove = interface.getPonderedReply(board)[0]
+        interface.makeMove(4)
+        interface.stopPondering()
+        pondered = interface.getPonderedReply(interface.game.getBitboard())
+        self.assertEqual(pondered[0], (mirrorMove[0], 6 - mirrorMove[1]))
+        nodes = interface.bot.nodes
+        self.assertEqual(interface.generateBotMove(), pondered[0])
+        self.assertEqual(interface.bot.nodes, nodes)
+        self.assertGreaterEqual(interface.lastSearchDepth, 4)
+        interface.makeBotMove()
+        self.assertIsNotNone(interface.ponderThread)
+        interface.stopPondering()
+
+    # A pondered reply is logged without the statistics of the bot's last search, which was of another position
+    def test_ponderedStats(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'stats.jsonl')
+            interface = Interface(2, transpositionTableMB=1, searchDepth=3, ponder=True, statsLog=path)
+            interface.makeMove(3)
+            interface.makeBotMove()
+            self.waitForReplies(interface, 3)
+            interface.makeMove(0)
+            interface.makeBotMove()
+            interface.stopPondering()
+            with open(path) as file:
+                searched, pondered = [json.loads(line) for line in file]
+        self.assertIn('nodes', searched)
+        self.assertNotIn('pondered', searched)
+        self.assertNotIn('nodes', pondered)
+        self.assertEqual((pondered['ply'], pondered['pondered']), (3, True))
+        self.assertGreaterEqual(pondered['depth'], 3)
+
+    # A reset stops the pondering and leaves the bot ready for a normal search
+    def test_resetCancels(self):
+        interface = Interface(2, transpositionTableMB=1, searchDepth=3, ponder=True)
+        interface.makeMove(3)
+        interface.makeBotMove()
+        # deep enough that the pondering is still running when the game is reset
+        interface.searchDepth = 12
+        interface.startPondering()
+        thread = interface.ponderThread
+        self.assertTrue(thread.is_alive())
+        interface.resetGame()
+        self.assertFalse(thread.is_alive())
+        self.assertIsNone(interface.ponderThread)
+        self.assertEqual(interface.ponderResults, {})
+        self.assertIsNone(interface.bot.deadline)
+        self.assertIsNone(interface.bot.stopEvent)
+        self.assertEqual(interface.game.history, [])
+        interface.searchDepth = 3
+        interface.makeMove(3)
+        self.assertIn(interface.generateBotMove()[1], range(7))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import time
+
+"""
+Statistics about the bot's search, collected while it searches.
+
+A bot created with Bot(2, collectStats=True) fills its SearchStats while
+searching. It holds:
+  nodesPerPly       positions visited at every distance from the root
+  leafEvaluations   positions scored with the evaluation
+  cutoffs           beta cutoffs, and cutoffIndexes, how many of them were caused by the 1st, 2nd, ... move searched
+  transpositionHits transposition table probes that found the position, and transpositionProbes
+  iterations        depth, nodes, seconds, move and score of every completed search
+  pv                the principal variation of the last completed search, the moves both players are expected to play
+  seconds           time since the search of the move started
+
+The statistics are reset by Bot.newSearch, so they cover one move. Without
+collectStats the bot's stats is None and the search only checks that.
+
+"""
+
+class SearchStats:
+
+	def __init__(self):
+		self.reset()
+
+	def reset(self, transpositionTable=None):
+		self.nodesPerPly = []
+		self.leafEvaluations = 0
+		self.cutoffs = 0
+		self.cutoffIndexes = []
+		self.transpositionHits = 0
+		self.transpositionProbes = 0
+		self.iterations = []
+		self.pv = []
+		# pvTable[ply] is the best line found so far from the position at ply
+		self.pvTable = []
+		self.seconds = 0.0
+		self.start = time.perf_counter()
+		# the counters of the transposition table when the search started
+		self.transpositionTable = transpositionTable
+		self.startHits = transpositionTable.hits if transpositionTable is not None else 0
+		self.startMisses = transpositionTable.misses if transpositionTable is not None else 0
+
+	def grow(self, ply):
+		while ply >= len(self.nodesPerPly):
+			self.nodesPerPly.append(0)
+			self.pvTable.append([])
+
+	def enter(self, ply):
+		# a position at ply is searched
+		if ply >= len(self.nodesPerPly):
+			self.grow(ply)
+		self.nodesPerPly[ply] += 1
+		self.pvTable[ply] = []
+
+	def leaf(self, ply, count=1):
+		# count positions at ply that are only evaluated
+		if ply >= len(self.nodesPerPly):
+			self.grow(ply)
+		self.nodesPerPly[ply] += count
+		self.leafEvaluations += count
+
+	def best(self, ply, move, searched):
+		# a new best move at ply, searched is false if the move was not searched deeper
+		line = self.pvTable[ply + 1] if searched and ply + 1 < len(self.pvTable) else []
+		self.pvTable[ply] = [move] + line
+
+	def cutoff(self, index):
+		# a cutoff caused by the index-th move searched
+		self.cutoffs += 1
+		while index >= len(self.cutoffIndexes):
+			self.cutoffIndexes.append(0)
+		self.cutoffIndexes[index] += 1
+
+	def iteration(self, depth, nodes, seconds, move, score):
+		# a search to depth completed
+		self.iterations.append({'depth': depth, 'nodes': nodes, 'seconds': seconds, 'move': move, 'score': score})
+		self.pv = self.pvTable[0][:] if len(self.pvTable) > 0 else []
+		self.update()
+
+	def update(self):
+		self.seconds = time.perf_counter() - self.start
+		table = self.transpositionTable
+		if table is not None:
+			self.transpositionHits = table.hits - self.startHits
+			self.transpositionProbes = self.transpositionHits + table.misses - self.startMisses
+
+	def nodes(self):
+		return sum(self.nodesPerPly)
+
+	def firstMoveCutoffRate(self):
+		return self.cutoffIndexes[0] / self.cutoffs if self.cutoffs > 0 else 0.0
+
+	def toDict(self):
+		self.update()
+		return {
+			'nodes': self.nodes(),
+			'nodesPerPly': self.nodesPerPly[:],
+			'leafEvaluations': self.leafEvaluations,
+			'cutoffs': self.cutoffs,
+			'cutoffIndexes': self.cutoffIndexes[:],
+			'transpositionHits': self.transpositionHits,
+			'transpositionProbes': self.transpositionProbes,
+			'iterations': [dict(iteration) for iteration in self.iterations],
+			'pv': self.pv[:],
+			'seconds': self.seconds,
+		}
+
+	def __str__(self):
+		self.update()
+		depth = self.iterations[-1]['depth'] if len(self.iterations) > 0 else 0
+		return 'depth {0}, {1} nodes in {2:.3f} s, {3} leaves, {4} cutoffs ({5:.0%} first move), {6}/{7} table hits, pv {8}'.format(
+			depth, self.nodes(), self.seconds, self.leafEvaluations, self.cutoffs, self.firstMoveCutoffRate(),
+			self.transpositionHits, self.transpositionProbes, ' '.join(str(column) for row, column in self.pv))
@@ -0,0 +1,266 @@
+from connect4 import Connect4
+from compactgame import CompactGame
+from interface import Interface
+from bot import Bot
+from transposition import TranspositionTable
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import itertools
+import json
+import math
+import sys
+import time
+
+"""
+A game server for many games at once.
+
+Every TCP connection is a session with its own game, the client plays
+player 1 and the bot player 2. The protocol is one command per line, and
+the server answers every command with one line:
+
+  NEW             start a new game            OK <session>
+  MOVE <column>   play a column               OK <bot column or -> <playing|win1|win2|draw>
+  STATE           the board, top row first    OK <42 digits>
+  STATS           metrics of the server and   OK <JSON>
+                  of the session
+  QUIT            close the connection        OK bye
+
+A command that fails is answered with ERR and a message.
+
+The bot's moves are searched in a pool of processes, so the event loop keeps
+serving the other sessions while a search runs. Every process has its own
+Interface, and thus its own bot and transposition table, which it searches
+the position of the session's history with. The sessions only keep their
+games, as CompactGames, and share one bot that never searches, so a session
+takes well under a kilobyte (see `python benchmark.py sessions`). The
+latencies of the moves are kept as a count, a sum and a maximum per session
+and in one histogram for the whole server, so the memory of the metrics does
+not grow with the number of moves.
+
+Usage: python server.py [port] [workers] [depth]
+
+"""
+
+DEFAULT_PORT = 7744
+
+# the histogram of the latencies has buckets from LATENCY_LOWEST seconds up, each LATENCY_RATIO times
+# as wide as the one before, the last bucket takes everything above about 100 seconds
+LATENCY_LOWEST = 0.0001
+LATENCY_RATIO = 2 ** 0.25
+LATENCY_BUCKETS = 80
+
+# the Interface of a search process, see searchBotMove
+workerInterface = None
+
+def initBotWorker(settings):
+  global workerInterface
+  workerInterface = Interface(2, **settings)
+
+def searchBotMove(history):
+  # the column the bot plays after the moves in history, searched in a pool process
+  game = Connect4()
+  for column in history:
+    game.move(column)
+    game.switchPlayer()
+  workerInterface.game = game
+  row, column = workerInterface.generateBotMove()
+  return column
+
+class LatencyHistogram:
+  # the count, sum and maximum of latencies, with a histogram of fixed size for the percentiles
+
+  __slots__ = ('count', 'total', 'longest', 'buckets')
+
+  def __init__(self):
+    self.count = 0
+    self.total = 0.0
+    self.longest = 0.0
+    self.buckets = [0] * LATENCY_BUCKETS
+
+  def add(self, seconds):
+    self.count += 1
+    self.total += seconds
+    self.longest = max(self.longest, seconds)
+    bucket = 0
+    if seconds > LATENCY_LOWEST:
+      bucket = min(int(math.log(seconds / LATENCY_LOWEST, LATENCY_RATIO)) + 1, LATENCY_BUCKETS - 1)
+    self.buckets[bucket] += 1
+
+  def percentile(self, fraction):
+    # the upper edge of the bucket of the latency at fraction of the count, at most the longest latency
+    rank = int(fraction * (self.count - 1)) + 1
+    seen = 0
+    for bucket, count in enumerate(self.buckets):
+      seen += count
+      if seen >= rank:
+        return min(LATENCY_LOWEST * LATENCY_RATIO ** bucket, self.longest)
+    return self.longest
+
+  def summary(self):
+    if self.count == 0:
+      return {'moves': 0}
+    return {
+      'moves': self.count,
+      'mean': self.total / self.count,
+      'p95': self.percentile(0.95),
+      'max': self.longest,
+    }
+
+class Session:
+
+  __slots__ = ('sessionID', 'interface', 'moves', 'latencyTotal', 'latencyMax')
+
+  def __init__(self, sessionID, bot):
+    self.sessionID = sessionID
+    # the session only keeps the game, the bot searches in the pool processes
+    self.interface = Interface(2, bot=bot, game=CompactGame())
+    self.moves = 0
+    # seconds from a MOVE command to its answer, summed and the longest
+    self.latencyTotal = 0.0
+    self.latencyMax = 0.0
+
+  def result(self):
+    game = self.interface.game
+    if game.isPlaying():
+      return 'playing'
+    if game.hasWinner():
+      return 'win{0}'.format(game.winner)
+    return 'draw'
+
+  def addLatency(self, seconds):
+    self.moves += 1
+    self.latencyTotal += seconds
+    self.latencyMax = max(self.latencyMax, seconds)
+
+  def latencyStats(self):
+    if self.moves == 0:
+      return {'moves': 0}
+    return {'moves': self.moves, 'mean': self.latencyTotal / self.moves, 'max': self.latencyMax}
+
+class GameServer:
+
+  def __init__(self, workers=2, botSettings=None):
+    self.botSettings = botSettings if botSettings is not None else {'searchDepth': 5}
+    self.executor = ProcessPoolExecutor(workers, initializer=initBotWorker, initargs=(self.botSettings,))
+    self.workers = workers
+    self.sessions = {}
+    # the bot of every session's Interface, it is never asked for a move
+    self.sessionBot = Bot(2, TranspositionTable(0))
+    self.sessionIDs = itertools.count(1)
+    self.pending = 0  # bot moves waiting for or running in the pool
+    self.maxPending = 0
+    self.botMoves = 0
+    # the latencies of the moves of all sessions, also of those that have closed
+    self.latencies = LatencyHistogram()
+    self.started = time.perf_counter()
+    self.server = None
+
+  async def start(self, host='127.0.0.1', port=DEFAULT_PORT):
+    self.server = await asyncio.start_server(self.handleConnection, host, port)
+    return self.server.sockets[0].getsockname()[1]
+
+  async def close(self):
+    if self.server is not None:
+      self.server.close()
+      await self.server.wait_closed()
+    self.executor.shutdown()
+
+  async def botMove(self, session):
+    self.pending += 1
+    self.maxPending = max(self.maxPending, self.pending)
+    try:
+      loop = asyncio.get_running_loop()
+      return await loop.run_in_executor(self.executor, searchBotMove, list(session.interface.game.history))
+    finally:
+      self.pending -= 1
+      self.botMoves += 1
+
+  async def handleMove(self, session, argument):
+    start = time.perf_counter()
+    game = session.interface.game
+    if not game.isPlaying():
+      raise ValueError('the game has ended, send NEW to start a new one')
+    column = int(argument)
+    if not 0 <= column < game.columns:
+      raise ValueError('there is no column {0}'.format(column))
+    session.interface.makeMove(column)
+    botColumn = '-'
+    if game.isPlaying():
+      botColumn = await self.botMove(session)
+      session.interface.makeMove(botColumn)
+    latency = time.perf_counter() - start
+    session.addLatency(latency)
+    self.latencies.add(latency)
+    return '{0} {1}'.format(botColumn, session.result())
+
+  def stats(self, session=None):
+    # the metrics of the whole server, and of session if it is given
+    seconds = time.perf_counter() - self.started
+    stats = {
+      'sessions': len(self.sessions),
+      'workers': self.workers,
+      'queueDepth': self.pending,
+      'maxQueueDepth': self.maxPending,
+      'botMoves': self.botMoves,
+      'botMovesPerSec': self.botMoves / seconds if seconds > 0 else 0.0,
+      'latency': self.latencies.summary(),
+    }
+    if session is not None:
+      stats['session'] = dict(session.latencyStats(), id=session.sessionID)
+    return stats
+
+  async def handleCommand(self, session, line):
+    parts = line.split()
+    command = parts[0].upper() if len(parts) > 0 else ''
+    if command == 'NEW':
+      session.interface.game.reset()
+      session.interface.resetStatusText()
+      return str(session.sessionID)
+    if command == 'MOVE' and len(parts) == 2:
+      return await self.handleMove(session, parts[1])
+    if command == 'STATE':
+      return ''.join(str(int(slot)) for slot in session.interface.getGameState().flatten())
+    if command == 'STATS':
+      return json.dumps(self.stats(session))
+    raise ValueError('unknown command {0}'.format(line))
+
+  async def handleConnection(self, reader, writer):
+    session = Session(next(self.sessionIDs), self.sessionBot)
+    self.sessions[session.sessionID] = session
+    try:
+      while True:
+        line = await reader.readline()
+        if not line:
+          break
+        line = line.decode().strip()
+        if line.upper() == 'QUIT':
+          writer.write(b'OK bye\n')
+          await writer.drain()
+          break
+        try:
+          answer = 'OK ' + await self.handleCommand(session, line)
+        except Exception as e:
+          answer = 'ERR {0}'.format(e)
+        writer.write((answer + '\n').encode())
+        await writer.drain()
+    finally:
+      del self.sessions[session.sessionID]
+      writer.close()
+
+async def serve(port, workers, depth):
+  server = GameServer(workers, {'searchDepth': depth})
+  port = await server.start(port=port)
+  print('serving on port {0} with {1} search processes'.format(port, workers))
+  try:
+    await asyncio.Event().wait()
+  finally:
+    await server.close()
+
+if __name__ == '__main__':
+  port = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PORT
+  workers = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+  depth = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+  try:
+    asyncio.run(serve(port, workers, depth))
+  except KeyboardInterrupt:
+    pass
@@ -0,0 +1,76 @@
+import asyncio
+import json
+import random
+import unittest
+
+from loadclient import command, runLoad
+from server import GameServer, LatencyHistogram
+
+
+class ServerTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.server = GameServer(1, {'searchDepth': 2})
+        self.port = await self.server.start(port=0)
+
+    async def asyncTearDown(self):
+        await self.server.close()
+
+    # A session plays against the bot, which blocks three in a column
+    async def test_session(self):
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+        self.assertEqual(await command(reader, writer, 'NEW'), '1')
+        for column in (0, 0):
+            botColumn, result = (await command(reader, writer, 'MOVE {0}'.format(column))).split()
+            self.assertEqual(result, 'playing')
+        self.assertEqual(await command(reader, writer, 'MOVE 0'), '0 playing')
+        state = await command(reader, writer, 'STATE')
+        self.assertEqual(len(state), 42)
+        # the bot's disk on top of the three in column 0
+        self.assertEqual(state[14], '2')
+
+        writer.write(b'MOVE 9\n')
+        self.assertTrue((await reader.readline()).startswith(b'ERR'))
+        writer.write(b'JUMP\n')
+        self.assertTrue((await reader.readline()).startswith(b'ERR'))
+
+        stats = self.server.stats()
+        self.assertEqual(stats['sessions'], 1)
+        self.assertEqual(stats['botMoves'], 3)
+        self.assertEqual(stats['latency']['moves'], 3)
+        self.assertLessEqual(stats['latency']['p95'], stats['latency']['max'])
+        sessionStats = json.loads(await command(reader, writer, 'STATS'))['session']
+        self.assertEqual((sessionStats['id'], sessionStats['moves']), (1, 3))
+        self.assertEqual(stats['queueDepth'], 0)
+        writer.write(b'QUIT\n')
+        self.assertEqual(await reader.readline(), b'OK bye\n')
+        writer.close()
+
+    # Several connections play whole games at the same time
+    async def test_load(self):
+        moves, seconds, latencies, stats = await runLoad(4, 1, port=self.port)
+        self.assertEqual(len(latencies), moves)
+        self.assertLessEqual(stats['botMoves'], self.server.botMoves)
+        self.assertGreaterEqual(stats['maxQueueDepth'], 1)
+
+    # The histogram keeps a fixed number of counts and gives the 95th percentile within a bucket
+    def test_latencyHistogram(self):
+        rng = random.Random(2)
+        latencies = [rng.expovariate(20) for _ in range(5000)]
+        histogram = LatencyHistogram()
+        for latency in latencies:
+            histogram.add(latency)
+        latencies.sort()
+        summary = histogram.summary()
+        self.assertEqual(summary['moves'], 5000)
+        self.assertAlmostEqual(summary['mean'], sum(latencies) / 5000)
+        self.assertEqual(summary['max'], latencies[-1])
+        p95 = latencies[int(0.95 * 4999)]
+        self.assertGreaterEqual(summary['p95'], p95)
+        self.assertLess(summary['p95'], p95 * 2 ** 0.25)
+        self.assertEqual(len(histogram.buckets), 80)
+        self.assertEqual(LatencyHistogram().summary(), {'moves': 0})
+
+
+if __name__ == '__main__':
+    unittest.main()
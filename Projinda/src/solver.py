@@ -0,0 +1,285 @@
+from bitboard import Bitboard
+from transposition import TranspositionTable, LOWER, UPPER
+import sys
+import time
+
+"""
+A solver that finds the exact game-theoretic value of a position.
+
+The value of a position is given from the point of view of the player to move:
+  0                     the game is a draw with perfect play
+  positive              the player to move wins, the sooner the higher the score
+  negative              the player to move loses, the later the lower the score
+A win with the player's k-th disc scores (rows * columns) / 2 + 1 - k, so the
+fastest possible win on the 6x7 board, with the fourth disc, scores 18.
+
+The solver searches to the end of the game with negamax and alpha-beta
+pruning. The exact value is found with a sequence of null window searches,
+each of which only answers whether the value is above a guess, narrowing the
+range of possible values until one is left. The results of the null window
+searches are bounds, they are kept in a transposition table and shared
+between the searches. A position and its mirror image share their entry.
+
+The search works on the two masks of a Bitboard, the discs of the player to
+move and all discs, in the same bit layout as bitboard.py, and only searches
+moves that do not give the opponent an immediate win.
+
+Usage: python solver.py [column ...]
+
+"""
+
+class SolverBudgetExceeded(Exception):
+  # raised inside a solve when its node budget has run out
+  pass
+
+class Solver:
+
+  def __init__(self, rows=6, columns=7, transpositionTable=None, mirrorKeys=True):
+    self.rows = rows
+    self.columns = columns
+    self.height = rows + 1
+    self.cells = rows * columns
+    # bounds of the values of searched positions, kept between solves
+    self.transpositionTable = transpositionTable if transpositionTable is not None else TranspositionTable(16)
+    # a position and its mirror image have the same value, with mirrorKeys they share their entry
+    self.mirrorKeys = mirrorKeys
+    # whether the running search uses the mirror keys, masks decides it for every position solved
+    self.mirrorSearch = mirrorKeys
+    # the bottom bit of every column, and all the bits of the board
+    self.bottomMask = sum(1 << (column * self.height) for column in range(columns))
+    self.boardMask = self.bottomMask * ((1 << rows) - 1)
+    # the bits of every column, in the order the columns are searched, center first
+    order = sorted(range(columns), key=lambda column: abs(2 * column - (columns - 1)))
+    self.columnMasks = [((1 << rows) - 1) << (column * self.height) for column in order]
+    self.nodes = 0  # Number of positions visited, used to report the speed
+    self.seconds = 0.0  # Time spent solving
+    # the search gives up with SolverBudgetExceeded when nodes reaches it, see bestMove
+    self.nodeLimit = float('inf')
+
+  @staticmethod
+  def boardFromHistory(history, rows=6, columns=7):
+    # the bitboard after the columns in history were played, as in Connect4.history
+    board = Bitboard(rows, columns)
+    for ply, column in enumerate(history):
+      board.play(column, 1 if ply % 2 == 0 else 2)
+    return board
+
+  def masks(self, board):
+    # (discs of the player to move, all discs, number of discs) of a bitboard
+    # the search goes to the end of the game, so when the position can ever hold its own mirror
+    # image (see Bitboard.mirrorDistance) it uses the mirror keys
+    self.mirrorSearch = self.mirrorKeys and board.mirrorDistance() is not None
+    moves = board.moveCount()
+    player = 1 if moves % 2 == 0 else 2
+    return (board.masks[player], board.masks[1] | board.masks[2], moves)
+
+  def winningSpots(self, position, mask):
+    # the empty slots that would give the discs in position four in a row
+    spots = (position << 1) & (position << 2) & (position << 3)
+    for shift in (self.height, self.height - 1, self.height + 1):
+      pairs = (position << shift) & (position << 2 * shift)
+      spots |= pairs & (position << 3 * shift)
+      spots |= pairs & (position >> shift)
+      pairs = (position >> shift) & (position >> 2 * shift)
+      spots |= pairs & (position << shift)
+      spots |= pairs & (position >> 3 * shift)
+    return spots & (self.boardMask ^ mask)
+
+  def possible(self, mask):
+    # the slot every non full column would play next
+    return (mask + self.bottomMask) & self.boardMask
+
+  def canWinNext(self, position, mask):
+    return self.winningSpots(position, mask) & self.possible(mask) != 0
+
+  def nonLosingMoves(self, position, mask):
+    # the playable slots that do not let the opponent win with the next disc
+    possible = self.possible(mask)
+    opponentWins = self.winningSpots(position ^ mask, mask)
+    forced = possible & opponentWins
+    if forced:
+      if forced & (forced - 1):
+        # the opponent has two immediate wins, both cannot be blocked
+        return 0
+      possible = forced
+    # do not play below a slot where the opponent would win
+    return possible & ~(opponentWins >> 1)
+
+  def negamax(self, position, mask, moves, alpha, beta):
+    # the value of a position where the player to move cannot win with the next disc,
+    # or a bound of it when the value is outside [alpha, beta]
+    self.nodes += 1
+    if self.nodes >= self.nodeLimit:
+      raise SolverBudgetExceeded()
+    cells = self.cells
+    nextMoves = self.nonLosingMoves(position, mask)
+    if nextMoves == 0:
+      return -((cells - moves) // 2)
+    if moves >= cells - 2:
+      return 0
+
+    # the opponent cannot win with its next disc, so the earliest loss is one disc later
+    lowest = -((cells - 2 - moves) // 2)
+    if alpha < lowest:
+      alpha = lowest
+      if alpha >= beta:
+        return alpha
+    # the player to move cannot win with the next disc either
+    highest = (cells - 1 - moves) // 2
+    key = position + mask
+    if self.mirrorSearch:
+      # the key has the layout of Bitboard.key, so it is mirrored the same way
+      mirrored = Bitboard.mirrorKey(key, self.columns, self.height)
+      if mirrored < key:
+        key = mirrored
+    entry = self.transpositionTable.probe(key)
+    if entry is not None:
+      score, flag = int(entry[0]), entry[1]
+      if flag == LOWER:
+        if alpha < score:
+          alpha = score
+          if alpha >= beta:
+            return alpha
+      elif score < highest:
+        highest = score
+    if beta > highest:
+      beta = highest
+      if alpha >= beta:
+        return beta
+
+    # moves that create the most new threats first, center first among equals
+    candidates = []
+    for columnMask in self.columnMasks:
+      move = nextMoves & columnMask
+      if move:
+        threats = bin(self.winningSpots(position | move, mask)).count('1')
+        candidates.append((threats, len(candidates), move))
+    candidates.sort(key=lambda candidate: (-candidate[0], candidate[1]))
+
+    opponent = position ^ mask
+    for threats, index, move in candidates:
+      score = -self.negamax(opponent, mask | move, moves + 1, -beta, -alpha)
+      if score >= beta:
+        self.transpositionTable.store(key, score, LOWER, 0, -1)
+        return score
+      if score > alpha:
+        alpha = score
+    self.transpositionTable.store(key, alpha, UPPER, 0, -1)
+    return alpha
+
+  def solvePosition(self, position, mask, moves):
+    # the exact value, narrowing [lowest, highest] with null window searches
+    cells = self.cells
+    if self.canWinNext(position, mask):
+      return (cells + 1 - moves) // 2
+    lowest = -((cells - moves) // 2)
+    highest = (cells + 1 - moves) // 2
+    while lowest < highest:
+      guess = lowest + (highest - lowest) // 2
+      # look closer to 0 first, most positions are decided by a small margin
+      if guess <= 0 and int(lowest / 2) < guess:
+        guess = int(lowest / 2)
+      elif guess >= 0 and highest // 2 > guess:
+        guess = highest // 2
+      score = self.negamax(position, mask, moves, guess, guess + 1)
+      if score <= guess:
+        highest = score
+      else:
+        lowest = score
+    return lowest
+
+  def solve(self, board):
+    """
+    :param board: a Bitboard, the player to move is decided by the number of discs
+    :return: the exact value of the position for the player to move
+    """
+    start = time.perf_counter()
+    try:
+      return self.solvePosition(*self.masks(board))
+    finally:
+      self.seconds += time.perf_counter() - start
+
+  def analyze(self, board):
+    """
+    The value of every move, for grading moves.
+    :return: a list with the value of playing in each column for the player to move, None for full columns
+    """
+    start = time.perf_counter()
+    position, mask, moves = self.masks(board)
+    scores = []
+    for column in range(self.columns):
+      move = self.possible(mask) & (((1 << self.rows) - 1) << (column * self.height))
+      if move == 0:
+        scores.append(None)
+      elif self.winningSpots(position, mask) & move:
+        scores.append((self.cells + 1 - moves) // 2)
+      elif moves + 1 == self.cells:
+        scores.append(0)
+      else:
+        scores.append(-self.solvePosition(position ^ mask, mask | move, moves + 1))
+    self.seconds += time.perf_counter() - start
+    return scores
+
+  def bestMove(self, board, maxNodes=None):
+    """
+    :param maxNodes: the most positions to visit, SolverBudgetExceeded is raised when they are not enough
+    :return: the best move as (row, column) and its value, the first best column in center first order
+    """
+    start = time.perf_counter()
+    if maxNodes is not None:
+      self.nodeLimit = self.nodes + maxNodes
+    # the bounds stored before the budget runs out are proven, they stay in the table for the next solve
+    try:
+      position, mask, moves = self.masks(board)
+      score = self.solvePosition(position, mask, moves)
+      wins = self.winningSpots(position, mask) & self.possible(mask)
+      nonLosing = self.nonLosingMoves(position, mask)
+      # when every move loses at once, or the last disc is played, any move will do
+      decided = wins or not nonLosing or moves + 1 == self.cells
+      candidates = wins or nonLosing or self.possible(mask)
+      for columnMask in self.columnMasks:
+        move = candidates & columnMask
+        # a null window search around the value proves that the move keeps it
+        if move and (decided or self.negamax(position ^ mask, mask | move, moves + 1, -score, -score + 1) <= -score):
+          break
+    finally:
+      self.nodeLimit = float('inf')
+      self.seconds += time.perf_counter() - start
+    column = (move.bit_length() - 1) // self.height
+    return ((board.freeRow(column), column), score)
+
+  def outcome(self, score):
+    return 'win' if score > 0 else 'loss' if score < 0 else 'draw'
+
+  def movesToEnd(self, board, score):
+    # the number of discs played until the game ends, with perfect play from both players
+    moves = board.moveCount()
+    if score == 0:
+      return self.cells - moves
+    # the number of discs on the board before the winning disc is played
+    winnerMoves = moves if score > 0 else moves + 1
+    beforeWin = self.cells + 1 - 2 * abs(score)
+    if beforeWin % 2 != winnerMoves % 2:
+      beforeWin -= 1
+    return beforeWin + 1 - moves
+
+  def resetStats(self):
+    self.nodes = 0
+    self.seconds = 0.0
+
+  def getStats(self):
+    return {
+      'nodes': self.nodes,
+      'seconds': self.seconds,
+      'nodesPerSecond': self.nodes / self.seconds if self.seconds > 0 else 0.0,
+    }
+
+if __name__ == '__main__':
+  history = [int(column) for column in sys.argv[1:]]
+  board = Solver.boardFromHistory(history)
+  solver = Solver()
+  score = solver.solve(board)
+  stats = solver.getStats()
+  print('{0} for player {1} in {2} moves (score {3})'.format(
+    solver.outcome(score), 1 if len(history) % 2 == 0 else 2, solver.movesToEnd(board, score), score))
+  print('{0} nodes in {1:.2f} seconds, {2:.0f} nodes/sec'.format(stats['nodes'], stats['seconds'], stats['nodesPerSecond']))
@@ -0,0 +1,115 @@
+import random
+import unittest
+
+from bitboard import Bitboard
+import interface
+from interface import Interface
+from solver import Solver, SolverBudgetExceeded
+
+
+class SolverTest(unittest.TestCase):
+    # A position where player 1 wins in 7 moves, with the value of each column for player 1
+    late = [1, 4, 1, 6, 3, 1, 5, 2, 1, 2, 2, 2, 4, 6, 4, 6, 3, 0, 6, 0, 1, 4]
+    lateScores = [4, 4, 6, 2, 6, 1, 7]
+
+    # The value of a position by trying every move to the end of the game
+    def bruteForce(self, board, player):
+        cells = board.rows * board.columns
+        moves = board.moveCount()
+        best = None
+        for row, column in board.legalMoves():
+            board.play(column, player)
+            if board.isWin(player):
+                score = (cells + 1 - moves) // 2
+            elif moves + 1 == cells:
+                score = 0
+            else:
+                score = -self.bruteForce(board, player ^ 3)
+            board.undo()
+            best = score if best is None else max(best, score)
+        return best
+
+    # A win with the next disc gets the highest value
+    def test_winNext(self):
+        board = Solver.boardFromHistory([0, 1, 0, 1, 0, 1])
+        solver = Solver()
+        score = solver.solve(board)
+        self.assertEqual(score, 18)
+        self.assertEqual(solver.outcome(score), 'win')
+        self.assertEqual(solver.movesToEnd(board, score), 1)
+        self.assertEqual(solver.bestMove(board), ((2, 0), 18))
+
+    # The solver agrees with trying every move on a small board
+    def test_bruteForce(self):
+        random.seed(4)
+        for _ in range(10):
+            board = Bitboard(4, 5)
+            player = 1
+            while board.moveCount() < 11:
+                row, column = random.choice(board.legalMoves())
+                board.play(column, player)
+                if board.isWin(player):
+                    board = Bitboard(4, 5)
+                    player = 1
+                else:
+                    player ^= 3
+            solver = Solver(4, 5)
+            self.assertEqual(solver.solve(board), self.bruteForce(board, player))
+
+    # Sharing the entries of a position and its mirror image does not change the values, and
+    # from a symmetric position it saves searching the mirror images again
+    def test_mirrorKeys(self):
+        history = [1, 1, 5, 5, 0, 1, 6, 5, 2, 3, 4, 3, 2, 0, 4, 6]
+        board = Solver.boardFromHistory(history)
+        self.assertEqual(board.canonicalKey(), (board.key(), False))
+        plain, mirrored = Solver(mirrorKeys=False), Solver()
+        self.assertEqual(mirrored.analyze(board), plain.analyze(board))
+        self.assertLess(mirrored.nodes, plain.nodes)
+
+    # The value of every column, and the best of them
+    def test_analyze(self):
+        board = Solver.boardFromHistory(self.late)
+        solver = Solver()
+        self.assertEqual(solver.analyze(board), self.lateScores)
+        self.assertEqual(solver.solve(board), 7)
+        self.assertEqual(solver.bestMove(board), ((1, 6), 7))
+        self.assertEqual(solver.movesToEnd(board, 7), 7)
+        self.assertEqual(solver.outcome(-2), 'loss')
+        self.assertGreater(solver.getStats()['nodes'], 0)
+
+    # The expert bot plays a best move once enough discs are on the board
+    def test_expertInterface(self):
+        interface = Interface(2, difficulty='expert')
+        for column in self.late[:-1]:
+            interface.makeMove(column)
+        board = interface.game.getBitboard()
+        scores = Solver().analyze(board)
+        row, column = interface.generateBotMove()
+        self.assertEqual(scores[column], max(score for score in scores if score is not None))
+        self.assertEqual(interface.lastSearchDepth, 42 - 21)
+
+    # A solve that runs out of nodes gives up, and the solver still solves afterwards
+    def test_nodeBudget(self):
+        board = Solver.boardFromHistory(self.late[:-6])
+        solver = Solver()
+        with self.assertRaises(SolverBudgetExceeded):
+            solver.bestMove(board, 100)
+        self.assertEqual(solver.nodes, 100)
+        self.assertEqual(solver.bestMove(board), Solver().bestMove(board))
+
+    # The expert bot searches the moves its solver cannot solve within the budget
+    def test_expertFallback(self):
+        budget = interface.EXPERT_SOLVE_NODES
+        interface.EXPERT_SOLVE_NODES = 100
+        try:
+            player = Interface(2, difficulty='expert', searchDepth=3)
+            for column in self.late[:-6]:
+                player.makeMove(column)
+            self.assertIn(player.generateBotMove()[1], range(7))
+            self.assertEqual(player.lastSearchDepth, 3)
+        finally:
+            interface.EXPERT_SOLVE_NODES = budget
+
+
+if __name__ == '__main__':
+    unittest.main()
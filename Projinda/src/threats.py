@@ -0,0 +1,143 @@
+import numpy as np
+
+"""
+Threat based evaluation.
+
+A player can only win along one of the lines of four slots on the board,
+69 of them on the 6x7 board. A line that holds discs of both players can no
+longer be won by anyone. A line that holds discs of one player only is worth
+more the more discs it holds, and a line with three discs and one empty slot
+is a threat. On boards where connect discs in a row win, the lines are
+connect slots long and a threat is a line with one slot left.
+
+Where a threat is matters. When the board fills up, the first player (player 1)
+tends to get the odd rows (1, 3, 5 counted from the bottom) and the second
+player the even rows, so a threat on a row of the player's own parity is
+worth extra.
+
+The LineTable of a board size lists every line and, for every slot, the lines
+through it. A bitboard created with a LineTable keeps a count of each
+player's discs in every line and updates the counts, and the threat score,
+when a disc is added. The number of lines through a slot is also the
+evaluation weight of the slot, see Connect4.getEvaluationMatrix. A table is
+built once for every board size and connect, and shared.
+
+"""
+
+# Value of a line of four holding 1, 2 and 3 discs of one player and no discs of the opponent,
+# on longer lines the values are those of the lines missing as many discs
+LINE_VALUES = (0, 1, 4, 10)
+# Extra value of a threat on a row of the player's own parity
+PARITY_BONUS = 10
+
+# The counts of a line are stored in one integer, count of player 1 + COUNT_SHIFT * count of player 2,
+# so lines can be at most COUNT_SHIFT - 1 slots long
+COUNT_SHIFT = 8
+
+class LineTable:
+
+  # one table per board size and connect
+  tables = {}
+
+  def __init__(self, rows=6, columns=7, connect=4):
+    if not 2 <= connect < COUNT_SHIFT:
+      raise ValueError('lines of {0} slots are not supported'.format(connect))
+    self.rows = rows
+    self.columns = columns
+    self.connect = connect
+    self.height = rows + 1
+    # value of a line by the number of discs in it, see LINE_VALUES
+    self.lineValues = [0] + [LINE_VALUES[4 - connect + discs] if connect - discs < 4 else 0 for discs in range(1, connect)]
+    # the slots of every line as a bitboard mask
+    self.lineMasks = []
+    cellLines = [[] for _ in range(columns * self.height)]
+
+    # (column step, row step) of horizontal, vertical and the two diagonal lines, rows counted from the bottom
+    for columnStep, rowStep in ((1, 0), (0, 1), (1, 1), (1, -1)):
+      for column in range(columns):
+        for row in range(rows):
+          cells = [(column + i * columnStep, row + i * rowStep) for i in range(connect)]
+          if all(0 <= c < columns and 0 <= r < rows for c, r in cells):
+            line = len(self.lineMasks)
+            mask = 0
+            for c, r in cells:
+              index = c * self.height + r
+              mask |= 1 << index
+              cellLines[index].append(line)
+            self.lineMasks.append(mask)
+
+    # the lines through every bit of a bitboard
+    self.cellLines = [tuple(lines) for lines in cellLines]
+
+  @staticmethod
+  def get(rows, columns, connect=4):
+    # the shared table of a board size and connect
+    key = (rows, columns, connect)
+    if key not in LineTable.tables:
+      LineTable.tables[key] = LineTable(rows, columns, connect)
+    return LineTable.tables[key]
+
+  def numberOfLines(self):
+    return len(self.lineMasks)
+
+  def linesPerSlot(self):
+    # the number of lines through every slot, as a (rows, columns) matrix with row 0 at the top
+    return np.array([[len(self.cellLines[column * self.height + self.rows - 1 - row])
+      for column in range(self.columns)] for row in range(self.rows)])
+
+  def lineValue(self, line, counts, occupied):
+    # value of a line for player 1 (negative if it is good for player 2)
+    player1 = counts % COUNT_SHIFT
+    player2 = counts // COUNT_SHIFT
+    if player1 > 0 and player2 > 0:
+      return 0
+    discs = player1 or player2
+    if discs >= self.connect:
+      # a finished line, the search stops at wins before evaluating
+      return 0
+
+    value = self.lineValues[discs]
+    if discs == self.connect - 1:
+      empty = self.lineMasks[line] & ~occupied
+      row = (empty.bit_length() - 1) % self.height
+      # row 0 from the bottom is the first, odd, row
+      if (row % 2 == 0) == (player1 > 0):
+        value += PARITY_BONUS
+    return value if player1 > 0 else -value
+
+  def place(self, board, index, player):
+    # update the line counts and the threat score of a bitboard after a disc was added at bit index
+    occupied = board.masks[1] | board.masks[2]
+    before = occupied & ~(1 << index)
+    counts = board.lineCounts
+    added = 1 if player == 1 else COUNT_SHIFT
+    delta = 0
+    for line in self.cellLines[index]:
+      old = counts[line]
+      new = old + added
+      counts[line] = new
+      delta += self.lineValue(line, new, occupied) - self.lineValue(line, old, before)
+    board.threatScore += delta
+
+  def remove(self, board, index, player):
+    # update the line counts and the threat score of a bitboard after the disc at bit index was taken back
+    before = board.masks[1] | board.masks[2]
+    occupied = before | (1 << index)
+    counts = board.lineCounts
+    removed = 1 if player == 1 else COUNT_SHIFT
+    delta = 0
+    for line in self.cellLines[index]:
+      old = counts[line]
+      new = old - removed
+      counts[line] = new
+      delta += self.lineValue(line, new, before) - self.lineValue(line, old, occupied)
+    board.threatScore += delta
+
+  def evaluate(self, masks):
+    # the threat score for player 1 of a position, counted from scratch
+    occupied = masks[1] | masks[2]
+    score = 0
+    for line, lineMask in enumerate(self.lineMasks):
+      counts = bin(masks[1] & lineMask).count('1') + COUNT_SHIFT * bin(masks[2] & lineMask).count('1')
+      score += self.lineValue(line, counts, occupied)
+    return score
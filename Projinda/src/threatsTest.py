@@ -0,0 +1,63 @@
+import random
+import unittest
+
+import numpy as np
+
+from bitboard import Bitboard
+from bot import Bot
+from connect4 import Connect4
+from threats import LineTable, LINE_VALUES, PARITY_BONUS
+
+
+class ThreatsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.table = LineTable.get(6, 7)
+
+    # The 6x7 board has 69 lines, and the number of lines through each slot is the evaluation matrix
+    def test_lineTable(self):
+        self.assertEqual(self.table.numberOfLines(), 69)
+        board = Bitboard()
+        linesPerSlot = np.array([[len(self.table.cellLines[board.bit(row, column).bit_length() - 1])
+                                  for column in range(7)] for row in range(6)])
+        self.assertTrue(np.array_equal(linesPerSlot, Connect4.getEvaluationMatrix()))
+
+    # The threat score kept while adding discs is the same as counting it from scratch
+    def test_incrementalThreatScore(self):
+        random.seed(1)
+        for _ in range(20):
+            board = Connect4.staticToBitboard(np.zeros((6, 7)), threats=True)
+            player = 1
+            for _ in range(random.randrange(30)):
+                row, column = random.choice(board.legalMoves())
+                board = Connect4.staticStateAfterMove(board, (row, column), player)
+                player ^= 3
+            self.assertEqual(board.threatScore, self.table.evaluate(board.masks))
+            self.assertEqual(Connect4.staticThreatScore(board, 2), Connect4.staticThreatScore(board.toState(), 2))
+
+    # A threat is worth more on a row of the player's own parity
+    def test_threatParity(self):
+        height = self.table.height
+        for row in range(4):
+            # three discs in the columns 0-2 of a row (counted from the bottom), the empty slot is in column 3
+            discs = sum(1 << (column * height + row) for column in range(3))
+            line = self.table.lineMasks.index(discs | 1 << (3 * height + row))
+            player1 = self.table.lineValue(line, 3, discs)
+            player2 = self.table.lineValue(line, 3 * 8, discs)
+            oddRow = row % 2 == 0
+            self.assertEqual(player1, LINE_VALUES[3] + (PARITY_BONUS if oddRow else 0))
+            self.assertEqual(player2, -LINE_VALUES[3] - (0 if oddRow else PARITY_BONUS))
+
+    # The threat evaluation can be used by the search
+    def test_botWithThreats(self):
+        bot = Bot(2, evaluation='threats')
+        game = Connect4()
+        for column in [0, 6, 1, 6, 2]:
+            game.move(column)
+            game.switchPlayer()
+        move, score = bot.search(game.getBitboard(), True, 4, bot.lossScore, bot.winScore)
+        self.assertEqual(move, (5, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
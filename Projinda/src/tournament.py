@@ -0,0 +1,190 @@
+from connect4 import Connect4
+from bot import Bot
+from mcts import MonteCarloBot
+from moveordering import MoveOrdering
+from transposition import TranspositionTable
+from concurrent.futures import ProcessPoolExecutor
+import json
+import math
+import random
+import sys
+import time
+
+"""
+Headless games between two bot variants.
+
+A variant is a set of bot settings, written as key=value pairs separated by
+commas, for example "depth=5,algorithm=pvs,evaluation=threats". The keys are
+those of VARIANT_DEFAULTS.
+
+Every game starts from a random opening of a few moves. Each opening is
+played twice, once with each variant moving first, so that an opening which
+favours one side does not favour one variant. The games are spread over a
+pool of processes and every result is written to a file, one JSON object per
+line, as soon as it is known.
+
+The report gives the wins, draws and losses of variant A, its score with a 95%
+confidence interval, and the Elo difference that score corresponds to.
+
+Usage: python tournament.py variantA variantB [games] [workers] [file]
+
+"""
+
+VARIANT_DEFAULTS = {
+  'depth': 4,
+  'algorithm': 'alphabeta',
+  'evaluation': 'weights',
+  'aspirationWindow': None,
+  'transpositionTableMB': 1,  # 0 searches without a transposition table
+  'ordering': True,  # search with a MoveOrdering
+  'budgetMs': 100,  # time of a move with algorithm=mcts, which does not search to a depth
+}
+
+# number of random moves the games start from
+OPENING_MOVES = 4
+
+# z value of a 95% confidence interval
+CONFIDENCE_Z = 1.96
+
+def parseVariant(text):
+  # the settings of a variant from "key=value,key=value", values are parsed as JSON where possible
+  variant = dict(VARIANT_DEFAULTS)
+  for pair in filter(None, text.split(',')):
+    key, value = pair.split('=', 1)
+    if key not in VARIANT_DEFAULTS:
+      raise ValueError('unknown bot setting {0}'.format(key))
+    try:
+      variant[key] = json.loads(value)
+    except ValueError:
+      variant[key] = value
+  return variant
+
+def createBot(variant, playerID):
+  if variant['algorithm'] == 'mcts':
+    return MonteCarloBot()
+  table = TranspositionTable(variant['transpositionTableMB']) if variant['transpositionTableMB'] > 0 else None
+  moveOrdering = MoveOrdering() if variant['ordering'] else None
+  return Bot(playerID, table, moveOrdering, variant['algorithm'], variant['aspirationWindow'],
+    evaluation=variant['evaluation'])
+
+def randomOpening(rng, moves=OPENING_MOVES):
+  # random columns that do not end the game
+  game = Connect4()
+  opening = []
+  while len(opening) < moves:
+    column = rng.choice([column for row, column in game.getBitboard().legalMoves()])
+    game.move(column)
+    if not game.isPlaying():
+      game = Connect4()
+      opening = []
+      continue
+    game.switchPlayer()
+    opening.append(column)
+  return opening
+
+def playGame(variants, opening, aFirst):
+  """
+  Play one game between the variants (A, B) from an opening.
+  :return: the result from A's point of view (1, 0.5 or 0) and the columns played after the opening
+  """
+  game = Connect4()
+  for column in opening:
+    game.move(column)
+    game.switchPlayer()
+  first, second = variants if aFirst else variants[::-1]
+  players = {1: (createBot(first, 1), first), 2: (createBot(second, 2), second)}
+
+  while game.isPlaying():
+    bot, variant = players[game.getCurrentPlayer()]
+    if variant['algorithm'] == 'mcts':
+      move, score = bot.search(game.getBitboard(), variant['budgetMs'])
+    else:
+      bot.newSearch()
+      move, score = bot.search(game.getBitboard(), True, variant['depth'], bot.lossScore, bot.winScore)
+    game.move(move[1])
+    game.switchPlayer()
+
+  if not game.hasWinner():
+    result = 0.5
+  else:
+    result = 1.0 if (game.winner == 1) == aFirst else 0.0
+  return (result, game.history[len(opening):])
+
+def playPair(task):
+  # the two games of an opening, with each variant moving first once
+  index, variants, opening = task
+  games = []
+  for aFirst in (True, False):
+    result, moves = playGame(variants, opening, aFirst)
+    games.append({'game': 2 * index + (0 if aFirst else 1), 'opening': opening, 'aFirst': aFirst,
+      'result': result, 'moves': moves})
+  return games
+
+def eloDifference(score):
+  # the Elo difference that makes a player expect this score, score is clamped away from 0 and 1
+  score = min(max(score, 1e-6), 1 - 1e-6)
+  return -400 * math.log10(1 / score - 1)
+
+def summarize(results):
+  """
+  :param results: results of variant A, 1 for a win, 0.5 for a draw and 0 for a loss
+  :return: a dict with the wins, draws, losses, score, score interval, Elo difference and Elo interval
+  """
+  games = len(results)
+  wins = results.count(1.0)
+  draws = results.count(0.5)
+  losses = games - wins - draws
+  score = sum(results) / games if games > 0 else 0.5
+  # standard error of the mean score, every game is a win, a draw or a loss
+  deviation = math.sqrt(sum((result - score) ** 2 for result in results) / games) if games > 0 else 0.0
+  margin = CONFIDENCE_Z * deviation / math.sqrt(games) if games > 0 else 0.0
+  low, high = max(0.0, score - margin), min(1.0, score + margin)
+  return {
+    'games': games, 'wins': wins, 'draws': draws, 'losses': losses,
+    'score': score, 'scoreInterval': (low, high),
+    'elo': eloDifference(score), 'eloInterval': (eloDifference(low), eloDifference(high)),
+  }
+
+def runTournament(variantA, variantB, games, workers=1, path=None, seed=0):
+  """
+  Play games between two variants, written as in parseVariant.
+  :param games: number of games, rounded up to an even number (two games per opening)
+  :param path: file the results are appended to as JSON lines, None to not write them
+  :return: the summary of the results and the games per second
+  """
+  variants = (parseVariant(variantA), parseVariant(variantB))
+  rng = random.Random(seed)
+  tasks = [(index, variants, randomOpening(rng)) for index in range((games + 1) // 2)]
+
+  start = time.perf_counter()
+  results = []
+  output = open(path, 'a') if path is not None else None
+  executor = ProcessPoolExecutor(workers) if workers > 1 else None
+  try:
+    pairs = executor.map(playPair, tasks) if executor is not None else map(playPair, tasks)
+    for pair in pairs:
+      for game in pair:
+        results.append(game['result'])
+        if output is not None:
+          output.write(json.dumps(dict(game, a=variantA, b=variantB)) + '\n')
+          output.flush()
+  finally:
+    if executor is not None:
+      executor.shutdown()
+    if output is not None:
+      output.close()
+  seconds = time.perf_counter() - start
+  return (summarize(results), len(results) / seconds if seconds > 0 else 0.0)
+
+if __name__ == '__main__':
+  variantA = sys.argv[1] if len(sys.argv) > 1 else ''
+  variantB = sys.argv[2] if len(sys.argv) > 2 else ''
+  games = int(sys.argv[3]) if len(sys.argv) > 3 else 100
+  workers = int(sys.argv[4]) if len(sys.argv) > 4 else 1
+  path = sys.argv[5] if len(sys.argv) > 5 else 'tournament.jsonl'
+  summary, gamesPerSecond = runTournament(variantA, variantB, games, workers, path)
+  print('A: {0}\nB: {1}'.format(parseVariant(variantA), parseVariant(variantB)))
+  print('{0} games, {1:.2f} games/sec, results in {2}'.format(summary['games'], gamesPerSecond, path))
+  print('A wins {0}, draws {1}, loses {2}'.format(summary['wins'], summary['draws'], summary['losses']))
+  print('score {0:.3f} ({1:.3f} - {2:.3f})'.format(summary['score'], *summary['scoreInterval']))
+  print('Elo difference {0:+.0f} ({1:+.0f} - {2:+.0f})'.format(summary['elo'], *summary['eloInterval']))
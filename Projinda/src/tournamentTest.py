@@ -0,0 +1,62 @@
+import json
+import os
+import random
+import tempfile
+import unittest
+
+from tournament import eloDifference, parseVariant, playGame, randomOpening, runTournament, summarize
+
+
+class TournamentTest(unittest.TestCase):
+
+    # Settings that are not given keep their defaults
+    def test_parseVariant(self):
+        variant = parseVariant('depth=2,evaluation=threats,aspirationWindow=4')
+        self.assertEqual(variant['depth'], 2)
+        self.assertEqual(variant['evaluation'], 'threats')
+        self.assertEqual(variant['aspirationWindow'], 4)
+        self.assertEqual(variant['algorithm'], 'alphabeta')
+        with self.assertRaises(ValueError):
+            parseVariant('speed=11')
+
+    # Openings have the requested number of moves and are the same for the same seed
+    def test_randomOpening(self):
+        opening = randomOpening(random.Random(1))
+        self.assertEqual(len(opening), 4)
+        self.assertEqual(opening, randomOpening(random.Random(1)))
+
+    # A deeper search does not lose against a depth 1 search with the same evaluation
+    def test_playGame(self):
+        variants = (parseVariant('depth=4'), parseVariant('depth=1'))
+        for aFirst in (True, False):
+            result, moves = playGame(variants, [3, 3], aFirst)
+            self.assertIn(result, (1.0, 0.5))
+            self.assertGreater(len(moves), 0)
+
+    # Score, confidence interval and Elo difference
+    def test_summarize(self):
+        summary = summarize([1.0, 1.0, 0.5, 0.0])
+        self.assertEqual((summary['wins'], summary['draws'], summary['losses']), (2, 1, 1))
+        self.assertAlmostEqual(summary['score'], 0.625)
+        low, high = summary['scoreInterval']
+        self.assertLess(low, 0.625)
+        self.assertGreater(high, 0.625)
+        self.assertAlmostEqual(eloDifference(0.5), 0.0)
+        self.assertAlmostEqual(eloDifference(0.75), 190.85, places=2)
+        self.assertAlmostEqual(eloDifference(0.25), -eloDifference(0.75))
+
+    # Every game is written to the results file
+    def test_runTournament(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'results.jsonl')
+            summary, gamesPerSecond = runTournament('depth=2', 'depth=1', 4, path=path)
+            with open(path) as file:
+                games = [json.loads(line) for line in file]
+        self.assertEqual(summary['games'], 4)
+        self.assertEqual([game['game'] for game in games], [0, 1, 2, 3])
+        self.assertEqual(sum(game['result'] for game in games), summary['score'] * 4)
+        self.assertGreater(gamesPerSecond, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
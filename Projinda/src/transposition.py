@@ -0,0 +1,122 @@
+from array import array
+
+"""
+A transposition table for the bot's search.
+
+The same position is often reached through different move orders. The table
+remembers the result of searching a position so that the search can reuse it
+instead of searching the position again.
+
+The table has a fixed number of buckets, decided by its size in megabytes.
+Every bucket holds two entries:
+  slot 0 is depth-preferred, it is only replaced by a search that was at least as deep
+  slot 1 is always replaced by a result that did not fit in slot 0
+
+The entries are stored in flat arrays, so the memory use does not grow while
+searching.
+
+"""
+
+# The kind of score stored in an entry
+EXACT = 0  # the score is the exact value of the position
+LOWER = 1  # the search failed high, the score is a lower bound
+UPPER = 2  # the search failed low, the score is an upper bound
+
+# Positions that differ in a few discs have keys that differ in a few bits,
+# the keys are scrambled by this multiplier to spread them over the buckets
+HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+
+# The keys are stored as signed 64-bit integers. Larger keys, from boards of more than
+# 63 bits, are folded below KEY_LIMIT by taking them modulo a prime, so two positions
+# of a large board can share a key, which is as unlikely as with a 61-bit hash
+KEY_LIMIT = 1 << 63
+FOLD_PRIME = (1 << 61) - 1
+
+# Bytes used by one entry: key (8), score (8), depth (1), flag (1), move (1)
+ENTRY_BYTES = 19
+
+class TranspositionTable:
+
+	def __init__(self, sizeMB=8, exactDepth=False):
+		self.sizeMB = sizeMB
+		# normally an entry from a deeper search is also used by a shallower search of the same position,
+		# with exactDepth only entries of the same depth are used, so that the result of a search
+		# does not depend on the order in which positions were searched
+		self.exactDepth = exactDepth
+		self.buckets = max(1, int(sizeMB * 1024 * 1024) // (2 * ENTRY_BYTES))
+		self.clear()
+
+	def clear(self):
+		# remove all entries and reset the statistics
+		entries = 2 * self.buckets
+		self.keys = array('q', [-1]) * entries
+		self.scores = array('d', [0.0]) * entries
+		self.depths = array('b', [-1]) * entries
+		self.flags = array('b', [EXACT]) * entries
+		self.moves = array('b', [-1]) * entries
+		self.resetStats()
+
+	def resetStats(self):
+		self.hits = 0  # probes that found the position
+		self.misses = 0  # probes that did not find the position
+		self.collisions = 0  # misses where the bucket held other positions
+		self.stores = 0
+
+	def bucketIndex(self, key):
+		# index of the first entry of the bucket of a key
+		return 2 * (((key * HASH_MULTIPLIER) >> 32) % self.buckets)
+
+	def probe(self, key):
+		"""
+		:param key: a non-negative integer identifying the position
+		:return: (score, flag, depth, move) of the stored entry or None if the position is not stored
+		"""
+		if key >= KEY_LIMIT:
+			key %= FOLD_PRIME
+		index = self.bucketIndex(key)
+		keys = self.keys
+		if keys[index] != key:
+			index += 1
+			if keys[index] != key:
+				self.misses += 1
+				if keys[index - 1] != -1 or keys[index] != -1:
+					self.collisions += 1
+				return None
+
+		self.hits += 1
+		return (self.scores[index], self.flags[index], self.depths[index], self.moves[index])
+
+	def store(self, key, score, flag, depth, move):
+		"""
+		:param key: a non-negative integer identifying the position
+		:param score: the score found by the search
+		:param flag: EXACT, LOWER or UPPER
+		:param depth: the depth the position was searched to
+		:param move: the best column, -1 if there is none
+		"""
+		if key >= KEY_LIMIT:
+			key %= FOLD_PRIME
+		index = self.bucketIndex(key)
+		if self.keys[index] != key and depth < self.depths[index]:
+			# keep the deeper entry, use the always-replace slot
+			index += 1
+
+		self.keys[index] = key
+		self.scores[index] = score
+		self.flags[index] = flag
+		self.depths[index] = depth
+		self.moves[index] = move
+		self.stores += 1
+
+	def getStats(self):
+		# statistics about how useful the table has been
+		probes = self.hits + self.misses
+		return {
+			'hits': self.hits,
+			'misses': self.misses,
+			'collisions': self.collisions,
+			'stores': self.stores,
+			'hitRate': self.hits / probes if probes > 0 else 0.0,
+			'entries': 2 * self.buckets,
+			'used': 2 * self.buckets - self.keys.count(-1),
+		}
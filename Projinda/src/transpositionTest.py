@@ -0,0 +1,62 @@
+import unittest
+
+from bot import Bot
+from connect4 import Connect4
+from transposition import TranspositionTable, EXACT, LOWER, UPPER
+
+
+class TranspositionTableTest(unittest.TestCase):
+
+    def setUp(self):
+        self.table = TranspositionTable(0.001)
+
+    # A stored position is found again, an unknown position is not
+    def test_storeAndProbe(self):
+        self.table.store(42, 7.0, EXACT, 3, 4)
+        self.assertEqual(self.table.probe(42), (7.0, EXACT, 3, 4))
+        self.assertIsNone(self.table.probe(43))
+        self.assertEqual(self.table.hits, 1)
+        self.assertEqual(self.table.misses, 1)
+
+    # A shallow result does not replace a deeper one in the same bucket
+    def test_depthPreferredReplacement(self):
+        # find three keys that share a bucket
+        index = self.table.bucketIndex(1)
+        candidates = [key for key in range(1, 100 * self.table.buckets) if self.table.bucketIndex(key) == index]
+        deep, shallow, other = candidates[:3]
+
+        self.table.store(deep, 1.0, LOWER, 6, 0)
+        self.table.store(shallow, 2.0, UPPER, 2, 1)
+        self.assertIsNotNone(self.table.probe(deep))
+        self.assertIsNotNone(self.table.probe(shallow))
+
+        # the always-replace slot is overwritten, the deep entry stays
+        self.table.store(other, 3.0, EXACT, 1, 2)
+        self.assertIsNotNone(self.table.probe(deep))
+        self.assertIsNone(self.table.probe(shallow))
+        self.assertEqual(self.table.collisions, 1)
+
+    # The table makes the search visit fewer positions without changing its result
+    def test_searchWithTable(self):
+        game = Connect4()
+        for column in [3, 3, 2, 4, 4, 2, 1, 5, 3, 2]:
+            game.move(column)
+            game.switchPlayer()
+
+        plain = Bot(2)
+        withTable = Bot(2, TranspositionTable(1))
+        expected = plain.minimax_alphabeta(game.getBitboard(), True, 5, plain.lossScore, plain.winScore)
+        actual = withTable.minimax_alphabeta(game.getBitboard(), True, 5, plain.lossScore, plain.winScore)
+        self.assertEqual(actual, expected)
+        self.assertLess(withTable.nodes, plain.nodes)
+
+
+    # Keys of boards larger than 63 bits are folded into the table
+    def test_largeKeys(self):
+        key = (1 << 90) + 12345
+        self.table.store(key, 7.0, EXACT, 3, 2)
+        self.assertEqual(self.table.probe(key), (7.0, EXACT, 3, 2))
+        self.assertIsNone(self.table.probe(key + 1))
+
+if __name__ == '__main__':
+    unittest.main()